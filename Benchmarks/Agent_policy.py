@@ -0,0 +1,69 @@
+"""
+Agent policy benchmark for Inbox Assistant
+Model calls and latency with the full pipeline against per-class agent subsets
+"""
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent import InboxAssistant
+from agent_policy import AgentPolicy
+from examples_sample_messages import MESSAGE_METADATA, SAMPLE_MESSAGES
+from resilience import request_message
+from stub_llm import StubLlm
+
+ALERTS = [
+    "ALERT: disk usage at 91% on db-3. This is an automated message, do not reply.",
+    "Automated notification: nightly backup completed in 14 minutes.",
+    "Your monthly statement is ready. This is an automated email, please do not reply."
+]
+EXPECTED_URGENCY = {
+    message: MESSAGE_METADATA[key]["expected_urgency"]
+    for key, message in SAMPLE_MESSAGES.items()
+}
+
+
+def expected_urgency(llm_request):
+    """Classify each message as its labelled urgency; alerts are Medium."""
+    message = request_message(llm_request)
+    return {"urgency": EXPECTED_URGENCY.get(message, "Medium"), "reasoning": "Labelled."}
+
+
+def run(policy, messages, latency_s: float) -> dict:
+    stub = StubLlm(latency_s=latency_s, responses={"UrgencyClassifierAgent": expected_urgency})
+    assistant = InboxAssistant(model=stub, policy=policy)
+    assistant.warmup()
+    start = time.perf_counter()
+    for message in messages:
+        assistant.process_message_sync(message)
+    elapsed = time.perf_counter() - start
+    totals = assistant.stats.snapshot()["totals"]
+    return {
+        "calls": totals["calls"],
+        "saved_per_1000": totals["calls_saved_per_1000_messages"],
+        "ms_per_message": elapsed * 1e3 / len(messages)
+    }
+
+
+def run_benchmark(rounds: int = 5, latency_s: float = 0.005):
+    """Process the sample messages and some alerts with and without a policy."""
+    messages = (list(SAMPLE_MESSAGES.values()) + ALERTS) * rounds
+    print("="*70)
+    print(f"AGENT POLICY BENCHMARK ({len(messages)} messages, {latency_s * 1e3:.0f} ms per call)")
+    print("="*70)
+    full = run(None, messages, latency_s)
+    partial = run(AgentPolicy(), messages, latency_s)
+    for label, result in (("full", full), ("policy", partial)):
+        print(f"{label:<7} model calls {result['calls']:5} | "
+              f"{result['ms_per_message']:6.1f} ms/message | "
+              f"calls saved per 1,000 messages {result['saved_per_1000']:6.0f}")
+    print(f"Calls avoided: {1 - partial['calls'] / full['calls']:.1%}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    logging.getLogger("google_adk").setLevel(logging.ERROR)
+    run_benchmark()
@@ -0,0 +1,127 @@
+"""
+Archive format benchmark for Inbox Assistant
+Size and read time of a month of results: JSON dumps against the archive
+"""
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from archive import CODECS, ArchiveReader, ArchiveWriter, zstandard
+from examples_sample_messages import SAMPLE_MESSAGES
+from results import AnalysisResult, Urgency
+
+START = datetime(2026, 1, 1)
+TONES = ["Professional", "Polite", "Direct", "Urgent", "Friendly", "Angry"]
+
+
+def synthetic_results(count: int, templates: int, seed: int = 0):
+    """Results for a month of mail; most bodies repeat one of ``templates`` texts."""
+    rng = random.Random(seed)
+    bodies = list(SAMPLE_MESSAGES.values())
+    templates = [f"{rng.choice(bodies)}\nRef: T-{i}" for i in range(templates)]
+    step = timedelta(days=30) / count
+    for i in range(count):
+        message = rng.choice(templates) if rng.random() < 0.8 else f"{rng.choice(bodies)} #{i}"
+        urgency = rng.choice(["Low", "Low", "Medium", "High"])
+        yield START + i * step, AnalysisResult.from_dict({
+            "summary": f"Sender {i % 977} asks about order {rng.randrange(10**6)}.",
+            "urgency": urgency,
+            "reasoning": f"{urgency} because of the stated timeline.",
+            "tone": rng.sample(TONES, 2),
+            "formality": rng.choice(["Formal", "Informal"]),
+            "sentiment": rng.choice(["Positive", "Neutral", "Negative"]),
+            "draft_reply": "Thanks for reaching out, I will look into this and get back today.",
+            "reply_tone": "Professional",
+            "action_items": [f"Reply to sender {i % 977}"],
+            "language": "en"
+        }, message=message)
+
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def run_benchmark(count: int = 100_000, templates: int = 2_000):
+    """Write the same results as JSON, gzipped NDJSON and archives, then read them back."""
+    rows = list(synthetic_results(count, templates))
+    week = (START + timedelta(days=7), START + timedelta(days=14))
+    print("="*70)
+    print(f"ARCHIVE FORMAT BENCHMARK ({count:,} results, {templates:,} recurring bodies)")
+    print("="*70)
+    print(f"{'format':<16} {'size':>10} {'write':>8} {'read all':>9} {'week urgency':>13}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "results.json")
+        start = time.perf_counter()
+        with open(path, "w") as f:
+            json.dump([dict(r.to_dict(), received_at=t.isoformat()) for t, r in rows], f, indent=2)
+        write_s = time.perf_counter() - start
+        start = time.perf_counter()
+        with open(path) as f:
+            records = json.load(f)
+        read_s = time.perf_counter() - start
+        start = time.perf_counter()
+        with open(path) as f:
+            counts = Counter(
+                r["urgency"] for r in json.load(f)
+                if week[0].isoformat() <= r["received_at"] < week[1].isoformat()
+            )
+        query_s = time.perf_counter() - start
+        expected = counts
+        print(f"{'json (indent 2)':<16} {os.path.getsize(path) / 2**20:>8.1f}MB "
+              f"{write_s:>7.2f}s {read_s:>8.2f}s {query_s * 1e3:>11.0f}ms")
+
+        path = os.path.join(directory, "results.jsonl.gz")
+        start = time.perf_counter()
+        with gzip.open(path, "wt") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        write_s = time.perf_counter() - start
+        start = time.perf_counter()
+        with gzip.open(path, "rt") as f:
+            for line in f:
+                json.loads(line)
+        read_s = time.perf_counter() - start
+        print(f"{'ndjson.gz':<16} {os.path.getsize(path) / 2**20:>8.1f}MB "
+              f"{write_s:>7.2f}s {read_s:>8.2f}s {'':>13}")
+
+        for codec in CODECS:
+            if codec == "zstd" and zstandard is None:
+                print("zstd archive: zstandard is not installed")
+                continue
+            path = os.path.join(directory, f"archive-{codec}")
+            start = time.perf_counter()
+            with ArchiveWriter(path, codec=codec) as writer:
+                for received_at, result in rows:
+                    writer.add(result, received_at)
+            write_s = time.perf_counter() - start
+            with ArchiveReader(path) as reader:
+                start = time.perf_counter()
+                for _ in reader.records(messages=True):
+                    pass
+                read_s = time.perf_counter() - start
+                start = time.perf_counter()
+                counts = Counter()
+                for block in reader.scan(["urgency"], *week):
+                    counts.update(block["urgency"])
+                query_s = time.perf_counter() - start
+                assert {Urgency(k).label: v for k, v in counts.items()} == expected
+                stats = reader.stats()
+            print(f"{'archive ' + codec:<16} {directory_size(path) / 2**20:>8.1f}MB "
+                  f"{write_s:>7.2f}s {read_s:>8.2f}s {query_s * 1e3:>11.1f}ms")
+            print(f"{'':<16} {stats['segments']} segments, {stats['messages']:,} distinct bodies "
+                  f"({stats['message_bytes'] / 2**20:.1f}MB)")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    run_benchmark()
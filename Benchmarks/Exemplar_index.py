@@ -0,0 +1,107 @@
+"""
+Exemplar index benchmark for Inbox Assistant
+Embedding throughput, index build and query latency with a million stored
+replies, brute-force against IVF
+"""
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from examples_sample_messages import SAMPLE_MESSAGES
+from exemplars import EMBEDDING_DIM, ExemplarIndex, embed
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def synthetic_vectors(
+    rng: np.random.Generator, count: int, centers: np.ndarray, batch: int = 100_000
+) -> np.ndarray:
+    """Unit vectors scattered around topic centers, like replies to recurring questions."""
+    vectors = np.empty((count, centers.shape[1]), dtype=np.float32)
+    for start in range(0, count, batch):
+        size = min(batch, count - start)
+        chunk = centers[rng.integers(len(centers), size=size)]
+        chunk = chunk + 0.35 * rng.standard_normal(chunk.shape, dtype=np.float32)
+        vectors[start:start + size] = chunk / np.linalg.norm(chunk, axis=1, keepdims=True)
+    return vectors
+
+
+def time_queries(index: ExemplarIndex, queries: np.ndarray) -> List[float]:
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search_vector(query, k=2)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_benchmark(entries: int = 1_000_000, nlist: int = 1024, nprobe: int = 8, queries: int = 200):
+    """Embed the sample corpus, build a million-entry index and time searches."""
+    rng = np.random.default_rng(7)
+    messages = list(SAMPLE_MESSAGES.values())
+
+    print("="*70)
+    print(f"EXEMPLAR INDEX BENCHMARK ({entries:,} entries, dim {EMBEDDING_DIM})")
+    print("="*70)
+    rounds = 2000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message in messages:
+            embed(message)
+    elapsed = time.perf_counter() - start
+    count = rounds * len(messages)
+    print(f"Embedding:        {count / elapsed:,.0f} messages/s "
+          f"({elapsed / count * 1e6:.1f} us/message)")
+
+    centers = rng.standard_normal((4 * nlist, EMBEDDING_DIM), dtype=np.float32)
+    vectors = synthetic_vectors(rng, entries, centers)
+    replies = [f"reply {i}" for i in range(entries)]
+
+    index = ExemplarIndex(min_similarity=-1.0, nprobe=nprobe)
+    start = time.perf_counter()
+    index.add_vectors(vectors, replies)
+    elapsed = time.perf_counter() - start
+    print(f"Bulk add:         {elapsed:.2f} s ({entries / elapsed:,.0f} entries/s)")
+
+    probes = synthetic_vectors(rng, queries, centers)
+    brute = time_queries(index, probes)
+    exact = [index.search_vector(query, k=1)[0].reply for query in probes]
+    print(f"Brute-force query p50 {percentile(brute, 0.5) * 1e3:.2f} ms, "
+          f"p99 {percentile(brute, 0.99) * 1e3:.2f} ms")
+
+    start = time.perf_counter()
+    index.train(nlist)
+    elapsed = time.perf_counter() - start
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"IVF train:        {elapsed:.2f} s ({nlist} lists, peak RSS {rss_mb:.0f} MB)")
+
+    ivf = time_queries(index, probes)
+    recall = sum(
+        index.search_vector(query, k=1)[0].reply == reply for query, reply in zip(probes, exact)
+    ) / queries
+    print(f"IVF query         p50 {percentile(ivf, 0.5) * 1e3:.2f} ms, "
+          f"p99 {percentile(ivf, 0.99) * 1e3:.2f} ms (nprobe {nprobe}, "
+          f"recall@1 {recall:.1%})")
+
+    # The first add past the bulk-loaded capacity pays for one doubling.
+    timings = []
+    for message in messages * 50:
+        start = time.perf_counter()
+        index.add(message, "reply")
+        timings.append(time.perf_counter() - start)
+    print(f"Incremental add   p50 {percentile(timings, 0.5) * 1e6:.0f} us, "
+          f"max {max(timings) * 1e3:.0f} ms (embedding included)")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    run_benchmark()
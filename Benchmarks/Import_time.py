@@ -0,0 +1,78 @@
+"""
+Import-time benchmark for Inbox Assistant
+Measures cold import cost with `python -X importtime` against a budget
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+ROOT = Path(__file__).parent.parent
+
+# Cumulative import time allowed for each entry module, in milliseconds.
+IMPORT_BUDGET_MS = {
+    "agent": float(os.getenv("AGENT_IMPORT_BUDGET_MS", "150")),
+    "config": float(os.getenv("CONFIG_IMPORT_BUDGET_MS", "20"))
+}
+
+# Modules that must stay deferred until the first message is processed.
+DEFERRED_MODULES = ["google.adk", "google.genai", "langdetect", "dotenv", "pydantic"]
+
+
+def measure_import(module: str) -> Dict[str, float]:
+    """Import a module in a fresh interpreter and return per-module timings in ms."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            timings[name.strip()] = int(cumulative) / 1000
+    return timings
+
+
+def loaded_modules(module: str) -> set:
+    """Names of all modules loaded by importing ``module`` in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}; print('\\n'.join(sys.modules))"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return set(result.stdout.split())
+
+
+def run_benchmark(runs: int = 5) -> bool:
+    """Report the best of ``runs`` import times and check them against the budget."""
+    print("="*70)
+    print("IMPORT TIME BENCHMARK")
+    print("="*70)
+
+    within_budget = True
+    for module, budget_ms in IMPORT_BUDGET_MS.items():
+        best_ms = min(measure_import(module)[module] for _ in range(runs))
+        status = "✅" if best_ms <= budget_ms else "❌"
+        within_budget &= best_ms <= budget_ms
+        print(f"{status} import {module}: {best_ms:.1f}ms (budget {budget_ms:.0f}ms)")
+
+    modules = loaded_modules("agent")
+    for deferred in DEFERRED_MODULES:
+        eager = any(name == deferred or name.startswith(deferred + ".") for name in modules)
+        within_budget &= not eager
+        print(f"{'❌' if eager else '✅'} {deferred} deferred")
+
+    print("="*70)
+    return within_budget
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_benchmark() else 1)
@@ -0,0 +1,90 @@
+"""
+Keyword scan benchmark for Inbox Assistant heuristics
+Compares the compiled keyword scanner with the old substring line scan
+"""
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from examples_sample_messages import SAMPLE_MESSAGES
+from keywords import ACTION_VERBS, DEADLINE_PATTERNS, URGENCY_KEYWORDS, action_lines, scan
+from utils import extract_action_items
+
+
+def legacy_extract_action_items(text: str) -> List[str]:
+    """extract_action_items as it was before the keyword engine."""
+    action_items = []
+    for line in text.split("\n"):
+        line_lower = line.lower()
+        if any(verb in line_lower for verb in ACTION_VERBS):
+            if len(line.strip()) > 10:
+                action_items.append(line.strip())
+    return action_items if action_items else ["No specific action items detected"]
+
+
+_DEADLINE_RE = re.compile(r"\b(?:" + "|".join(DEADLINE_PATTERNS) + r")\b", re.IGNORECASE)
+
+
+def separate_passes(text: str):
+    """Actions, deadlines and urgency keywords found in three separate passes."""
+    lowered = text.lower()
+    return (
+        legacy_extract_action_items(text),
+        _DEADLINE_RE.findall(text),
+        [keyword for keyword in URGENCY_KEYWORDS if keyword in lowered]
+    )
+
+
+def build_dump(size_bytes: int) -> str:
+    """Concatenate sample messages into a thread dump of roughly size_bytes."""
+    samples = list(SAMPLE_MESSAGES.values())
+    parts, total, i = [], 0, 0
+    while total < size_bytes:
+        part = samples[i % len(samples)]
+        parts.append(part)
+        total += len(part) + 1
+        i += 1
+    return "\n".join(parts)
+
+
+def best_of(func: Callable[[str], object], text: str, repeats: int = 5) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run_benchmark(size_bytes: int = 1_000_000):
+    """Print scan throughput for the old and new implementations."""
+    text = build_dump(size_bytes)
+    mb = len(text.encode("utf-8")) / 1e6
+    legacy_items = legacy_extract_action_items(text)
+    items = extract_action_items(text)
+
+    print("="*70)
+    print(f"KEYWORD SCAN BENCHMARK ({mb:.2f} MB thread dump)")
+    print("="*70)
+    legacy = best_of(legacy_extract_action_items, text)
+    for name, func in [
+        ("legacy substring scan", legacy_extract_action_items),
+        ("extract_action_items", extract_action_items),
+        ("action_lines", action_lines),
+        ("three separate passes", separate_passes),
+        ("single-pass scan", scan)
+    ]:
+        elapsed = legacy if func is legacy_extract_action_items else best_of(func, text)
+        print(f"{name:<34} {elapsed * 1000:>8.1f} ms  {mb / elapsed:>7.1f} MB/s  "
+              f"({elapsed / legacy:.2f}x legacy)")
+    print(f"\nAction lines: legacy {len(legacy_items):,}, new {len(items):,} "
+          f"({len(legacy_items) - len(items):,} substring false positives dropped)")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    run_benchmark()
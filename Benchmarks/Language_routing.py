@@ -0,0 +1,91 @@
+"""
+Language routing benchmark for Inbox Assistant
+Per-language latency and tokens, and prompt prefix switches with and without language batching
+"""
+import asyncio
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent import InboxAssistant
+from stub_llm import StubLlm
+
+MESSAGES = {
+    "en": [
+        "The production database is down and customers cannot log in. Please fix it today.",
+        "Could we move our weekly planning meeting to Thursday afternoon next week?",
+        "Thanks for the report, I have shared it with the finance team for review."
+    ],
+    "es": [
+        "Hola, el servidor de producción no responde y los clientes no pueden entrar. ¿Pueden revisarlo hoy?",
+        "Buenos días, quería confirmar la reunión del jueves con el equipo de ventas en la oficina.",
+        "Gracias por el informe, lo he compartido con el equipo de finanzas para su revisión."
+    ],
+    "de": [
+        "Hallo, der Server ist seit heute Morgen nicht erreichbar und unsere Kunden können sich nicht anmelden.",
+        "Guten Tag, ich möchte unser Treffen am Donnerstag mit dem Vertriebsteam gerne verschieben.",
+        "Vielen Dank für den Bericht, ich habe ihn zur Prüfung an das Finanzteam weitergeleitet."
+    ]
+}
+
+
+def workload(count: int, seed: int = 7) -> list:
+    """Mostly English mail with Spanish and German mixed in."""
+    rng = random.Random(seed)
+    languages = rng.choices(list(MESSAGES), weights=(6, 2, 2), k=count)
+    # Numbered so no message is reused as a near-duplicate.
+    return [f"{rng.choice(MESSAGES[language])} (#{i})" for i, language in enumerate(languages)]
+
+
+def run(messages, group_languages: bool, latency_s: float) -> dict:
+    instructions = []
+
+    def summarize(llm_request):
+        instructions.append(str(llm_request.config.system_instruction))
+        return {"summary": "A summary."}
+
+    stub = StubLlm(latency_s=latency_s, usage=True, responses={"SummarizerAgent": summarize})
+    assistant = InboxAssistant(model=stub)
+    assistant.warmup()
+
+    async def consume():
+        async for _ in assistant.process_batch(
+            enumerate(messages), concurrency=4, group_languages=group_languages
+        ):
+            pass
+
+    start = time.perf_counter()
+    asyncio.run(consume())
+    elapsed = time.perf_counter() - start
+    switches = sum(1 for a, b in zip(instructions, instructions[1:]) if a != b)
+    return {
+        "ms_per_message": elapsed * 1e3 / len(messages),
+        "switches": switches,
+        "languages": assistant.stats.snapshot()["languages"]
+    }
+
+
+def run_benchmark(count: int = 300, latency_s: float = 0.002):
+    """Process a mixed-language batch in input order and grouped by language."""
+    messages = workload(count)
+    print("="*70)
+    print(f"LANGUAGE ROUTING BENCHMARK ({count} messages, {latency_s * 1e3:.0f} ms per call)")
+    print("="*70)
+    for label, grouped in (("input order", False), ("grouped", True)):
+        result = run(messages, grouped, latency_s)
+        print(f"{label:<12} {result['ms_per_message']:6.1f} ms/message | "
+              f"summarizer prompt switches {result['switches']:4}")
+    print(f"\n{'Language':<10} {'Messages':>8} {'Mean latency':>13} {'Tokens/message':>15}")
+    for language, entry in sorted(result["languages"].items()):
+        print(f"{language:<10} {entry['messages']:>8} {entry['mean_latency_s'] * 1e3:>10.1f} ms "
+              f"{entry['tokens_per_message']:>15.0f}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    logging.getLogger("google_adk").setLevel(logging.ERROR)
+    run_benchmark()
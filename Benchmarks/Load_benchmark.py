@@ -0,0 +1,135 @@
+"""
+Load benchmark for the Inbox Assistant ASGI service
+Drives the app in-process against a stub model with simulated latency
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent import InboxAssistant
+from examples_sample_messages import SAMPLE_MESSAGES
+from server import InboxAssistantServer, MicroBatcher
+from stub_llm import StubLlm
+
+
+async def request(app, path: str, payload: Dict) -> Tuple[int, bytes]:
+    """Send one HTTP request straight to the ASGI app."""
+    body = json.dumps(payload).encode("utf-8")
+    scope = {"type": "http", "method": "POST", "path": path, "headers": []}
+    sent = False
+    status, chunks = 0, []
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.Event().wait()
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(event):
+        nonlocal status
+        if event["type"] == "http.response.start":
+            status = event["status"]
+        else:
+            chunks.append(event.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run_load(
+    requests: int,
+    clients: int,
+    latency_s: float,
+    queue_size: int,
+    concurrency: int,
+    path: str,
+    backoff_s: float = 0.05,
+    outage: bool = False
+) -> Dict:
+    """Fire `requests` requests from `clients` concurrent clients.
+
+    Clients back off for `backoff_s` after a 429 and move on to the next
+    request, as a caller honoring Retry-After with load shedding would.
+    """
+    assistant = InboxAssistant(model=StubLlm(latency_s=latency_s, fail=outage)).warmup()
+    app = InboxAssistantServer(assistant, MicroBatcher(
+        assistant, queue_size=queue_size, concurrency=concurrency
+    ))
+    samples = list(SAMPLE_MESSAGES.values())
+    latencies, statuses = [], {}
+    counter = iter(range(requests))
+
+    async def client():
+        for i in counter:
+            start = time.perf_counter()
+            status, _ = await request(app, path, {"message": samples[i % len(samples)]})
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            elif status == 429:
+                await asyncio.sleep(backoff_s)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    await app.batcher.stop()
+
+    return {
+        "elapsed_s": elapsed,
+        "statuses": statuses,
+        "throughput": statuses.get(200, 0) / elapsed,
+        "p50_s": statistics.median(latencies) if latencies else 0.0,
+        "p99_s": percentile(latencies, 0.99) if latencies else 0.0,
+        "counters": dict(app.batcher.counters),
+        "degraded": assistant.stats.snapshot()["totals"]["degraded"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Inbox Assistant ASGI app")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub latency per agent call (s)")
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--stream", action="store_true", help="Use /analyze/stream")
+    parser.add_argument("--outage", action="store_true", help="Make every model call fail")
+    args = parser.parse_args()
+    # The stub reports no token usage, which ADK logs once per agent call.
+    logging.getLogger("google_adk").setLevel(logging.ERROR)
+
+    path = "/analyze/stream" if args.stream else "/analyze"
+    report = asyncio.run(run_load(
+        args.requests, args.clients, args.latency,
+        args.queue_size, args.concurrency, path, outage=args.outage
+    ))
+
+    print("="*70)
+    print(f"LOAD TEST {path} ({args.requests:,} requests, {args.clients} clients, "
+          f"{args.latency * 1000:.0f} ms/agent call)")
+    print("="*70)
+    print(f"Elapsed:     {report['elapsed_s']:.2f}s")
+    print(f"Status:      {report['statuses']}")
+    print(f"Throughput:  {report['throughput']:.1f} ok/s")
+    print(f"Latency:     p50 {report['p50_s'] * 1000:.0f} ms, p99 {report['p99_s'] * 1000:.0f} ms")
+    print(f"Batcher:     {report['counters']}")
+    print(f"Degraded:    {report['degraded']} agent outputs")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
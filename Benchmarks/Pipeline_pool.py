@@ -0,0 +1,68 @@
+"""
+Pipeline pool benchmark for Inbox Assistant
+Cost of constructing an assistant per request, fresh against pooled
+"""
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent import InboxAssistant
+from pool import PipelinePool
+from stub_llm import StubLlm
+
+MESSAGE = "Can you send the contract by Friday?"
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def time_requests(make: Callable[[], InboxAssistant], requests: int) -> tuple:
+    """Time construction and the first message for one assistant per request."""
+    build, total = [], []
+    for _ in range(requests):
+        start = time.perf_counter()
+        assistant = make()
+        assistant.runner
+        built = time.perf_counter()
+        asyncio.run(assistant.process_message(MESSAGE))
+        build.append(built - start)
+        total.append(time.perf_counter() - start)
+    return build, total
+
+
+def run_benchmark(requests: int = 200):
+    """Compare building per request with borrowing from a warmed pool."""
+    stub = StubLlm()
+    # Import the SDKs and load language profiles outside the timings.
+    InboxAssistant(model=stub).warmup()
+
+    print("="*70)
+    print(f"PIPELINE POOL BENCHMARK ({requests} requests, one assistant each)")
+    print("="*70)
+    pool = PipelinePool()
+    start = time.perf_counter()
+    pool.warm({"model": stub})
+    print(f"Pool warm-up:      {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    for label, make in [
+        ("fresh", lambda: InboxAssistant(model=stub)),
+        ("pooled", lambda: pool.acquire(model=stub)),
+    ]:
+        build, total = time_requests(make, requests)
+        print(f"{label:<7} construct p50 {percentile(build, 0.5) * 1e3:7.3f} ms, "
+              f"p99 {percentile(build, 0.99) * 1e3:7.3f} ms | with first message "
+              f"p50 {percentile(total, 0.5) * 1e3:7.2f} ms")
+    print(f"Pool: {pool.stats()}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    logging.getLogger("google_adk").setLevel(logging.ERROR)
+    run_benchmark()
@@ -0,0 +1,63 @@
+"""
+Profiling overhead benchmark for Inbox Assistant
+Per-message cost of the profiling hooks when disabled, sampled and enabled
+"""
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent import InboxAssistant
+from profiling import Profiler, span
+from stub_llm import StubLlm
+
+MESSAGE = "Can you send the contract by Friday? The client is waiting."
+
+
+def time_messages(profiler: Optional[Profiler], messages: int) -> float:
+    """Mean seconds per message on the offline stub model."""
+    assistant = InboxAssistant(model=StubLlm(), profiler=profiler).warmup()
+
+    async def run():
+        for _ in range(messages):
+            await assistant.process_message(MESSAGE)
+
+    asyncio.run(run())
+    start = time.perf_counter()
+    asyncio.run(run())
+    return (time.perf_counter() - start) / messages
+
+
+def run_benchmark(messages: int = 300, spans: int = 1_000_000):
+    """Compare message latency across profiler settings."""
+    print("="*70)
+    print(f"PROFILING OVERHEAD BENCHMARK ({messages} messages per setting)")
+    print("="*70)
+    start = time.perf_counter()
+    for _ in range(spans):
+        with span("stage"):
+            pass
+    print(f"Disabled span:        {(time.perf_counter() - start) / spans * 1e9:.0f} ns")
+
+    baseline = time_messages(None, messages)
+    print(f"{'no profiler':<22}{baseline * 1e3:8.3f} ms/message")
+    for label, profiler in [
+        ("1% sampled spans", Profiler(sample_rate=0.01)),
+        ("all spans", Profiler()),
+        ("spans + 1 ms stacks", Profiler(sampling_interval_s=0.001)),
+        ("spans + tracemalloc", Profiler(trace_allocations=True)),
+    ]:
+        elapsed = time_messages(profiler, messages)
+        profiler.close()
+        print(f"{label:<22}{elapsed * 1e3:8.3f} ms/message "
+              f"({(elapsed / baseline - 1) * 100:+.1f}%)")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    logging.getLogger("google_adk").setLevel(logging.ERROR)
+    run_benchmark()
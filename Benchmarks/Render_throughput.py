@@ -0,0 +1,92 @@
+"""
+Rendering throughput benchmark for Inbox Assistant results
+Compares building a page with string concatenation against streaming
+render_many to a file, reporting time and peak traced memory
+"""
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rendering import FORMATS, render_many
+
+RESULT = {
+    "summary": "Production database is down and transactions are failing.",
+    "urgency": "High",
+    "reasoning": "Revenue impacting outage with an escalation deadline.",
+    "tone": ["Urgent", "Direct"],
+    "draft_reply": "We are on it and will update you within 15 minutes.",
+    "action_items": ["Restore the database", "Escalate to VP Engineering"],
+    "language": "en"
+}
+
+
+def legacy_format(output: Dict[str, Any]) -> str:
+    """format_agent_output as it was before the rendering module."""
+    formatted = "\n" + "="*60 + "\n"
+    formatted += "INBOX ASSISTANT ANALYSIS\n"
+    formatted += "="*60 + "\n\n"
+    if "summary" in output:
+        formatted += f"📝 SUMMARY:\n{output['summary']}\n\n"
+    if "urgency" in output:
+        urgency_emoji = {"High": "🔴", "Medium": "🟡", "Low": "🟢"}
+        emoji = urgency_emoji.get(output['urgency'], "⚪")
+        formatted += f"{emoji} URGENCY: {output['urgency']}\n\n"
+    if "tone" in output:
+        formatted += f"😊 TONE: {output['tone']}\n\n"
+    if "draft_reply" in output:
+        formatted += f"✉️ SUGGESTED REPLY:\n{output['draft_reply']}\n\n"
+    if "action_items" in output:
+        formatted += "✅ ACTION ITEMS:\n"
+        for i, item in enumerate(output['action_items'], 1):
+            formatted += f"  {i}. {item}\n"
+        formatted += "\n"
+    formatted += "="*60 + "\n"
+    return formatted
+
+
+def measure(func, *args):
+    """Return elapsed seconds and peak traced bytes of one call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def legacy_page(results):
+    page = ""
+    for result in results:
+        page += legacy_format(result)
+    with open(os.devnull, "w", encoding="utf-8") as out:
+        out.write(page)
+
+
+def streamed_page(results, fmt):
+    with open(os.devnull, "w", encoding="utf-8") as out:
+        render_many(results, fmt, out)
+
+
+def run_benchmark(count: int = 10_000):
+    """Print time and peak memory for writing `count` results to a file."""
+    results = [RESULT] * count
+
+    print("="*70)
+    print(f"RENDER THROUGHPUT BENCHMARK ({count:,} results)")
+    print("="*70)
+    rows = [("legacy terminal (+=)", measure(legacy_page, results))]
+    rows += [(fmt, measure(streamed_page, results, fmt)) for fmt in FORMATS]
+    for name, (elapsed, peak) in rows:
+        print(f"{name:<24} {elapsed * 1000:>8.1f} ms  {count / elapsed:>10,.0f} results/s  "
+              f"peak {peak / 1e6:>6.2f} MB")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,85 @@
+"""
+Memory benchmark for stored analysis results
+Compares legacy merged result dicts with slotted AnalysisResult records
+"""
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from examples_sample_messages import SAMPLE_MESSAGES
+from results import AnalysisResult
+
+ANALYSIS = {
+    "summary": "Production database is down and transactions are failing.",
+    "urgency": "High",
+    "reasoning": "Revenue impacting outage with an escalation deadline.",
+    "tone": ["Urgent", "Direct"],
+    "formality": "Formal",
+    "sentiment": "Negative",
+    "draft_reply": "We are on it and will update you within 15 minutes.",
+    "reply_tone": "Professional",
+    "action_items": ["Restore the database", "Escalate to VP Engineering"]
+}
+
+
+def legacy_result(message: str) -> Dict:
+    """Result as returned before AnalysisResult.
+
+    Session services that serialize state hand back a separate copy of the
+    message under ``original_message``, emulated here with a re-decode.
+    """
+    result = {key: list(value) if isinstance(value, list) else value
+              for key, value in ANALYSIS.items()}
+    result["language"] = "en"
+    result["original_message"] = message.encode("utf-8").decode("utf-8")
+    result["message"] = message
+    return result
+
+
+def compact_result(message: str) -> AnalysisResult:
+    return AnalysisResult.from_dict(dict(ANALYSIS, language="en"), message=message)
+
+
+def hashed_result(message: str) -> AnalysisResult:
+    result = compact_result(message)
+    result.release_message()
+    return result
+
+
+def bytes_per_result(build: Callable[[str], object], messages: List[str]) -> float:
+    """Average traced allocation per stored result; shared objects are not counted."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    stored = [build(message) for message in messages]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del stored
+    return allocated / len(messages)
+
+
+def run_benchmark(count: int = 100_000):
+    """Print per-result memory for each representation."""
+    samples = list(SAMPLE_MESSAGES.values())
+    messages = [samples[i % len(samples)] for i in range(count)]
+
+    print("="*70)
+    print(f"RESULT MEMORY BENCHMARK ({count:,} results)")
+    print("="*70)
+    legacy = bytes_per_result(legacy_result, messages)
+    for name, build in [
+        ("legacy dict", legacy_result),
+        ("AnalysisResult", compact_result),
+        ("AnalysisResult (hash only)", hashed_result)
+    ]:
+        size = legacy if build is legacy_result else bytes_per_result(build, messages)
+        print(f"{name:<28} {size:>8.0f} bytes/result  ({size / legacy:.0%} of legacy)")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    run_benchmark()
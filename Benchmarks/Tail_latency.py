@@ -0,0 +1,85 @@
+"""
+Tail latency benchmark for hedged model calls
+Runs the pipeline on a stub model with heavy-tailed latency, with and
+without hedging, and reports per-message latency percentiles
+"""
+import asyncio
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent import InboxAssistant
+from examples_sample_messages import SAMPLE_MESSAGES
+from stub_llm import StubLlm
+
+
+def heavy_tailed_latency(rng: random.Random, base_s: float = 0.02, tail_p: float = 0.03):
+    """Mostly ~base_s, but a `tail_p` share of calls stall 10-50x longer."""
+    def draw() -> float:
+        latency = rng.lognormvariate(0, 0.3) * base_s
+        if rng.random() < tail_p:
+            latency *= rng.uniform(10, 50)
+        return latency
+    return draw
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run(hedging: bool, count: int, concurrency: int, seed: int) -> Dict:
+    stub = StubLlm(latency_fn=heavy_tailed_latency(random.Random(seed)))
+    assistant = InboxAssistant(model=stub, hedging=hedging).warmup()
+    samples = list(SAMPLE_MESSAGES.values())
+    latencies = []
+
+    async def timed(index: int):
+        start = time.perf_counter()
+        await assistant.process_message(f"{samples[index % len(samples)]}\n#{index}")
+        latencies.append(time.perf_counter() - start)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(index: int):
+        async with semaphore:
+            await timed(index)
+
+    await asyncio.gather(*(bounded(i) for i in range(count)))
+    totals = assistant.stats.snapshot()["totals"]
+    return {
+        "p50_s": percentile(latencies, 0.50),
+        "p95_s": percentile(latencies, 0.95),
+        "p99_s": percentile(latencies, 0.99),
+        "model_calls": sum(stub.calls.values()),
+        "hedges": totals["hedges"]
+    }
+
+
+def run_benchmark(count: int = 400, concurrency: int = 20, seed: int = 7):
+    """Print per-message latency percentiles with hedging off and on."""
+    logging.getLogger("google_adk").setLevel(logging.ERROR)
+    baseline = asyncio.run(run(False, count, concurrency, seed))
+    hedged = asyncio.run(run(True, count, concurrency, seed))
+
+    print("="*70)
+    print(f"TAIL LATENCY BENCHMARK ({count} messages, heavy-tailed stub latency)")
+    print("="*70)
+    print(f"{'':<12}{'p50':>10}{'p95':>10}{'p99':>10}{'calls':>10}{'hedges':>10}")
+    for name, report in [("no hedging", baseline), ("hedging", hedged)]:
+        print(f"{name:<12}"
+              f"{report['p50_s'] * 1000:>8.0f}ms{report['p95_s'] * 1000:>8.0f}ms"
+              f"{report['p99_s'] * 1000:>8.0f}ms{report['model_calls']:>10}{report['hedges']:>10}")
+    extra = hedged["model_calls"] / baseline["model_calls"] - 1
+    print(f"\np99 reduction: {1 - hedged['p99_s'] / baseline['p99_s']:.0%} "
+          f"for {extra:.1%} extra model calls")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    run_benchmark()
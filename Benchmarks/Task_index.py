@@ -0,0 +1,83 @@
+"""
+Task index benchmark for Inbox Assistant
+Per-message update latency and lookup times with a million stored tasks
+"""
+import random
+import resource
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from keywords import ACTION_VERBS
+from task_index import TaskIndex
+
+DEADLINES = ["", " by Friday", " by tomorrow", " EOD", " by March 20", " next Monday"]
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def random_item(rng: random.Random, vocabulary: List[str]) -> str:
+    words = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(2, 5)))
+    return f"{rng.choice(ACTION_VERBS).capitalize()} the {words}{rng.choice(DEADLINES)}"
+
+
+def run_benchmark(tasks: int = 1_000_000, messages: int = 2000, items_per_message: int = 3):
+    """Fill an index with ``tasks`` tasks, then time incremental updates and queries."""
+    rng = random.Random(7)
+    vocabulary = [f"term{i}" for i in range(20000)]
+    received = date(2025, 3, 5)
+    index = TaskIndex()
+
+    print("="*70)
+    print(f"TASK INDEX BENCHMARK ({tasks:,} tasks)")
+    print("="*70)
+    start = time.perf_counter()
+    for i in range(tasks):
+        index.add(random_item(rng, vocabulary), thread_id=f"thread{i // 5}", received_at=received)
+    elapsed = time.perf_counter() - start
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Bulk load:        {elapsed:.1f} s ({len(index):,} tasks after dedup, "
+          f"{elapsed / tasks * 1e6:.1f} us/item, peak RSS {rss_mb:.0f} MB)")
+
+    # Follow-up messages: a mix of repeated and new action items.
+    timings = []
+    merged = 0
+    for m in range(messages):
+        items = []
+        for _ in range(items_per_message):
+            if rng.random() < 0.5:
+                items.append(index.get(rng.randrange(len(index))).text)
+            else:
+                items.append(random_item(rng, vocabulary))
+        before = len(index)
+        start = time.perf_counter()
+        index.add_items(items, message_id=f"m{m}", thread_id=f"follow{m}", received_at=received)
+        timings.append(time.perf_counter() - start)
+        merged += items_per_message - (len(index) - before)
+    print(f"Per-message update ({items_per_message} items): "
+          f"p50 {percentile(timings, 0.5) * 1e3:.3f} ms, "
+          f"p99 {percentile(timings, 0.99) * 1e3:.3f} ms "
+          f"({merged:,} of {messages * items_per_message:,} items merged)")
+
+    for label, kwargs in [
+        ("keyword", {"keywords": "term42"}),
+        ("verb + keyword", {"keywords": "send term42"}),
+        ("thread", {"thread_id": "thread1234"}),
+        ("deadline range", {"due_from": received, "due_to": received + timedelta(days=1)}),
+    ]:
+        start = time.perf_counter()
+        found = index.query(**kwargs)
+        elapsed = time.perf_counter() - start
+        print(f"Query by {label:<16} {elapsed * 1e3:>8.3f} ms  ({len(found):,} tasks)")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    run_benchmark()
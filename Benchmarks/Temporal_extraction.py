@@ -0,0 +1,47 @@
+"""
+Temporal extraction benchmark for Inbox Assistant
+Throughput of local deadline resolution on the sample corpus and how its
+urgency pre-signal lines up with the expected labels
+"""
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from examples_sample_messages import MESSAGE_METADATA, SAMPLE_MESSAGES
+from temporal import extract, urgency_signal
+
+SENT = datetime(2025, 3, 5, 10, 0)
+
+
+def run_benchmark(rounds: int = 2000):
+    """Time extract() over the sample corpus and print per-message signals."""
+    messages = list(SAMPLE_MESSAGES.items())
+    corpus_bytes = sum(len(text.encode("utf-8")) for _, text in messages)
+
+    print("="*70)
+    print(f"TEMPORAL EXTRACTION BENCHMARK ({len(messages)} messages x {rounds} rounds)")
+    print("="*70)
+    for key, text in messages:
+        expressions = extract(text, SENT)
+        signal = urgency_signal(expressions, SENT)
+        expected = MESSAGE_METADATA.get(key, {}).get("expected_urgency", "-")
+        found = ", ".join(f"{e.text} -> {e.due:%a %H:%M}" for e in expressions) or "none"
+        print(f"{key:<22} signal {signal or '-':<7} expected {expected:<7} {found}")
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for _, text in messages:
+            extract(text, SENT)
+    elapsed = time.perf_counter() - start
+    count = rounds * len(messages)
+    print(f"\n{count:,} messages in {elapsed:.2f} s: {count / elapsed:,.0f} messages/s, "
+          f"{corpus_bytes * rounds / elapsed / 1e6:.1f} MB/s, "
+          f"{elapsed / count * 1e6:.1f} us/message")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    run_benchmark()
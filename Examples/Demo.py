@@ -7,11 +7,12 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from agent import InboxAssistant, analyze_and_print
+from cassette import CASSETTE_TIMESTAMP, MODES, REPLAY, Cassette
 from examples_sample_messages import SAMPLE_MESSAGES, get_sample_message
 from utils import format_agent_output
 
 
-def run_demo():
+def run_demo(cassette: Cassette = None):
     """Run demonstration of Inbox Assistant on sample messages."""
 
     print("="*70)
@@ -32,7 +33,8 @@ def run_demo():
         "friendly_casual"
     ]
 
-    assistant = InboxAssistant()
+    assistant = InboxAssistant(cassette=cassette)
+    received_at = CASSETTE_TIMESTAMP if cassette is not None else None
 
     for i, sample_key in enumerate(demo_samples, 1):
         message = get_sample_message(sample_key)
@@ -49,7 +51,7 @@ def run_demo():
         print("\n🤖 PROCESSING WITH MULTI-AGENT PIPELINE...\n")
 
         try:
-            result = assistant.process_message_sync(message)
+            result = assistant.process_message_sync(message, received_at=received_at)
             print(format_agent_output(result))
         except Exception as e:
             print(f"❌ Error processing message: {str(e)}")
@@ -60,7 +62,7 @@ def run_demo():
     print("="*70)
 
 
-def interactive_mode():
+def interactive_mode(cassette: Cassette = None):
     """Interactive mode for testing custom messages."""
 
     print("="*70)
@@ -69,7 +71,8 @@ def interactive_mode():
     print("\nEnter a message to analyze (or 'quit' to exit):")
     print("For multi-line input, enter '---' on a new line when done\n")
 
-    assistant = InboxAssistant()
+    assistant = InboxAssistant(cassette=cassette)
+    received_at = CASSETTE_TIMESTAMP if cassette is not None else None
 
     while True:
         print("\n" + "-"*70)
@@ -97,7 +100,7 @@ def interactive_mode():
         print("\n🤖 PROCESSING...\n")
 
         try:
-            result = assistant.process_message_sync(message)
+            result = assistant.process_message_sync(message, received_at=received_at)
             print(format_agent_output(result))
         except Exception as e:
             print(f"❌ Error: {str(e)}")
@@ -115,9 +118,26 @@ if __name__ == "__main__":
         help='Run mode: demo (preset examples) or interactive (custom input)'
     )
 
+    parser.add_argument(
+        '--cassette',
+        help='Record model calls to, or replay them from, this .jsonl.gz file'
+    )
+    parser.add_argument(
+        '--cassette-mode',
+        choices=MODES,
+        default=REPLAY,
+        help='record: call the model and save; replay: run offline; '
+             'auto: replay what is recorded and record the rest'
+    )
+
     args = parser.parse_args()
 
-    if args.mode == 'interactive':
-        interactive_mode()
-    else:
-        run_demo()
+    cassette = Cassette(args.cassette, args.cassette_mode) if args.cassette else None
+    try:
+        if args.mode == 'interactive':
+            interactive_mode(cassette)
+        else:
+            run_demo(cassette)
+    finally:
+        if cassette is not None and cassette.mode != REPLAY:
+            cassette.save()
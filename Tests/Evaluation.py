@@ -1,9 +1,13 @@
 """
 Evaluation metrics for Inbox Assistant
 """
-from typing import Dict, List, Any
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
 import json
+import time
 from agent import InboxAssistant
+from agent_policy import AgentPolicy
+from cassette import CASSETTE_TIMESTAMP, MODES, REPLAY, Cassette
 from examples_sample_messages import SAMPLE_MESSAGES, MESSAGE_METADATA
 
 
@@ -32,19 +36,22 @@ def calculate_tone_overlap(predicted_tones: List[str], expected_tones: List[str]
 def evaluate_single_message(
     message_key: str, 
     message: str, 
-    assistant: InboxAssistant
+    assistant: InboxAssistant,
+    received_at: Optional[datetime] = None
 ) -> Dict[str, Any]:
     """Evaluate system on a single message."""
 
     metadata = MESSAGE_METADATA.get(message_key, {})
 
+    start = time.perf_counter()
     try:
-        result = assistant.process_message_sync(message)
+        result = assistant.process_message_sync(message, received_at=received_at)
     except Exception as e:
         return {
             "error": str(e),
             "message_key": message_key
         }
+    latency_s = time.perf_counter() - start
 
     predicted_urgency = result.get("urgency", "Unknown")
     predicted_tone = result.get("tone", [])
@@ -60,7 +67,8 @@ def evaluate_single_message(
         "has_actions": len(action_items) > 0 and action_items[0] != "No action required",
         "expected_actions": metadata.get("should_have_actions", False),
         "language_detected": result.get("language", "unknown"),
-        "expected_language": metadata.get("language", "en")
+        "expected_language": metadata.get("language", "en"),
+        "latency_s": latency_s
     }
 
     metrics["action_detection_correct"] = (
@@ -76,14 +84,21 @@ def evaluate_single_message(
 
 def evaluate_system(
     test_messages: Dict[str, str] = None,
-    verbose: bool = True
+    verbose: bool = True,
+    assistant: InboxAssistant = None,
+    received_at: Optional[datetime] = None
 ) -> Dict[str, Any]:
-    """Evaluate the complete Inbox Assistant system."""
+    """Evaluate the complete Inbox Assistant system.
+
+    With a cassette on the assistant, pass CASSETTE_TIMESTAMP as
+    ``received_at`` so recordings replay.
+    """
 
     if test_messages is None:
         test_messages = SAMPLE_MESSAGES
 
-    assistant = InboxAssistant()
+    if assistant is None:
+        assistant = InboxAssistant()
     results = []
 
     if verbose:
@@ -96,7 +111,7 @@ def evaluate_system(
         if verbose:
             print(f"Testing: {msg_key}...", end=" ")
 
-        metrics = evaluate_single_message(msg_key, message, assistant)
+        metrics = evaluate_single_message(msg_key, message, assistant, received_at)
         results.append(metrics)
 
         if verbose:
@@ -115,6 +130,8 @@ def evaluate_system(
         ) / len(results),
         "language_accuracy": sum(r.get("language_correct", 0) for r in results) / len(results),
         "error_rate": sum(1 for r in results if "error" in r) / len(results),
+        "avg_latency_s": sum(r.get("latency_s", 0) for r in results) / len(results),
+        "model_usage": assistant.stats.snapshot(),
         "individual_results": results
     }
 
@@ -127,11 +144,166 @@ def evaluate_system(
         print(f"Action Detection Accuracy: {aggregated['action_detection_accuracy']:.1%}")
         print(f"Language Detection Accuracy: {aggregated['language_accuracy']:.1%}")
         print(f"Error Rate: {aggregated['error_rate']:.1%}")
+        totals = aggregated["model_usage"]["totals"]
+        print(f"Avg Latency: {aggregated['avg_latency_s']:.2f}s")
+        print(f"Model Calls: {totals['calls']} ({totals['escalations']} escalated)")
+        print(f"Degraded Agent Outputs: {totals['degraded']}")
+        print(f"Hedged Calls: {totals['hedges']}")
+        print(f"Estimated Cost: ${totals['cost_usd']:.6f}")
+        print(f"Cached Prompt Tokens/Message: {totals['cached_tokens_per_message']:.0f}")
+        if totals["skipped"]:
+            print(f"Agent Calls Saved/1,000 Messages: "
+                  f"{totals['calls_saved_per_1000_messages']:.0f}")
+        languages = aggregated["model_usage"]["languages"]
+        if languages:
+            print(f"\n{'Language':<10} {'Messages':>8} {'Mean latency':>13} {'Tokens/message':>15}")
+            for language, entry in sorted(languages.items(), key=lambda item: -item[1]["messages"]):
+                print(f"{language:<10} {entry['messages']:>8} {entry['mean_latency_s']:>12.2f}s "
+                      f"{entry['tokens_per_message']:>15.0f}")
+        if assistant.cassette is not None:
+            cassette = assistant.cassette.stats()
+            print(f"Cassette ({cassette['mode']}): {cassette['hits']} replayed, "
+                  f"{cassette['misses']} missing, {cassette['recorded']} recorded")
         print("\n" + "="*70)
 
     return aggregated
 
 
+def compare_model_routing(
+    test_messages: Dict[str, str] = None,
+    verbose: bool = True,
+    cassette: Optional[Cassette] = None
+) -> Dict[str, Any]:
+    """Compare per-agent model routing against a single model for all agents."""
+
+    received_at = CASSETTE_TIMESTAMP if cassette is not None else None
+    single = evaluate_system(
+        test_messages, verbose=False, received_at=received_at,
+        assistant=InboxAssistant(routing=False, cassette=cassette)
+    )
+    routed = evaluate_system(
+        test_messages, verbose=False, received_at=received_at,
+        assistant=InboxAssistant(routing=True, cassette=cassette)
+    )
+
+    single_cost = single["model_usage"]["totals"]["cost_usd"]
+    routed_cost = routed["model_usage"]["totals"]["cost_usd"]
+
+    comparison = {
+        "single_model": single,
+        "routed": routed,
+        "urgency_accuracy_delta": routed["urgency_accuracy"] - single["urgency_accuracy"],
+        "cost_savings_usd": single_cost - routed_cost,
+        "cost_savings_ratio": 1 - routed_cost / single_cost if single_cost else 0.0,
+        "latency_savings_s": single["avg_latency_s"] - routed["avg_latency_s"],
+        "escalations": routed["model_usage"]["totals"]["escalations"]
+    }
+
+    if verbose:
+        print("\n" + "="*70)
+        print("MODEL ROUTING COMPARISON")
+        print("="*70)
+        print(f"\nUrgency Accuracy: {single['urgency_accuracy']:.1%} -> "
+              f"{routed['urgency_accuracy']:.1%}")
+        print(f"Estimated Cost: ${single_cost:.6f} -> ${routed_cost:.6f} "
+              f"({comparison['cost_savings_ratio']:.1%} saved)")
+        print(f"Avg Latency: {single['avg_latency_s']:.2f}s -> "
+              f"{routed['avg_latency_s']:.2f}s")
+        print(f"Escalations: {comparison['escalations']}")
+        print("\n" + "="*70)
+
+    return comparison
+
+
+def compare_self_consistency(
+    test_messages: Dict[str, str] = None,
+    samples: Tuple[int, ...] = (1, 3, 5),
+    verbose: bool = True,
+    cassette: Optional[Cassette] = None
+) -> Dict[str, Any]:
+    """Report urgency accuracy against classifier calls for each sample count."""
+
+    received_at = CASSETTE_TIMESTAMP if cassette is not None else None
+    runs = {}
+    for count in samples:
+        evaluation = evaluate_system(
+            test_messages, verbose=False, received_at=received_at,
+            assistant=InboxAssistant(urgency_samples=count, cassette=cassette)
+        )
+        usage = evaluation["model_usage"]
+        urgency = usage["agents"].get("urgency_classifier", {})
+        messages = usage["totals"]["messages"] or 1
+        runs[count] = {
+            "urgency_accuracy": evaluation["urgency_accuracy"],
+            "urgency_calls_per_message": urgency.get("calls", 0) / messages,
+            "expanded_votes": urgency.get("vote_expansions", 0),
+            "avg_latency_s": evaluation["avg_latency_s"],
+            "cost_usd": usage["totals"]["cost_usd"]
+        }
+
+    if verbose:
+        print("\n" + "="*70)
+        print("URGENCY SELF-CONSISTENCY")
+        print("="*70)
+        print(f"\n{'Samples':>7}  {'Accuracy':>8}  {'Calls/msg':>9}  {'Expanded':>8}  "
+              f"{'Latency':>8}  {'Cost':>10}")
+        for count, run in runs.items():
+            print(f"{count:>7}  {run['urgency_accuracy']:>8.1%}  "
+                  f"{run['urgency_calls_per_message']:>9.2f}  {run['expanded_votes']:>8}  "
+                  f"{run['avg_latency_s']:>7.2f}s  ${run['cost_usd']:>9.6f}")
+        print("\n" + "="*70)
+
+    return {"samples": runs}
+
+
+def compare_agent_policy(
+    test_messages: Dict[str, str] = None,
+    verbose: bool = True,
+    cassette: Optional[Cassette] = None
+) -> Dict[str, Any]:
+    """Compare the full pipeline against per-class agent subsets."""
+
+    received_at = CASSETTE_TIMESTAMP if cassette is not None else None
+    full = evaluate_system(
+        test_messages, verbose=False, received_at=received_at,
+        assistant=InboxAssistant(cassette=cassette)
+    )
+    partial = evaluate_system(
+        test_messages, verbose=False, received_at=received_at,
+        assistant=InboxAssistant(cassette=cassette, policy=AgentPolicy())
+    )
+
+    full_totals = full["model_usage"]["totals"]
+    partial_totals = partial["model_usage"]["totals"]
+    comparison = {
+        "full": full,
+        "policy": partial,
+        "calls_saved_per_1000_messages": partial_totals["calls_saved_per_1000_messages"],
+        "urgency_accuracy_delta": partial["urgency_accuracy"] - full["urgency_accuracy"],
+        "action_detection_delta": (
+            partial["action_detection_accuracy"] - full["action_detection_accuracy"]
+        ),
+        "cost_savings_usd": full_totals["cost_usd"] - partial_totals["cost_usd"]
+    }
+
+    if verbose:
+        print("\n" + "="*70)
+        print("AGENT POLICY COMPARISON")
+        print("="*70)
+        print(f"\nModel Calls: {full_totals['calls']} -> {partial_totals['calls']} "
+              f"({comparison['calls_saved_per_1000_messages']:.0f} saved per 1,000 messages)")
+        print(f"Urgency Accuracy: {full['urgency_accuracy']:.1%} -> "
+              f"{partial['urgency_accuracy']:.1%}")
+        print(f"Action Detection Accuracy: {full['action_detection_accuracy']:.1%} -> "
+              f"{partial['action_detection_accuracy']:.1%}")
+        print(f"Estimated Cost: ${full_totals['cost_usd']:.6f} -> "
+              f"${partial_totals['cost_usd']:.6f}")
+        print(f"Avg Latency: {full['avg_latency_s']:.2f}s -> {partial['avg_latency_s']:.2f}s")
+        print("\n" + "="*70)
+
+    return comparison
+
+
 def export_results(results: Dict[str, Any], filename: str = "evaluation_results.json"):
     """Export evaluation results to JSON file."""
     with open(filename, 'w') as f:
@@ -140,5 +312,51 @@ def export_results(results: Dict[str, Any], filename: str = "evaluation_results.
 
 
 if __name__ == "__main__":
-    results = evaluate_system(verbose=True)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inbox Assistant Evaluation")
+    parser.add_argument(
+        '--compare-routing',
+        action='store_true',
+        help='Compare per-agent model routing against a single model'
+    )
+    parser.add_argument(
+        '--compare-self-consistency',
+        action='store_true',
+        help='Report urgency accuracy against classifier calls for 1, 3 and 5 samples'
+    )
+    parser.add_argument(
+        '--compare-policy',
+        action='store_true',
+        help='Compare the full pipeline against per-class agent subsets'
+    )
+    parser.add_argument(
+        '--cassette',
+        help='Record model calls to, or replay them from, this .jsonl.gz file'
+    )
+    parser.add_argument(
+        '--cassette-mode',
+        choices=MODES,
+        default=REPLAY,
+        help='record: call the model and save; replay: run offline; '
+             'auto: replay what is recorded and record the rest'
+    )
+
+    args = parser.parse_args()
+
+    cassette = Cassette(args.cassette, args.cassette_mode) if args.cassette else None
+    if args.compare_routing:
+        results = compare_model_routing(verbose=True, cassette=cassette)
+    elif args.compare_self_consistency:
+        results = compare_self_consistency(verbose=True, cassette=cassette)
+    elif args.compare_policy:
+        results = compare_agent_policy(verbose=True, cassette=cassette)
+    else:
+        results = evaluate_system(
+            verbose=True,
+            assistant=InboxAssistant(cassette=cassette),
+            received_at=CASSETTE_TIMESTAMP if cassette is not None else None
+        )
+    if cassette is not None and cassette.mode != REPLAY:
+        cassette.save()
     export_results(results)
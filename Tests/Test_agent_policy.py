@@ -0,0 +1,100 @@
+"""
+Unit tests for the agent selection policy
+"""
+import pytest
+from agent import InboxAssistant
+from agent_policy import (
+    AUTOMATED, CONVERSATIONAL, INFORMATIONAL, AgentPolicy, AgentSubset, message_class
+)
+from examples_sample_messages import SAMPLE_MESSAGES
+from pool import PipelinePool
+from stub_llm import StubLlm
+
+ALERT = "ALERT: disk usage at 91% on db-3. This is an automated message, do not reply."
+FYI = SAMPLE_MESSAGES["low_informational"]
+
+
+def assistant_with_urgency(urgency: str, **kwargs):
+    stub = StubLlm(responses={
+        "UrgencyClassifierAgent": {"urgency": urgency, "reasoning": "Test."}
+    })
+    return stub, InboxAssistant(model=stub, policy=AgentPolicy(), **kwargs)
+
+
+class TestMessageClass:
+    """Test keyword message classes."""
+
+    def test_sample_messages(self):
+        assert message_class(ALERT) == AUTOMATED
+        assert message_class(FYI) == INFORMATIONAL
+        assert message_class(SAMPLE_MESSAGES["urgent_technical"]) == CONVERSATIONAL
+        assert message_class(SAMPLE_MESSAGES["meeting_request"]) == CONVERSATIONAL
+
+    def test_conditional_agents_must_follow_classifier(self):
+        with pytest.raises(ValueError):
+            AgentPolicy({"custom": AgentSubset(("urgency_classifier",), ("summarizer",))})
+        with pytest.raises(ValueError):
+            AgentPolicy({"custom": AgentSubset(("summarizer",), ("reply_generator",))})
+        with pytest.raises(ValueError):
+            AgentPolicy({"custom": AgentSubset(("translator",))})
+
+
+class TestPartialPipeline:
+    """Test reduced pipelines chosen per message."""
+
+    def test_low_informational_skips_reply_and_plan(self):
+        stub, assistant = assistant_with_urgency("Low")
+        result = assistant.process_message_sync(FYI)
+        assert result["message_class"] == INFORMATIONAL
+        assert result["skipped"] == ["reply_generator", "next_step_planner"]
+        assert "incomplete" not in result
+        assert "draft_reply" not in result
+        assert stub.calls["ReplyGeneratorAgent"] == 0
+        assert stub.calls["NextStepPlannerAgent"] == 0
+
+    def test_urgent_informational_runs_everything(self):
+        stub, assistant = assistant_with_urgency("High")
+        result = assistant.process_message_sync(FYI)
+        assert "skipped" not in result
+        assert result["draft_reply"]
+        assert result["action_items"]
+        assert stub.calls["ReplyGeneratorAgent"] == 1
+
+    def test_automated_skips_tone_and_reply(self):
+        stub, assistant = assistant_with_urgency("High")
+        result = assistant.process_message_sync(ALERT)
+        assert result["message_class"] == AUTOMATED
+        assert result["skipped"] == ["tone_analyzer", "reply_generator"]
+        assert stub.calls["ToneAnalyzerAgent"] == 0
+        assert stub.calls["NextStepPlannerAgent"] == 1
+
+    def test_conversational_uses_full_pipeline(self):
+        _, assistant = assistant_with_urgency("Low")
+        result = assistant.process_message_sync(SAMPLE_MESSAGES["meeting_request"])
+        assert result["message_class"] == CONVERSATIONAL
+        assert "skipped" not in result
+        assert not assistant._subset_runners
+
+    def test_reduced_pipelines_are_cached(self):
+        pool = PipelinePool()
+        _, assistant = assistant_with_urgency("Low", pool=pool)
+        prebuilt = len(assistant._subset_runners)
+        for _ in range(2):
+            assistant.process_message_sync(FYI)
+            assistant.process_message_sync(ALERT)
+        assert len(assistant._subset_runners) == prebuilt + 2
+        other = pool.acquire(model=assistant.model, policy=assistant.policy)
+        assert other._subset_runners is assistant._subset_runners
+
+    def test_stats_count_saved_calls(self):
+        _, assistant = assistant_with_urgency("Low")
+        assistant.process_message_sync(FYI)
+        assistant.process_message_sync(ALERT)
+        totals = assistant.stats.snapshot()["totals"]
+        assert totals["skipped"] == 4
+        assert totals["calls_saved_per_1000_messages"] == 2000
+        assert assistant.stats.snapshot()["agents"]["reply_generator"]["skipped"] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -1,19 +1,53 @@
 """
 Unit tests for Inbox Assistant agents
 """
+import asyncio
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
 import pytest
+from google.adk.models.llm_request import LlmRequest
+from google.genai.types import Content, GenerateContentConfig, Part
 from agent import (
     create_summarizer_agent,
     create_urgency_classifier_agent,
     create_tone_analyzer_agent,
     create_reply_generator_agent,
     create_next_step_planner_agent,
+    create_inbox_assistant_pipeline,
     InboxAssistant
 )
+from config import APP_NAME, CLASSIFIER_MODEL, DEFAULT_USER_ID, ESCALATION_MODEL, GEMINI_MODEL
 from examples_sample_messages import SAMPLE_MESSAGES, MESSAGE_METADATA
+from instrumentation import PipelineStats
+from models import RoutedLlm, is_valid_tone, is_valid_urgency
+from prompt_cache import LocalPromptCache
+from prompts import INSTRUCTIONS, PROMPT_VERSION, prompt_cache_key
+from pydantic import ValidationError
+from resilience import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, LatencyTracker, heuristic_urgency
+)
+from results import Urgency
+from schemas import ToneOutput, UrgencyOutput
+from stub_llm import StubLlm
 from utils import detect_language, parse_json_response, validate_urgency
 
 
+async def run_llm_async(llm, agent_name):
+    """Collect the responses of a model for a request from the named agent."""
+    request = LlmRequest(config=GenerateContentConfig(
+        system_instruction=f'You are an agent. Your internal name is "{agent_name}".'
+    ))
+    return [response async for response in llm.generate_content_async(request)]
+
+
+def run_llm(llm, agent_name):
+    return asyncio.run(run_llm_async(llm, agent_name))
+
+
 class TestAgentCreation:
     """Test that all agents are created correctly."""
 
@@ -83,6 +117,21 @@ class TestInboxAssistant:
         assert assistant.memory_service is not None
         assert assistant.runner is not None
 
+    def test_temporary_sessions_are_deleted(self):
+        assistant = InboxAssistant(model=StubLlm())
+        messages = list(SAMPLE_MESSAGES.values())
+
+        async def run():
+            for i in range(50):
+                await assistant.process_message(messages[i % len(messages)])
+            await assistant.process_message(messages[0], session_id="thread-1")
+            sessions = await assistant.session_service.list_sessions(
+                app_name=APP_NAME, user_id=DEFAULT_USER_ID
+            )
+            return [session.id for session in sessions.sessions]
+
+        assert asyncio.run(run()) == ["thread-1"]
+
     def test_sample_messages_coverage(self):
         assert len(SAMPLE_MESSAGES) >= 10
 
@@ -95,5 +144,441 @@ class TestInboxAssistant:
         assert "Low" in urgency_levels
 
 
+class TestModelRouting:
+    """Test per-agent model selection and escalation."""
+
+    def test_classifiers_use_classifier_model(self):
+        pipeline = create_inbox_assistant_pipeline()
+        urgency_model = pipeline.sub_agents[1].model
+        assert isinstance(urgency_model, RoutedLlm)
+        assert urgency_model.primary.model == CLASSIFIER_MODEL
+        assert urgency_model.escalation.model == ESCALATION_MODEL
+
+    def test_routing_disabled_uses_single_model(self):
+        pipeline = create_inbox_assistant_pipeline(routing=False)
+        # Agents are wrapped to enforce their timeouts; the wrapper keeps the name.
+        assert all(agent.model.model == GEMINI_MODEL for agent in pipeline.sub_agents)
+        assert all(agent.model.escalation is None for agent in pipeline.sub_agents)
+
+    def test_output_validators(self):
+        assert is_valid_urgency('{"urgency": "high"}')
+        assert not is_valid_urgency('{"urgency": "Critical"}')
+        assert is_valid_tone('{"tone": ["Angry", "Direct"]}')
+        assert not is_valid_tone('{"tone": ["Furious"]}')
+
+    def test_escalates_invalid_classification(self):
+        stats = PipelineStats()
+        cheap = StubLlm(model="cheap", responses={
+            "UrgencyClassifierAgent": {"urgency": "Critical"}
+        })
+        strong = StubLlm(model="strong", responses={
+            "UrgencyClassifierAgent": {"urgency": "High"}
+        })
+        llm = RoutedLlm(
+            model="cheap",
+            agent_key="urgency_classifier",
+            primary=cheap,
+            escalation=strong,
+            validator=is_valid_urgency,
+            stats=stats
+        )
+
+        responses = run_llm(llm, "UrgencyClassifierAgent")
+        assert parse_json_response(responses[-1].content.parts[0].text)["urgency"] == "High"
+        totals = stats.snapshot()["totals"]
+        assert totals["calls"] == 2
+        assert totals["escalations"] == 1
+
+    def test_valid_classification_is_not_escalated(self):
+        strong = StubLlm(model="strong")
+        llm = RoutedLlm(
+            model="cheap",
+            agent_key="urgency_classifier",
+            primary=StubLlm(model="cheap"),
+            escalation=strong,
+            validator=is_valid_urgency
+        )
+        run_llm(llm, "UrgencyClassifierAgent")
+        assert sum(strong.calls.values()) == 0
+
+    def test_explicit_model_is_not_escalated(self, monkeypatch):
+        import models
+        monkeypatch.setattr(models.LLMRegistry, "new_llm", lambda model: pytest.fail(model))
+        stub = StubLlm(responses={"UrgencyClassifierAgent": {"urgency": "Critical"}})
+        assistant = InboxAssistant(model=stub)
+        assistant.process_message_sync(SAMPLE_MESSAGES["meeting_request"])
+        assert stub.calls["UrgencyClassifierAgent"] == 1
+        assert assistant.stats.snapshot()["totals"]["escalations"] == 0
+
+    def test_stats_record_every_agent(self):
+        assistant = InboxAssistant(model=StubLlm())
+        assistant.process_message_sync(SAMPLE_MESSAGES["meeting_request"])
+        snapshot = assistant.stats.snapshot()
+        assert snapshot["totals"]["calls"] == 5
+        assert set(snapshot["agents"]) == {
+            "summarizer", "urgency_classifier", "tone_analyzer",
+            "reply_generator", "next_step_planner"
+        }
+
+
+class TestStructuredOutput:
+    """Test schema-constrained agent outputs."""
+
+    def test_agents_declare_output_schemas(self):
+        assert create_urgency_classifier_agent().output_schema is UrgencyOutput
+        assert create_tone_analyzer_agent().output_schema is ToneOutput
+
+    def test_schema_normalizes_urgency(self):
+        assert UrgencyOutput.model_validate_json('{"urgency": " low"}').urgency == "Low"
+
+    def test_schema_rejects_unknown_tone(self):
+        with pytest.raises(ValidationError):
+            ToneOutput.model_validate_json('{"tone": ["Furious"]}')
+
+    def test_results_carry_typed_fields(self):
+        stub = StubLlm(responses={
+            "UrgencyClassifierAgent": {"urgency": "high", "reasoning": "Outage"}
+        })
+        result = InboxAssistant(model=stub).process_message_sync(
+            SAMPLE_MESSAGES["urgent_technical"]
+        )
+        assert result["urgency"] == "High"
+        assert sorted(result["tone"]) == ["Polite", "Professional"]
+        assert result["action_items"] == ["Respond to the sender"]
+        assert result["language"] == "en"
+
+    def test_default_results_keep_agent_output(self):
+        stub = StubLlm(responses={"ToneAnalyzerAgent": {
+            "tone": ["Urgent", "Polite"], "formality": "Formal", "sentiment": "Negative"
+        }})
+        message = SAMPLE_MESSAGES["urgent_technical"]
+        result = InboxAssistant(model=stub).process_message_sync(message)
+        assert result["tone"] == ["Urgent", "Polite"]
+        assert result["message"] is message and result["original_message"] is message
+
+    def test_compact_results(self):
+        message = SAMPLE_MESSAGES["angry_customer"]
+        result = InboxAssistant(model=StubLlm()).process_message_sync(
+            message, compact=True
+        )
+        assert result.urgency is Urgency.MEDIUM
+        assert result.message is message
+
+    def test_malformed_output_raises(self):
+        stub = StubLlm(responses={"SummarizerAgent": "not json"})
+        with pytest.raises(ValidationError):
+            InboxAssistant(model=stub, resilient=False).process_message_sync("Please call me back.")
+
+
+class TestPromptCache:
+    """Test static instruction prefixes and cache accounting."""
+
+    def test_agents_share_static_instructions(self):
+        first = create_tone_analyzer_agent()
+        second = create_tone_analyzer_agent()
+        assert first.static_instruction is INSTRUCTIONS["tone_analyzer"]
+        assert first.static_instruction is second.static_instruction
+
+    def test_cache_key_tracks_prompt_version(self):
+        key = prompt_cache_key("summarizer", "gemini-2.0-flash")
+        assert key.startswith(f"{PROMPT_VERSION}:summarizer:gemini-2.0-flash:")
+
+    def test_local_cache_hit_after_first_call(self):
+        cache = LocalPromptCache()
+        prefix = INSTRUCTIONS["summarizer"]
+        assert cache.observe("summarizer", "stub", prefix) == 0
+        assert cache.observe("summarizer", "stub", prefix) > 0
+        assert cache.observe("summarizer", "other", prefix) == 0
+
+    def test_cached_tokens_reported_per_message(self):
+        assistant = InboxAssistant(model=StubLlm())
+        assistant.process_message_sync(SAMPLE_MESSAGES["meeting_request"])
+        assert assistant.stats.snapshot()["totals"]["cached_tokens"] == 0
+
+        assistant.process_message_sync(SAMPLE_MESSAGES["medium_request"])
+        totals = assistant.stats.snapshot()["totals"]
+        assert totals["messages"] == 2
+        assert totals["cached_tokens_per_message"] > 0
+
+
+class TestLazyLoading:
+    """Test that heavy SDKs load on first use, not at import."""
+
+    def test_import_defers_sdks(self):
+        code = (
+            "import sys, agent; "
+            "print(any(m.startswith(('google.adk', 'google.genai', 'langdetect', 'dotenv')) "
+            "for m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=Path(__file__).parent.parent,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        assert result.stdout.strip() == "False"
+
+    def test_agents_built_on_first_use(self):
+        assistant = InboxAssistant(model=StubLlm())
+        assert assistant._pipeline is None
+        assert assistant._runner is None
+
+        assistant.warmup()
+        assert assistant._pipeline is not None
+        assert assistant._runner is not None
+        assert assistant._reply_runner is not None
+
+
+class TestResilience:
+    """Test circuit breakers and degraded results."""
+
+    MESSAGE = "URGENT: the payment service is down. Please review the logs by EOD."
+
+    def test_breaker_opens_and_probes(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=10, clock=lambda: now[0])
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == OPEN and not breaker.allow()
+
+        now[0] = 10.0
+        assert breaker.allow() and breaker.state == HALF_OPEN
+        assert not breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+
+        now[0] = 20.0
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CLOSED
+
+    def test_heuristic_urgency(self):
+        assert heuristic_urgency("Outage! Fix ASAP")["urgency"] == "High"
+        monday = datetime(2025, 3, 3, 10, 0)
+        assert heuristic_urgency("Please send it by Friday", monday)["urgency"] == "Medium"
+        assert heuristic_urgency("Please send it by tomorrow", monday)["urgency"] == "High"
+        assert heuristic_urgency("Nice to meet you")["urgency"] == "Low"
+
+    def test_outage_returns_degraded_result(self):
+        assistant = InboxAssistant(model=StubLlm(fail=True))
+        result = assistant.process_message_sync(self.MESSAGE)
+        assert result["urgency"] == "High"
+        assert result["summary"] == self.MESSAGE
+        assert result["action_items"] == [self.MESSAGE]
+        assert result["degraded"]["urgency"] is True
+        assert assistant.stats.snapshot()["totals"]["degraded"] == 5
+
+    def test_open_breaker_skips_backend_and_recovers(self):
+        stub = StubLlm(fail=True)
+        assistant = InboxAssistant(model=stub)
+        for breaker in assistant.breakers.values():
+            breaker.failure_threshold = 1
+            breaker.reset_timeout_s = 0.0
+
+        assistant.process_message_sync(self.MESSAGE)
+        assert all(breaker.state == OPEN for breaker in assistant.breakers.values())
+
+        stub.fail = False
+        result = assistant.process_message_sync(self.MESSAGE)
+        assert "degraded" not in result
+        assert all(breaker.state == CLOSED for breaker in assistant.breakers.values())
+
+    def test_breaker_blocks_calls_while_open(self):
+        stub = StubLlm(fail=True)
+        assistant = InboxAssistant(model=stub)
+        for breaker in assistant.breakers.values():
+            breaker.failure_threshold = 1
+            breaker.reset_timeout_s = 60.0
+
+        assistant.process_message_sync(self.MESSAGE)
+        assistant.process_message_sync(self.MESSAGE)
+        assert stub.calls["SummarizerAgent"] == 1
+
+    def test_cancelled_probe_releases_breaker(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout_s=0.0)
+        breaker.record_failure()
+        llm = RoutedLlm(
+            model="stub", agent_key="summarizer", primary=StubLlm(latency_s=1.0),
+            breaker=breaker
+        )
+
+        async def cancelled_probe():
+            task = asyncio.ensure_future(run_llm_async(llm, "SummarizerAgent"))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        asyncio.run(cancelled_probe())
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow()
+
+    def test_deadline_during_probe_recovers(self):
+        stub = StubLlm(latency_s=0.2)
+        assistant = InboxAssistant(model=stub)
+        for breaker in assistant.breakers.values():
+            breaker.failure_threshold = 1
+            breaker.reset_timeout_s = 0.0
+            breaker.record_failure()
+        assistant.process_message_sync(self.MESSAGE, deadline_s=0.05)
+        stub.latency_s = 0.0
+        result = assistant.process_message_sync(self.MESSAGE)
+        assert "degraded" not in result
+        assert all(breaker.state == CLOSED for breaker in assistant.breakers.values())
+
+    def test_degraded_urgency_uses_receive_time(self):
+        message = "Please send the signed contract by Friday."
+        assistant = InboxAssistant(model=StubLlm(fail=True))
+        monday = assistant.process_message_sync(message, received_at=datetime(2025, 3, 3, 10, 0))
+        thursday = assistant.process_message_sync(message, received_at=datetime(2025, 3, 6, 10, 0))
+        assert monday["degraded"]["urgency"] is True
+        assert monday["urgency"] == "Medium"
+        assert thursday["urgency"] == "High"
+
+    def test_schema_mismatch_degrades(self):
+        stub = StubLlm(responses={"SummarizerAgent": {"summery": "oops"}})
+        assistant = InboxAssistant(model=stub)
+        result = assistant.process_message_sync(self.MESSAGE)
+        assert result["summary"] == self.MESSAGE
+        assert result["degraded"] == {"summary": True}
+        assert assistant.breakers["summarizer"].failures == 1
+
+    def test_not_resilient_raises(self):
+        assistant = InboxAssistant(model=StubLlm(fail=True), resilient=False)
+        with pytest.raises(ConnectionError):
+            assistant.process_message_sync(self.MESSAGE)
+
+
+class TestTailLatency:
+    """Test timeouts, hedged requests and message deadlines."""
+
+    MESSAGE = "Please review the attached contract and confirm by Friday."
+
+    def test_hedge_delay_needs_samples(self):
+        tracker = LatencyTracker(quantile=0.9, min_samples=10)
+        for i in range(9):
+            tracker.record(i / 100)
+        assert tracker.hedge_delay() is None
+        tracker.record(1.0)
+        assert tracker.hedge_delay() == 1.0
+        tracker.record(0.0)
+        assert tracker.hedge_delay() == 0.08
+
+    def test_slow_call_is_hedged(self):
+        delays = iter([1.0, 0.0])
+        stub = StubLlm(latency_fn=lambda: next(delays))
+        tracker = LatencyTracker(min_samples=1)
+        tracker.record(0.01)
+        stats = PipelineStats()
+        llm = RoutedLlm(
+            model="stub", agent_key="summarizer", primary=stub,
+            stats=stats, latency=tracker
+        )
+        start = time.perf_counter()
+        responses = run_llm(llm, "SummarizerAgent")
+        assert time.perf_counter() - start < 0.5
+        assert responses[-1].content.parts[0].text
+        assert stub.calls["SummarizerAgent"] == 2
+        assert stats.snapshot()["totals"]["hedges"] == 1
+
+    def test_agent_timeout_degrades(self):
+        llm = RoutedLlm(
+            model="stub", agent_key="summarizer", primary=StubLlm(latency_s=1.0),
+            breaker=CircuitBreaker(), timeout_s=0.01
+        )
+        responses = run_llm(llm, "SummarizerAgent")
+        assert responses[-1].custom_metadata == {"degraded": True}
+
+    def test_deadline_returns_partial_result(self):
+        assistant = InboxAssistant(model=StubLlm(latency_s=0.05), deadline_s=0.12)
+        result = assistant.process_message_sync(self.MESSAGE)
+        assert result["summary"]
+        assert "draft_reply" not in result
+        assert result["incomplete"][-1] == "next_step_planner"
+        assert "summarizer" not in result["incomplete"]
+
+
+class TestSelfConsistency:
+    """Test majority-vote urgency classification."""
+
+    def classify(self, llm, message):
+        request = LlmRequest(
+            contents=[Content(role="user", parts=[Part(text=message)])],
+            config=GenerateContentConfig(
+                system_instruction='Your internal name is "UrgencyClassifierAgent".'
+            )
+        )
+
+        async def collect():
+            return [response async for response in llm.generate_content_async(request)]
+
+        text = asyncio.run(collect())[-1].content.parts[0].text
+        return parse_json_response(text)["urgency"]
+
+    def voter(self, stub, samples=5):
+        stats = PipelineStats()
+        llm = RoutedLlm(
+            model="stub", agent_key="urgency_classifier", primary=stub,
+            stats=stats, samples=samples
+        )
+        return llm, stats
+
+    @staticmethod
+    def by_seed(labels):
+        return lambda request: {"urgency": labels[request.config.seed], "reasoning": "-"}
+
+    def test_agreement_stops_at_two_samples(self):
+        stub = StubLlm()
+        llm, stats = self.voter(stub)
+        assert self.classify(llm, "Lunch next week?") == "Medium"
+        assert stub.calls["UrgencyClassifierAgent"] == 2
+        urgency = stats.snapshot()["agents"]["urgency_classifier"]
+        assert urgency["votes"] == 1
+        assert urgency["vote_expansions"] == 0
+
+    def test_disagreement_stops_at_majority(self):
+        delays = iter([0.0, 0.0, 0.0, 0.0, 1.0])
+        stub = StubLlm(
+            responses={"UrgencyClassifierAgent": self.by_seed(
+                ["High", "Low", "High", "High", "Low"]
+            )},
+            latency_fn=lambda: next(delays)
+        )
+        llm, stats = self.voter(stub)
+        start = time.perf_counter()
+        assert self.classify(llm, "Lunch next week?") == "High"
+        assert time.perf_counter() - start < 0.5
+        assert stats.snapshot()["agents"]["urgency_classifier"]["vote_expansions"] == 1
+
+    def test_keyword_conflict_draws_more_samples(self):
+        stub = StubLlm(responses={"UrgencyClassifierAgent": {"urgency": "Low"}})
+        llm, stats = self.voter(stub)
+        assert self.classify(llm, "URGENT: the server is down") == "Low"
+        assert stub.calls["UrgencyClassifierAgent"] > 2
+        assert stats.snapshot()["totals"]["vote_expansions"] == 1
+
+        # Two agreeing samples out of three are already a majority.
+        stub.calls.clear()
+        llm, stats = self.voter(stub, samples=3)
+        self.classify(llm, "URGENT: the server is down")
+        assert stub.calls["UrgencyClassifierAgent"] == 2
+
+    def test_tie_breaks_toward_higher_urgency(self):
+        stub = StubLlm(responses={"UrgencyClassifierAgent": self.by_seed(
+            ["Low", "Medium", "High", "Critical"]
+        )})
+        llm, _ = self.voter(stub, samples=4)
+        assert self.classify(llm, "Lunch next week?") == "High"
+
+    def test_pipeline_samples(self):
+        pipeline = create_inbox_assistant_pipeline(urgency_samples=3)
+        assert pipeline.sub_agents[1].model.samples == 3
+        assert create_inbox_assistant_pipeline().sub_agents[1].model.samples == 1
+        assistant = InboxAssistant(model=StubLlm(), urgency_samples=3)
+        assert assistant.process_message_sync("Lunch next week?")["urgency"] == "Medium"
+        assert assistant.stats.snapshot()["agents"]["urgency_classifier"]["calls"] == 2
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
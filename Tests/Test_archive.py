@@ -0,0 +1,162 @@
+"""
+Unit tests for the compressed result archive
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+import archive
+from archive import (
+    ZLIB, ZSTD, ArchiveReader, ArchiveWriter, Segment, decode_column, encode_column
+)
+from cli import main
+from examples_sample_messages import SAMPLE_MESSAGES
+from results import AnalysisResult, Urgency
+
+START = datetime(2026, 3, 2, 9, 0)
+MESSAGES = list(SAMPLE_MESSAGES.values())
+CODECS = [ZLIB] + ([ZSTD] if archive.zstandard is not None else [])
+
+
+def result(i: int) -> dict:
+    return {
+        "summary": f"Summary {i}",
+        "urgency": ("Low", "Medium", "High")[i % 3],
+        "tone": ["Direct", "Polite"],
+        "formality": "Formal",
+        "action_items": [f"Task {i}"] if i % 2 else None,
+        "reply_tone": "Professional" if i % 4 else None,
+        "language": "es" if i % 5 == 0 else "en",
+        "id": i
+    }
+
+
+def write_archive(path, count: int = 50, codec: str = ZLIB, segment_rows: int = 8) -> str:
+    path = str(path)
+    with ArchiveWriter(path, segment_rows=segment_rows, codec=codec) as writer:
+        # Out of order within segments, one message per hour.
+        for i in sorted(range(count), key=lambda i: (i // segment_rows, -i)):
+            writer.add(result(i), START + timedelta(hours=i), MESSAGES[i % len(MESSAGES)])
+    return path
+
+
+class TestColumns:
+    """Test column encodings."""
+
+    @pytest.mark.parametrize("kind, values", [
+        ("d", [1.5, 0.0, 1e9]),
+        ("b", [1, None, 3]),
+        ("h", [0, 2047, None]),
+        ("x", [bytes(range(16)), bytes(16)]),
+        ("k", ["en", None, "es", "en"]),
+        ("s", ["", None, "¿Qué tal?"]),
+        ("j", [["a", "b"], None, {"id": 1}])
+    ])
+    def test_round_trip(self, kind, values):
+        assert decode_column(kind, encode_column(kind, values), len(values)) == values
+
+
+class TestArchive:
+    """Test segments, the time index and the message store."""
+
+    @pytest.mark.parametrize("codec", CODECS)
+    def test_round_trip(self, tmp_path, codec):
+        path = write_archive(tmp_path / "mail", codec=codec)
+        with ArchiveReader(path) as reader:
+            assert reader.codec == codec
+            assert len(reader) == 50
+            records = list(reader.records(messages=True))
+        assert [record["id"] for record in records] == list(range(50))
+        first = AnalysisResult.from_dict(result(1), message=MESSAGES[1]).to_dict()
+        assert records[1] == dict(
+            first,
+            received_at=(START + timedelta(hours=1)).isoformat(),
+            message_hash=records[1]["message_hash"]
+        )
+        assert "action_items" not in records[0]
+        assert records[0]["tone"] == ["Direct", "Polite"]
+
+    def test_time_range_reads_overlapping_segments(self, tmp_path):
+        path = write_archive(tmp_path / "mail")
+        with ArchiveReader(path) as reader:
+            since, until = START + timedelta(hours=10), START + timedelta(hours=20)
+            assert [info.file for info in reader.segments(since, until)] == [
+                "segment-000001.seg", "segment-000002.seg"
+            ]
+            assert [r["id"] for r in reader.records(since, until)] == list(range(10, 20))
+            assert list(reader.records(START + timedelta(days=30))) == []
+
+    def test_scan_reads_only_requested_columns(self, tmp_path, monkeypatch):
+        path = write_archive(tmp_path / "mail")
+        decoded = []
+        column = Segment.column
+        monkeypatch.setattr(Segment, "column", lambda self, name: (
+            decoded.append(name), column(self, name)
+        )[1])
+        with ArchiveReader(path) as reader:
+            urgencies = [u for block in reader.scan(["urgency"]) for u in block["urgency"]]
+        assert set(decoded) == {"urgency"}
+        assert urgencies.count(Urgency.HIGH) == 16
+
+    def test_records_with_only_extra(self, tmp_path):
+        path = write_archive(tmp_path / "mail", count=10)
+        with ArchiveReader(path) as reader:
+            assert list(reader.records(columns=["extra"])) == [{"id": i} for i in range(10)]
+
+    def test_message_bodies_stored_once(self, tmp_path):
+        path = write_archive(tmp_path / "mail")
+        with ArchiveReader(path) as reader:
+            assert reader.stats()["messages"] == len(MESSAGES)
+            for when, record in reader.results(messages=True):
+                assert record.message == reader.message(record.message_hash)
+
+    def test_reopen_appends(self, tmp_path):
+        path = write_archive(tmp_path / "mail", count=10)
+        with ArchiveWriter(path, segment_rows=8) as writer:
+            writer.add(result(10), START, MESSAGES[0])
+            assert writer.blobs.duplicates == 1
+        with ArchiveReader(path) as reader:
+            assert len(reader) == 11
+            assert reader.stats()["segments"] == 3
+        with pytest.raises(ValueError):
+            ArchiveWriter(path, codec=ZSTD)
+
+    def test_cli_archive_and_export(self, tmp_path, capsys):
+        source = tmp_path / "results.jsonl"
+        lines = [
+            dict(result(i), message=MESSAGES[i], received_at=f"2026-03-0{i + 1}T08:00:00")
+            for i in range(3)
+        ]
+        lines.append({"index": 3, "error": "TimeoutError: "})
+        source.write_text("".join(json.dumps(line) + "\n" for line in lines))
+        path = str(tmp_path / "mail")
+        assert main(["archive", path, str(source)]) == 0
+        capsys.readouterr()
+
+        assert main([
+            "export", path, "--since", "2026-03-02", "--columns", "urgency,summary"
+        ]) == 0
+        exported = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert exported == [
+            {"urgency": "Medium", "summary": "Summary 1"},
+            {"urgency": "High", "summary": "Summary 2"}
+        ]
+
+    def test_cli_batch_then_archive_keeps_receive_time(self, tmp_path, capsys):
+        source = tmp_path / "messages.jsonl"
+        source.write_text(json.dumps(
+            {"message": MESSAGES[0], "received_at": "2026-03-02T09:00:00"}
+        ) + "\n")
+        assert main(["batch", str(source), "--stub", "--no-progress"]) == 0
+        results = tmp_path / "results.jsonl"
+        results.write_text(capsys.readouterr().out)
+
+        path = str(tmp_path / "mail")
+        assert main(["archive", path, str(results)]) == 0
+        with ArchiveReader(path) as reader:
+            [(when, record)] = list(reader.results())
+        assert when == START
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,106 @@
+"""
+Unit tests for model call record/replay
+"""
+import asyncio
+import gzip
+import json
+
+import pytest
+from google.adk.models.llm_request import LlmRequest
+from google.genai.types import Content, GenerateContentConfig, Part
+from agent import InboxAssistant
+from cassette import AUTO, CASSETTE_TIMESTAMP, RECORD, REPLAY, Cassette, CassetteMiss, request_key
+from stub_llm import StubLlm
+
+MESSAGES = [
+    "Can you send the contract by EOD?",
+    "Thanks for the great presentation yesterday!"
+]
+
+
+def make_request(text: str, instruction: str = "Summarize.") -> LlmRequest:
+    return LlmRequest(
+        model="stub",
+        contents=[Content(role="user", parts=[Part(text=text)])],
+        config=GenerateContentConfig(system_instruction=instruction)
+    )
+
+
+def run(assistant: InboxAssistant):
+    return [
+        assistant.process_message_sync(message, received_at=CASSETTE_TIMESTAMP)
+        for message in MESSAGES
+    ]
+
+
+class TestRequestKey:
+    """Test request hashing."""
+
+    def test_same_prompt_same_key(self):
+        assert request_key(make_request("hello")) == request_key(make_request("hello"))
+
+    def test_prompt_changes_key(self):
+        assert request_key(make_request("hello")) != request_key(make_request("hello!"))
+        assert request_key(make_request("hello")) != request_key(make_request("hello", "Reply."))
+
+    def test_transport_settings_ignored(self):
+        request = make_request("hello")
+        labelled = make_request("hello")
+        labelled.config.labels = {"run": "42"}
+        assert request_key(request) == request_key(labelled)
+
+    def test_sampled_requests_keyed_by_seed(self):
+        first, second = make_request("hello"), make_request("hello")
+        first.config.seed, second.config.seed = 0, 1
+        assert len({request_key(make_request("hello")), request_key(first), request_key(second)}) == 3
+
+
+class TestCassette:
+    """Test recording and replaying full pipeline runs."""
+
+    def test_record_then_replay_offline(self, tmp_path):
+        path = str(tmp_path / "calls.jsonl.gz")
+        with Cassette(path, RECORD) as cassette:
+            recorded = run(InboxAssistant(model=StubLlm(), cassette=cassette))
+        assert cassette.stats()["recorded"] == 10
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            assert len([json.loads(line) for line in f]) == 10
+
+        replay = Cassette(path, REPLAY)
+        backend = StubLlm(fail=True)
+        assistant = InboxAssistant(model=backend, cassette=replay)
+        assert run(assistant) == recorded
+        assert replay.stats()["hits"] == 10
+        assert sum(backend.calls.values()) == 0
+        assert assistant.stats.snapshot()["totals"]["degraded"] == 0
+
+    def test_replay_miss(self, tmp_path):
+        cassette = Cassette(str(tmp_path / "empty.jsonl.gz"), REPLAY)
+        llm = cassette.wrap(StubLlm())
+
+        async def call():
+            return [response async for response in llm.generate_content_async(make_request("hi"))]
+
+        with pytest.raises(CassetteMiss):
+            asyncio.run(call())
+        assert cassette.misses == 1
+
+    def test_auto_records_only_misses(self, tmp_path):
+        path = str(tmp_path / "calls.jsonl.gz")
+        with Cassette(path, RECORD) as cassette:
+            InboxAssistant(model=StubLlm(), cassette=cassette).process_message_sync(
+                MESSAGES[0], received_at=CASSETTE_TIMESTAMP
+            )
+
+        with Cassette(path, AUTO) as cassette:
+            backend = StubLlm()
+            run(InboxAssistant(model=backend, cassette=cassette))
+        assert cassette.hits == 5
+        assert cassette.recorded == 5
+        assert sum(backend.calls.values()) == 5
+        assert len(Cassette(path, REPLAY)) == 10
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
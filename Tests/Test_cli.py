@@ -0,0 +1,121 @@
+"""
+Unit tests for batch processing and the command line interface
+"""
+import asyncio
+import io
+import json
+from datetime import datetime
+
+import pytest
+from agent import InboxAssistant
+from config import APP_NAME, DEFAULT_USER_ID
+from cli import main, parse_record, read_records, run_batch
+from stub_llm import StubLlm
+
+
+class SlowAssistant(InboxAssistant):
+    """Assistant whose processing time is given by the message itself."""
+
+    async def process_message(self, message, **kwargs):
+        if message == "fail":
+            raise RuntimeError("boom")
+        await asyncio.sleep(float(message))
+        return {"summary": message}
+
+
+def collect(assistant, messages, **kwargs):
+    async def run():
+        return [item async for item in assistant.process_batch(messages, **kwargs)]
+    return asyncio.run(run())
+
+
+class TestProcessBatch:
+    """Test concurrent batch processing."""
+
+    MESSAGES = list(enumerate(["0.04", "0.01", "0.03", "0.0"]))
+
+    def test_input_order(self):
+        items = collect(SlowAssistant(), self.MESSAGES, concurrency=4)
+        assert [item.index for item in items] == [0, 1, 2, 3]
+
+    def test_completion_order(self):
+        items = collect(SlowAssistant(), self.MESSAGES, concurrency=4, ordered=False)
+        assert [item.index for item in items] == [3, 1, 2, 0]
+
+    def test_errors_do_not_stop_batch(self):
+        items = collect(SlowAssistant(), list(enumerate(["0", "fail", "0"])))
+        assert [item.error is None for item in items] == [True, False, True]
+        assert isinstance(items[1].error, RuntimeError)
+
+    def test_lazy_input(self):
+        items = collect(SlowAssistant(), ((i, "0") for i in range(50)), concurrency=3)
+        assert len(items) == 50
+
+    def test_sessions_do_not_accumulate(self):
+        assistant = InboxAssistant(model=StubLlm())
+        messages = ((i, f"Please confirm order {i} by Friday.") for i in range(20))
+        items = collect(assistant, messages, concurrency=4)
+        assert len(items) == 20
+
+        async def sessions():
+            return await assistant.session_service.list_sessions(
+                app_name=APP_NAME, user_id=DEFAULT_USER_ID
+            )
+
+        assert asyncio.run(sessions()).sessions == []
+
+
+class TestCli:
+    """Test JSONL input parsing and output."""
+
+    def test_parse_record(self):
+        assert parse_record('"hello"') == {"message": "hello"}
+        assert parse_record('{"id": 7, "text": "hi"}')["message"] == "hi"
+        with pytest.raises(ValueError):
+            parse_record('{"id": 7}')
+
+    def test_read_records_offset(self, tmp_path):
+        path = tmp_path / "in.jsonl"
+        path.write_text('"a"\n\n"b"\n"c"\n')
+        assert list(read_records([str(path)], offset=1)) == [(1, '"b"'), (2, '"c"')]
+
+    def test_run_batch_stamps_received_at(self):
+        lines = list(enumerate([
+            '{"message": "Please send the contract by Friday.", '
+            '"received_at": "2025-03-06T09:30:00"}',
+            '"No timestamp on this one"',
+            '{"message": "Hi", "received_at": 5}'
+        ]))
+        out = io.StringIO()
+        asyncio.run(run_batch(InboxAssistant(model=StubLlm()), iter(lines), out))
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert records[0]["received_at"] == "2025-03-06T09:30:00"
+        assert records[0]["due"] == "2025-03-07T17:00"
+        assert datetime.fromisoformat(records[1]["received_at"]).year >= 2025
+        assert "error" in records[2]
+
+    def test_run_batch_writes_ndjson(self):
+        lines = list(enumerate([
+            '{"id": "m1", "message": "Please review the report by Friday."}',
+            "not json",
+            '"Can we meet tomorrow?"'
+        ]))
+        out = io.StringIO()
+        progress = asyncio.run(run_batch(InboxAssistant(model=StubLlm()), iter(lines), out))
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert [record["index"] for record in records] == [0, 1, 2]
+        assert records[0]["id"] == "m1"
+        assert records[0]["urgency"] == "Medium"
+        assert "error" in records[1]
+        assert (progress.processed, progress.errors) == (3, 1)
+
+    def test_main_reads_files(self, tmp_path, capsys):
+        path = tmp_path / "in.jsonl"
+        path.write_text('"First message to analyze"\n"Second message to analyze"\n')
+        assert main(["batch", str(path), "--stub", "--no-progress", "--offset", "1"]) == 0
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [record["index"] for record in records] == [1]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
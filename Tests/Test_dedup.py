@@ -0,0 +1,82 @@
+"""
+Unit tests for near-duplicate detection
+"""
+import json
+import pytest
+from dedup import NearDuplicateIndex, normalize_message, simhash, similarity
+from examples_sample_messages import SAMPLE_MESSAGES
+
+
+ANALYSIS = {
+    "summary": "Customer demands a refund after waiting three weeks.",
+    "urgency": "High",
+    "tone": ["Angry", "Direct"],
+    "draft_reply": "We are sorry...",
+    "action_items": ["Respond to ticket"]
+}
+
+
+class TestFingerprints:
+    """Test normalization and SimHash fingerprints."""
+
+    def test_normalize_masks_volatile_tokens(self):
+        text = "Ticket #45678 updated at 10:45 on 2025-03-01"
+        assert normalize_message(text) == "ticket <num> updated at <time> on <date>"
+
+    def test_templated_messages_match(self):
+        original = SAMPLE_MESSAGES["angry_customer"]
+        variant = original.replace("#45678", "#99120")
+        assert similarity(simhash(original), simhash(variant)) == 1.0
+
+    def test_unrelated_messages_differ(self):
+        a = simhash(SAMPLE_MESSAGES["angry_customer"])
+        b = simhash(SAMPLE_MESSAGES["friendly_casual"])
+        assert similarity(a, b) < 0.9
+
+
+class TestNearDuplicateIndex:
+    """Test index lookups and persistence."""
+
+    def test_query_reuses_analysis_without_reply(self):
+        index = NearDuplicateIndex(threshold=0.9)
+        index.add(SAMPLE_MESSAGES["angry_customer"], ANALYSIS)
+
+        match = index.query(SAMPLE_MESSAGES["angry_customer"].replace("45678", "1"))
+        assert match is not None
+        analysis, score = match
+        assert score >= 0.9
+        assert analysis["urgency"] == "High"
+        assert "draft_reply" not in analysis
+
+    def test_query_miss(self):
+        index = NearDuplicateIndex()
+        index.add(SAMPLE_MESSAGES["angry_customer"], ANALYSIS)
+        assert index.query(SAMPLE_MESSAGES["meeting_request"]) is None
+
+    def test_save_and_load(self, tmp_path):
+        index = NearDuplicateIndex(threshold=0.95)
+        index.add(SAMPLE_MESSAGES["urgent_technical"], ANALYSIS)
+        path = tmp_path / "index.json"
+        index.save(str(path))
+
+        loaded = NearDuplicateIndex.load(str(path))
+        assert len(loaded) == 1
+        assert loaded.threshold == 0.95
+        assert loaded.query(SAMPLE_MESSAGES["urgent_technical"]) is not None
+
+    def test_build_from_jsonl(self, tmp_path):
+        path = tmp_path / "results.jsonl"
+        with open(path, "w") as f:
+            for key in ("angry_customer", "low_informational"):
+                f.write(json.dumps(dict(ANALYSIS, message=SAMPLE_MESSAGES[key])) + "\n")
+
+        index = NearDuplicateIndex.build_from_jsonl(str(path))
+        assert len(index) == 2
+
+    def test_invalid_threshold(self):
+        with pytest.raises(ValueError):
+            NearDuplicateIndex(threshold=0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,153 @@
+"""
+Unit tests for exemplar reply retrieval
+"""
+import numpy as np
+import pytest
+from agent import InboxAssistant
+from examples_sample_messages import SAMPLE_MESSAGES
+from exemplars import ExemplarIndex, embed
+from stub_llm import StubLlm
+from tenancy import TenantManager
+
+REFUND_REPLY = "We are sorry for the delay. Your refund has been issued today."
+
+
+def clustered_vectors(count: int, clusters: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(clusters, size=count)] + 0.1 * rng.normal(size=(count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+class TestEmbedding:
+    """Test hashed message embeddings."""
+
+    def test_unit_norm(self):
+        assert np.linalg.norm(embed(SAMPLE_MESSAGES["meeting_request"])) == pytest.approx(1.0)
+        assert not embed("").any()
+
+    def test_templated_messages_embed_identically(self):
+        original = SAMPLE_MESSAGES["angry_customer"]
+        variant = original.replace("#45678", "#99120")
+        assert float(embed(original) @ embed(variant)) == pytest.approx(1.0)
+
+    def test_related_closer_than_unrelated(self):
+        query = embed("Where is my refund? I have waited three weeks for it.")
+        related = embed("I am still waiting for my refund after three weeks.")
+        unrelated = embed(SAMPLE_MESSAGES["friendly_casual"])
+        assert float(query @ related) > float(query @ unrelated)
+
+
+class TestExemplarIndex:
+    """Test brute-force and IVF search and persistence."""
+
+    def test_search_ranks_and_filters(self):
+        index = ExemplarIndex(min_similarity=0.3)
+        index.add(SAMPLE_MESSAGES["angry_customer"], REFUND_REPLY, "Apologetic")
+        index.add(SAMPLE_MESSAGES["meeting_request"], "Tuesday works for me.")
+        results = index.search(SAMPLE_MESSAGES["angry_customer"].replace("#45678", "#1"), k=2)
+        assert results[0].reply == REFUND_REPLY
+        assert results[0].reply_tone == "Apologetic"
+        assert index.reusable(results) == results[0]
+        assert all(result.similarity >= 0.3 for result in results)
+        assert ExemplarIndex().search("anything") == []
+
+    def test_ivf_matches_brute_force(self):
+        vectors = clustered_vectors(5000, clusters=20)
+        replies = [str(i) for i in range(len(vectors))]
+        exact = ExemplarIndex(dim=32, min_similarity=-1.0)
+        exact.add_vectors(vectors, replies)
+        ivf = ExemplarIndex(dim=32, min_similarity=-1.0, nprobe=4)
+        ivf.add_vectors(vectors, replies)
+        ivf.train(nlist=20)
+        ivf.add_vectors(vectors[:10], replies[:10])
+        assert len(ivf) == 5010
+
+        queries = clustered_vectors(50, clusters=20, seed=1)
+        hits = sum(
+            exact.search_vector(q, k=1)[0].reply == ivf.search_vector(q, k=1)[0].reply
+            for q in queries
+        )
+        assert hits >= 45
+
+    def test_save_and_load(self, tmp_path):
+        index = ExemplarIndex(dim=32, min_similarity=-1.0, nprobe=2)
+        index.add_vectors(clustered_vectors(500, clusters=5), [str(i) for i in range(500)])
+        index.train(nlist=5)
+        path = str(tmp_path / "exemplars.npz")
+        index.save(path)
+
+        loaded = ExemplarIndex.load(path)
+        assert len(loaded) == 500 and loaded.trained and loaded.nprobe == 2
+        query = clustered_vectors(1, clusters=5, seed=3)[0]
+        assert loaded.search_vector(query, k=3) == index.search_vector(query, k=3)
+
+    def test_build_from_records(self):
+        index = ExemplarIndex.build_from_records([
+            {"message": "Where is my refund?", "draft_reply": REFUND_REPLY},
+            {"original_message": "No reply here"}
+        ])
+        assert len(index) == 1
+
+
+class TestAssistantExemplars:
+    """Test exemplar injection and reply reuse in the pipeline."""
+
+    def test_near_identical_reuses_reply(self):
+        stub = StubLlm()
+        assistant = InboxAssistant(model=stub, exemplar_index=ExemplarIndex())
+        assistant.record_reply(SAMPLE_MESSAGES["angry_customer"], REFUND_REPLY, "Apologetic")
+
+        result = assistant.process_message_sync(
+            SAMPLE_MESSAGES["angry_customer"].replace("#45678", "#99120")
+        )
+        assert result["draft_reply"] == REFUND_REPLY
+        assert result["reply_tone"] == "Apologetic"
+        assert result["reused_reply_similarity"] == pytest.approx(1.0)
+        assert stub.calls["ReplyGeneratorAgent"] == 0
+        assert stub.calls["NextStepPlannerAgent"] == 1
+        assert "incomplete" not in result
+
+    def test_similar_message_gets_exemplars(self):
+        prompts = []
+
+        def reply(llm_request):
+            prompts.append(" ".join(
+                part.text or "" for content in llm_request.contents for part in content.parts
+            ))
+            return {"draft_reply": "Looking into it.", "reply_tone": "Professional"}
+
+        stub = StubLlm(responses={"ReplyGeneratorAgent": reply})
+        assistant = InboxAssistant(
+            model=stub, exemplar_index=ExemplarIndex(min_similarity=0.2)
+        )
+        assistant.record_reply(
+            "I am still waiting for my refund after three weeks.", REFUND_REPLY
+        )
+        result = assistant.process_message_sync(
+            "Where is my refund? I have waited three weeks for it."
+        )
+        assert result["exemplars"] == 1
+        assert result["draft_reply"] == "Looking into it."
+        assert REFUND_REPLY in prompts[0]
+
+    def test_replies_stay_with_their_tenant(self):
+        stub = StubLlm()
+        assistant = InboxAssistant(
+            model=stub, exemplar_index=ExemplarIndex(), tenants=TenantManager()
+        )
+        message = SAMPLE_MESSAGES["angry_customer"]
+        assistant.record_reply(message, REFUND_REPLY, "Apologetic", user_id="tenant-a")
+
+        other = assistant.process_message_sync(message, user_id="tenant-b")
+        assert other["draft_reply"] != REFUND_REPLY
+        assert "reused_reply_similarity" not in other and "exemplars" not in other
+        assert stub.calls["ReplyGeneratorAgent"] == 1
+
+        own = assistant.process_message_sync(message, user_id="tenant-a")
+        assert own["draft_reply"] == REFUND_REPLY
+        assert len(assistant.exemplar_index) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
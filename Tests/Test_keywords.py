@@ -0,0 +1,67 @@
+"""
+Unit tests for the keyword engine
+"""
+import pytest
+from examples_sample_messages import SAMPLE_MESSAGES
+from keywords import action_lines, scan, iter_matches
+from utils import extract_action_items
+
+
+class TestKeywordScan:
+    """Test single-pass keyword matching."""
+
+    def test_word_boundaries(self):
+        text = "Please recall the checkout flow from the callback docs."
+        assert [m for m in iter_matches(text) if m.kind == "action"] == []
+
+    def test_inflections_and_case(self):
+        text = "She REVIEWED the report\nHe is sending the invoice"
+        assert scan(text).action_lines == [
+            "She REVIEWED the report",
+            "He is sending the invoice"
+        ]
+
+    def test_multiword_phrase_spans_whitespace(self):
+        assert scan("We should follow   up with legal").action_lines
+
+    def test_deadlines(self):
+        text = "Send it by Friday, or by EOD on 3/14. Meeting next Tuesday, within 30 minutes."
+        deadlines = [m.text for m in scan(text).deadlines]
+        assert deadlines == ["by Friday", "EOD", "3/14", "next Tuesday", "within 30 minutes"]
+
+    def test_urgency_keywords(self):
+        text = "URGENT: outage in prod, fix ASAP. Not a disaster."
+        assert [m.text.lower() for m in scan(text).urgency_keywords] == [
+            "urgent", "outage", "asap"
+        ]
+
+    def test_one_line_per_action(self):
+        assert scan("Review and update and send the doc").action_lines == [
+            "Review and update and send the doc"
+        ]
+
+    @pytest.mark.parametrize("text", [
+        "\n".join(SAMPLE_MESSAGES.values()),
+        "Send it\nreview the doc\n\nno verbs\nCall me, then call again",
+        "İstanbul office: please SEND the report\nconfirm",
+        "x review"
+    ])
+    def test_action_lines_match_full_scan(self, text):
+        assert action_lines(text) == scan(text).action_lines
+
+
+class TestExtractActionItems:
+    """Test the action item heuristic built on the scanner."""
+
+    def test_ignores_substring_matches(self):
+        text = "Can you recall the checkout issue from last week?"
+        assert extract_action_items(text) == ["No specific action items detected"]
+
+    def test_short_lines_skipped(self):
+        assert extract_action_items("Call me\nPlease confirm the booking") == [
+            "Please confirm the booking"
+        ]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,164 @@
+"""
+Unit tests for language-aware prompts and language batching
+"""
+import asyncio
+
+import pytest
+from agent import InboxAssistant
+from prompts import INSTRUCTIONS, instructions_for, prompt_cache_key, prompt_language
+from stub_llm import StubLlm
+from translation import TranslationCache
+from utils import group_by_language
+
+ENGLISH = [
+    "The production database is down and customers cannot log in. Please fix it today.",
+    "Could we move our weekly planning meeting to Thursday afternoon next week?"
+]
+SPANISH = [
+    "Hola, el servidor de producción no responde y los clientes no pueden entrar. ¿Pueden revisarlo hoy?",
+    "Buenos días, quería confirmar la reunión del jueves con el equipo de ventas en la oficina."
+]
+GERMAN = [
+    "Hallo, der Server ist seit heute Morgen nicht erreichbar und unsere Kunden können sich nicht anmelden.",
+    "Guten Tag, ich möchte unser Treffen am Donnerstag mit dem Vertriebsteam gerne verschieben."
+]
+
+
+def recording_stub(**kwargs):
+    """A stub that keeps the summarizer instruction of every call."""
+    instructions = []
+
+    def summarize(llm_request):
+        instructions.append(str(llm_request.config.system_instruction))
+        return {"summary": "A summary."}
+
+    return StubLlm(responses={"SummarizerAgent": summarize}, **kwargs), instructions
+
+
+async def collect(assistant, messages, **kwargs):
+    return [item async for item in assistant.process_batch(enumerate(messages), **kwargs)]
+
+
+class TestVariants:
+    """Test per-language instruction variants."""
+
+    def test_variants_name_the_output_language(self):
+        assert "in German" in instructions_for("de")["summarizer"]
+        assert "in Spanish" in instructions_for("es")["reply_generator"]
+        assert '"urgente"' in instructions_for("es")["urgency_classifier"]
+        assert "the language of the message" in INSTRUCTIONS["summarizer"]
+        assert instructions_for(None) is INSTRUCTIONS
+
+    def test_unknown_languages_use_generic_instructions(self):
+        assert prompt_language("fr") is None
+        assert prompt_language("de") == "de"
+
+    def test_cache_keys_differ_per_variant(self):
+        keys = {
+            prompt_cache_key("summarizer", "gemini", instructions_for(language)["summarizer"])
+            for language in (None, "en", "es", "de")
+        }
+        assert len(keys) == 4
+
+
+class TestLanguagePipelines:
+    """Test pipelines built for the message language."""
+
+    def test_english_uses_default_pipeline(self):
+        stub, instructions = recording_stub()
+        assistant = InboxAssistant(model=stub)
+        assistant.process_message_sync(ENGLISH[0])
+        assert "in English" in instructions[0]
+        assert not assistant._subset_runners
+
+    def test_other_languages_get_their_own_pipeline(self):
+        stub, instructions = recording_stub()
+        assistant = InboxAssistant(model=stub)
+        result = assistant.process_message_sync(GERMAN[0])
+        assistant.process_message_sync(GERMAN[1])
+        assert result["language"] == "de"
+        assert all("in German" in instruction for instruction in instructions)
+        assert [key[-1] for key in assistant._subset_runners] == ["de"]
+
+    def test_known_language_skips_detection(self, monkeypatch):
+        import agent
+        monkeypatch.setattr(agent, "detect_language", lambda message: pytest.fail("detected"))
+        stub, instructions = recording_stub()
+        assistant = InboxAssistant(model=stub)
+        result = assistant.process_message_sync(ENGLISH[0], language="es")
+        assert result["language"] == "es"
+        assert "in Spanish" in instructions[0]
+
+    def test_language_prompts_off(self):
+        stub, instructions = recording_stub()
+        assistant = InboxAssistant(model=stub, language_prompts=False)
+        assistant.process_message_sync(SPANISH[0])
+        assert "the language of the message" in instructions[0]
+        assert not assistant._subset_runners
+
+
+class TestTranslatedInstructions:
+    """Test instructions translated once per language."""
+
+    def test_translator_called_once_per_instruction(self):
+        calls = []
+
+        async def translator(text, language):
+            calls.append(language)
+            return f"[{language}] {text}"
+
+        stub, instructions = recording_stub()
+        cache = TranslationCache()
+        assistant = InboxAssistant(model=stub, translator=translator, translations=cache)
+        for message in GERMAN + ENGLISH:
+            assistant.process_message_sync(message)
+        assert calls == ["German"] * len(INSTRUCTIONS)
+        assert instructions[0].startswith("[German] ")
+        assert not instructions[-1].startswith("[")
+
+        other = InboxAssistant(model=StubLlm(), translator=translator, translations=cache)
+        other.process_message_sync(GERMAN[0])
+        assert len(calls) == len(INSTRUCTIONS)
+        assert cache.stats()["hits"] == len(INSTRUCTIONS)
+
+    def test_cache_file_round_trip(self, tmp_path):
+        path = str(tmp_path / "translations.json")
+        cache = TranslationCache(path)
+        cache.put("es", "Hello", "Hola")
+        cache.save()
+        reloaded = TranslationCache(path)
+        assert reloaded.get("es", "Hello") == "Hola"
+        assert reloaded.get("es", "Hello again") is None
+        assert reloaded.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+
+class TestLanguageBatching:
+    """Test batches grouped by language."""
+
+    def test_group_by_language(self):
+        assert group_by_language(["en", "es", "en", "de", "es"]) == [0, 2, 1, 4, 3]
+
+    def test_grouped_batch_keeps_input_order(self):
+        stub, instructions = recording_stub()
+        assistant = InboxAssistant(model=stub)
+        messages = [ENGLISH[0], SPANISH[0], ENGLISH[1], SPANISH[1]]
+        items = asyncio.run(collect(assistant, messages, concurrency=1, group_languages=True))
+        assert [item.index for item in items] == [0, 1, 2, 3]
+        assert [item.result["language"] for item in items] == ["en", "es", "en", "es"]
+        languages = ["English" if "in English" in text else "Spanish" for text in instructions]
+        assert languages == ["English", "English", "Spanish", "Spanish"]
+
+    def test_stats_per_language(self):
+        assistant = InboxAssistant(model=StubLlm(usage=True))
+        asyncio.run(collect(assistant, ENGLISH + SPANISH[:1], group_languages=True))
+        languages = assistant.stats.snapshot()["languages"]
+        assert {language: entry["messages"] for language, entry in languages.items()} == {
+            "en": 2, "es": 1
+        }
+        assert languages["es"]["calls"] == len(INSTRUCTIONS)
+        assert languages["es"]["tokens_per_message"] > 0
+        assert languages["en"]["mean_latency_s"] > 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,123 @@
+"""
+Unit tests for the shared pipeline pool
+"""
+import asyncio
+
+import pytest
+from agent import InboxAssistant
+from config import APP_NAME, DEFAULT_USER_ID
+from pool import PipelinePool
+from resilience import request_message
+from stub_llm import StubLlm
+
+MESSAGES = [
+    "Can you send the contract by Friday?",
+    "The build is failing on main, please take a look.",
+    "Thanks for lunch yesterday!"
+]
+
+
+def echo_summary(llm_request):
+    """Summarize a message as itself, so results show which message they came from."""
+    return {"summary": request_message(llm_request)}
+
+
+class TestPipelinePool:
+    """Test pipeline sharing and per-session isolation."""
+
+    def test_shares_pipeline_per_settings(self):
+        pool = PipelinePool()
+        stub = StubLlm()
+        first = pool.acquire(model=stub)
+        second = InboxAssistant(model=stub, pool=pool)
+        assert first.pipeline is second.pipeline
+        assert first.runner is second.runner
+        assert first.session_service is second.session_service
+        assert first.breakers is second.breakers
+        assert pool.stats() == {"pipelines": 1, "builds": 1, "hits": 1}
+
+        other = pool.acquire(model=stub, routing=False)
+        assert other.pipeline is not first.pipeline
+        assert pool.acquire(model=StubLlm()).pipeline is not first.pipeline
+        assert len(pool) == 3
+
+    def test_translation_caches_stay_per_assistant(self):
+        from translation import TranslationCache
+
+        async def translator(text, language):
+            return f"[{language}] {text}"
+
+        pool = PipelinePool()
+        stub = StubLlm()
+        first_cache, second_cache = TranslationCache(), TranslationCache()
+        first = pool.acquire(model=stub, translator=translator, translations=first_cache)
+        second = pool.acquire(model=stub, translator=translator, translations=second_cache)
+        assert first.pipeline is second.pipeline
+        assert second.translations is second_cache
+        second.process_message_sync("Guten Tag, können wir das Treffen am Donnerstag verschieben?")
+        assert second_cache.stats()["entries"] > 0
+        assert first_cache.stats()["entries"] == 0
+
+    def test_prompt_version_is_part_of_key(self, monkeypatch):
+        pool = PipelinePool()
+        stub = StubLlm()
+        before = pool.acquire(model=stub)
+        monkeypatch.setattr("prompts.PROMPT_VERSION", "test")
+        assert pool.acquire(model=stub).pipeline is not before.pipeline
+
+    def test_warm_builds_ahead(self):
+        stub = StubLlm()
+        pool = PipelinePool().warm({"model": stub}, {"model": stub, "hedging": False})
+        assert pool.builds == 2
+        assert pool.acquire(model=stub)._runner is not None
+        assert pool.builds == 2
+
+    def test_pooled_sessions_stay_isolated(self):
+        pool = PipelinePool()
+        stub = StubLlm(responses={"SummarizerAgent": echo_summary})
+        assistants = [pool.acquire(model=stub) for _ in MESSAGES]
+
+        async def run_all():
+            return await asyncio.gather(*(
+                assistant.process_message(message, user_id="shared", session_id=f"thread-{i}")
+                for i, (assistant, message) in enumerate(zip(assistants, MESSAGES))
+            ))
+
+        results = asyncio.run(run_all())
+        assert [result["summary"] for result in results] == MESSAGES
+
+        async def states():
+            sessions = await assistants[0].session_service.list_sessions(
+                app_name=APP_NAME, user_id="shared"
+            )
+            return [
+                (await assistants[0].session_service.get_session(
+                    app_name=APP_NAME, user_id="shared", session_id=session.id
+                )).state
+                for session in sessions.sessions
+            ]
+
+        found = asyncio.run(states())
+        assert sorted(state["original_message"] for state in found) == sorted(MESSAGES)
+        assert all(state["summary"]["summary"] == state["original_message"] for state in found)
+        assert assistants[0].stats.snapshot()["totals"]["messages"] == 3
+
+    def test_shared_session_service_does_not_grow(self):
+        pool = PipelinePool()
+        stub = StubLlm()
+        for message in MESSAGES * 3:
+            pool.acquire(model=stub).process_message_sync(message)
+        assistant = pool.acquire(model=stub)
+        assistant.process_message_sync(MESSAGES[0], session_id="kept")
+
+        async def session_ids():
+            sessions = await assistant.session_service.list_sessions(
+                app_name=APP_NAME, user_id=DEFAULT_USER_ID
+            )
+            return [session.id for session in sessions.sessions]
+
+        assert asyncio.run(session_ids()) == ["kept"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,83 @@
+"""
+Unit tests for orchestration profiling
+"""
+import json
+import tracemalloc
+
+import pytest
+from agent import InboxAssistant
+from cli import main
+from profiling import NULL_SPAN, Profiler, span
+from stub_llm import StubLlm
+
+MESSAGE = "Can you send the contract by Friday?"
+
+
+def profile(messages: int = 1, latency_s: float = 0.0, **kwargs) -> Profiler:
+    profiler = Profiler(**kwargs)
+    assistant = InboxAssistant(model=StubLlm(latency_s=latency_s), profiler=profiler)
+    for _ in range(messages):
+        assistant.process_message_sync(MESSAGE)
+    profiler.close()
+    return profiler
+
+
+class TestSpans:
+    """Test stage spans and their output formats."""
+
+    def test_disabled_span_is_shared_noop(self):
+        assert span("anything") is NULL_SPAN
+
+    def test_sample_rate_spreads_messages(self):
+        profiler = profile(messages=8, sample_rate=0.25)
+        assert profiler.messages == 8
+        assert profiler.profiled == 2
+        assert profiler.stages()["message"]["count"] == 2
+
+    def test_stages_and_collapsed_stacks(self):
+        profiler = profile()
+        stages = profiler.stages()
+        for name in ("message", "detect_language", "runner", "session.get_session", "result"):
+            assert stages[name]["count"] >= 1
+        assert stages["message"]["total_ms"] >= stages["runner"]["total_ms"]
+
+        stacks = dict(line.rsplit(" ", 1) for line in profiler.collapsed())
+        assert "message;detect_language" in stacks
+        assert "message;runner;session.get_session" in stacks
+        assert all(int(value) >= 0 for value in stacks.values())
+
+    def test_speedscope_document(self, tmp_path):
+        profiler = profile(latency_s=0.01, sampling_interval_s=0.001)
+        path = str(tmp_path / "profile.speedscope.json")
+        profiler.write_speedscope(path)
+        with open(path) as f:
+            document = json.load(f)
+
+        assert document["$schema"].startswith("https://www.speedscope.app")
+        assert [p["name"] for p in document["profiles"]] == ["spans", "samples"]
+        frames = len(document["shared"]["frames"])
+        for profile_data in document["profiles"]:
+            assert len(profile_data["samples"]) == len(profile_data["weights"])
+            assert all(0 <= i < frames for stack in profile_data["samples"] for i in stack)
+        assert profiler.report()["samples"] > 0
+
+    def test_allocation_tracing(self):
+        assert not tracemalloc.is_tracing()
+        profiler = profile(trace_allocations=True)
+        assert "net_alloc_kb" in profiler.stages()["runner"]
+        assert not tracemalloc.is_tracing()
+
+    def test_cli_profile(self, tmp_path, capsys):
+        source = tmp_path / "in.jsonl"
+        source.write_text('"First message to analyze"\n"Second message to analyze"\n')
+        target = tmp_path / "profile.txt"
+        assert main([
+            "batch", str(source), "--stub", "--no-progress",
+            "--profile", str(target), "--profile-interval-ms", "0"
+        ]) == 0
+        assert target.read_text().startswith("message")
+        assert "profiled 2 of 2 messages" in capsys.readouterr().err
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
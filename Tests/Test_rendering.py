@@ -0,0 +1,90 @@
+"""
+Unit tests for result rendering
+"""
+import io
+import json
+import pytest
+from rendering import FORMATS, render, render_many
+from results import AnalysisResult
+from utils import format_agent_output
+
+
+RESULT = {
+    "summary": "Customer <b>demands</b> a refund.",
+    "urgency": "High",
+    "tone": ["Angry", "Direct"],
+    "draft_reply": "We are sorry.\nA refund is on its way.",
+    "action_items": ["Issue refund", "Reply to ticket"],
+    "language": "en"
+}
+
+
+class TestRender:
+    """Test single-result rendering."""
+
+    def test_terminal_matches_format_agent_output(self):
+        text = format_agent_output(RESULT)
+        assert text == render(RESULT, "terminal")
+        assert "🔴 URGENCY: High" in text
+        assert "  2. Reply to ticket\n" in text
+
+    def test_markdown(self):
+        text = render(RESULT, "markdown")
+        assert "**Tone:** Angry, Direct" in text
+        assert "> We are sorry.\n> A refund is on its way." in text
+        assert "- [ ] Issue refund\n" in text
+
+    def test_html_escapes_fields(self):
+        text = render(RESULT, "html")
+        assert "&lt;b&gt;demands&lt;/b&gt;" in text
+        assert '<p class="urgency urgency-high">High</p>' in text
+
+    def test_json_is_compact(self):
+        text = render(RESULT, "json")
+        assert json.loads(text) == RESULT
+        assert ", " not in text.replace("We are sorry", "")
+
+    def test_accepts_analysis_result(self):
+        compact = AnalysisResult.from_dict(RESULT, message="hello")
+        assert json.loads(render(compact, "json"))["urgency"] == "High"
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            render(RESULT, "pdf")
+
+
+class TestRenderMany:
+    """Test streaming several results."""
+
+    def test_ndjson_one_line_per_result(self):
+        out = io.StringIO()
+        assert render_many([RESULT] * 3, "ndjson", out) == 3
+        lines = out.getvalue().splitlines()
+        assert [json.loads(line) for line in lines] == [RESULT] * 3
+
+    def test_json_array(self):
+        out = io.StringIO()
+        render_many(iter([RESULT, RESULT]), "json", out)
+        assert json.loads(out.getvalue()) == [RESULT, RESULT]
+
+    def test_empty_json_array(self):
+        out = io.StringIO()
+        render_many([], "json", out)
+        assert json.loads(out.getvalue()) == []
+
+    def test_html_single_document(self):
+        out = io.StringIO()
+        render_many([RESULT, RESULT], "html", out)
+        text = out.getvalue()
+        assert text.count("<html>") == 1
+        assert text.count("<article") == 2
+
+    @pytest.mark.parametrize("fmt", FORMATS)
+    def test_all_formats_stream(self, fmt):
+        out = io.StringIO()
+        assert render_many([RESULT], fmt, out) == 1
+        assert out.getvalue()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,93 @@
+"""
+Unit tests for compact analysis result records
+"""
+import pytest
+from results import (
+    AnalysisResult, Formality, Sentiment, Urgency,
+    decode_tones, encode_tones, message_digest
+)
+from examples_sample_messages import SAMPLE_MESSAGES
+
+
+LEGACY_RESULT = {
+    "summary": "Customer demands a refund.",
+    "urgency": "High",
+    "reasoning": "Threatens to cancel.",
+    "tone": ["Angry", "Direct"],
+    "formality": "Informal",
+    "sentiment": "Negative",
+    "draft_reply": "We are sorry...",
+    "reply_tone": "Empathetic",
+    "action_items": ["Refund the customer"],
+    "language": "en",
+    "near_duplicate_similarity": 0.97
+}
+
+
+class TestAnalysisResult:
+    """Test the slotted result record."""
+
+    def test_enum_coding(self):
+        assert Urgency.parse("high") is Urgency.HIGH
+        assert Urgency.HIGH > Urgency.LOW
+        assert Formality.parse("Formal").label == "Formal"
+        assert Sentiment.parse("unknown") is None
+
+    def test_tone_bitmask_round_trip(self):
+        mask = encode_tones(["Direct", "Angry", "Furious"])
+        assert decode_tones(mask) == ["Direct", "Angry"]
+
+    def test_to_dict_round_trip(self):
+        message = SAMPLE_MESSAGES["angry_customer"]
+        result = AnalysisResult.from_dict(LEGACY_RESULT, message=message)
+        data = result.to_dict()
+
+        assert data["urgency"] == "High"
+        assert sorted(data["tone"]) == ["Angry", "Direct"]
+        assert data["action_items"] == ["Refund the customer"]
+        assert data["near_duplicate_similarity"] == 0.97
+        assert data["message"] is message
+        assert data["original_message"] is message
+
+    def test_round_trip_keeps_tone_order_and_unknown_labels(self):
+        data = {"tone": ["Urgent", "Polite", "Sarcastic"], "urgency": "Critical", "language": "en"}
+        result = AnalysisResult.from_dict(data)
+        assert result.to_dict() == data
+        assert result.tones == ["Polite", "Urgent"]
+        assert result.urgency is None
+
+        ordered = AnalysisResult.from_dict(dict(data, tone=["Polite", "Urgent"], urgency="High"))
+        assert ordered.extra is None
+
+    def test_round_trip_keeps_mixed_tone_order(self):
+        data = {"tone": ["Urgent", "Direct", "Polite"], "urgency": "High", "language": "en"}
+        result = AnalysisResult.from_dict(data)
+        assert result.to_dict() == data
+        assert result.tone_order is not None
+        assert result.extra is None
+        assert AnalysisResult.from_dict({"tone": ["Polite", "Urgent"]}).tone_order is None
+
+    def test_message_held_by_reference(self):
+        message = SAMPLE_MESSAGES["urgent_technical"]
+        result = AnalysisResult.from_dict(LEGACY_RESULT, message=message)
+        assert result.message is message
+        assert result.message_hash == message_digest(message)
+
+        result.release_message()
+        assert "message" not in result.to_dict()
+        assert result.message_hash == message_digest(message)
+
+    def test_without_message(self):
+        result = AnalysisResult(None, summary="Nothing to go on.")
+        assert result.message_hash is None
+        assert "message" not in result.to_dict()
+        assert "hash=None" in repr(result)
+        assert AnalysisResult.from_dict(LEGACY_RESULT).message_hash is None
+
+    def test_slots_prevent_dict(self):
+        result = AnalysisResult.from_dict(LEGACY_RESULT, message="Hi")
+        assert not hasattr(result, "__dict__")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
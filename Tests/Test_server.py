@@ -0,0 +1,103 @@
+"""
+Unit tests for the ASGI service
+"""
+import asyncio
+import json
+import pytest
+from agent import InboxAssistant
+from server import InboxAssistantServer, MicroBatcher
+from stub_llm import StubLlm
+
+
+async def call(app, method, path, payload=None):
+    """Send one request to the ASGI app and return status and body chunks."""
+    body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+    scope = {"type": "http", "method": method, "path": path, "headers": []}
+    status, chunks = None, []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(event):
+        nonlocal status
+        if event["type"] == "http.response.start":
+            status = event["status"]
+        elif event.get("body"):
+            chunks.append(event["body"])
+
+    await app(scope, receive, send)
+    return status, chunks
+
+
+def make_app(latency_s=0.0, **batcher_kwargs):
+    stub = StubLlm(latency_s=latency_s)
+    assistant = InboxAssistant(model=stub)
+    return InboxAssistantServer(assistant, MicroBatcher(assistant, **batcher_kwargs)), stub
+
+
+class TestEndpoints:
+    """Test routing and response bodies."""
+
+    def test_analyze(self):
+        app, _ = make_app()
+        status, chunks = asyncio.run(call(app, "POST", "/analyze", {"message": "Server is down"}))
+        assert status == 200
+        assert json.loads(b"".join(chunks))["urgency"] == "Medium"
+
+    def test_stream_sends_each_agent(self):
+        app, _ = make_app()
+        status, chunks = asyncio.run(
+            call(app, "POST", "/analyze/stream", {"message": "Server is down"})
+        )
+        lines = [json.loads(chunk) for chunk in chunks]
+        assert status == 200
+        assert [line.get("agent") for line in lines[:-1]] == [
+            "summarizer", "urgency_classifier", "tone_analyzer",
+            "reply_generator", "next_step_planner"
+        ]
+        assert lines[-1]["result"]["summary"]
+
+    @pytest.mark.parametrize("method,path,payload,expected", [
+        ("POST", "/analyze", {"text": "no message"}, 400),
+        ("GET", "/analyze", None, 405),
+        ("POST", "/missing", {"message": "hi"}, 404),
+        ("GET", "/health", None, 200)
+    ])
+    def test_status_codes(self, method, path, payload, expected):
+        app, _ = make_app()
+        status, _ = asyncio.run(call(app, method, path, payload))
+        assert status == expected
+
+
+class TestBatching:
+    """Test micro-batching and backpressure."""
+
+    def test_identical_requests_coalesced(self):
+        app, stub = make_app(latency_s=0.01, window_ms=20)
+
+        async def run():
+            return await asyncio.gather(*(
+                call(app, "POST", "/analyze", {"message": "Same message"}) for _ in range(4)
+            ))
+
+        responses = asyncio.run(run())
+        assert [status for status, _ in responses] == [200] * 4
+        assert app.batcher.counters["coalesced"] == 3
+        assert stub.calls["SummarizerAgent"] == 1
+
+    def test_full_queue_returns_429(self):
+        app, _ = make_app(latency_s=0.02, queue_size=2, concurrency=1, window_ms=0)
+
+        async def run():
+            return await asyncio.gather(*(
+                call(app, "POST", "/analyze", {"message": f"Message {i}"}) for i in range(10)
+            ))
+
+        statuses = [status for status, _ in asyncio.run(run())]
+        assert 429 in statuses
+        assert 200 in statuses
+        assert app.batcher.counters["rejected"] == statuses.count(429)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,91 @@
+"""
+Unit tests for the cross-message task index
+"""
+from datetime import date
+
+import pytest
+from agent import InboxAssistant
+from stub_llm import StubLlm
+from task_index import TaskIndex, normalize_action_item, token_set_similarity
+
+# A Wednesday.
+RECEIVED = date(2025, 3, 5)
+
+
+class TestNormalization:
+    """Test action item normalization."""
+
+    def test_verb_object_and_deadline(self):
+        task = normalize_action_item("Sending the Q3 reports to finance by Friday", RECEIVED)
+        assert task.verb == "send"
+        assert task.tokens == {"q3", "report", "finance"}
+        assert task.deadline == date(2025, 3, 7)
+
+    def test_two_word_verb(self):
+        assert normalize_action_item("Follow up with the vendor", RECEIVED).verb == "follow up"
+
+    def test_similarity(self):
+        assert token_set_similarity(frozenset("ab"), frozenset("abc")) == pytest.approx(2 / 3)
+
+
+class TestTaskIndex:
+    """Test deduplication and lookups."""
+
+    def test_follow_ups_merge(self):
+        index = TaskIndex(threshold=0.75)
+        first = index.add("Send the Q3 report to finance", message_id="m1", thread_id="t1")
+        again = index.add("Please send Q3 reports to finance by Friday",
+                          message_id="m2", thread_id="t1", received_at=RECEIVED)
+        assert again is first
+        assert len(index) == 1
+        assert first.mentions == 2
+        assert first.message_ids == ["m1", "m2"]
+        assert first.deadline == date(2025, 3, 7)
+
+    def test_different_tasks_stay_apart(self):
+        index = TaskIndex(threshold=0.75)
+        index.add("Send the Q3 report to finance")
+        index.add("Review the Q3 report")
+        index.add("Send the Q3 report to finance", owner="other")
+        assert len(index) == 3
+
+    def test_completed_tasks_do_not_absorb(self):
+        index = TaskIndex()
+        task = index.add("Schedule the launch review")
+        index.complete(task.task_id)
+        assert index.add("Schedule the launch review") is not task
+        assert index.query("launch") != [task]
+        assert task in index.query("launch", include_done=True)
+
+    def test_query_filters(self):
+        index = TaskIndex()
+        report = index.add("Submit the expense report by Friday", thread_id="t1", received_at=RECEIVED)
+        index.add("Submit the expense report by Friday", thread_id="t2", received_at=RECEIVED)
+        budget = index.add("Update the budget sheet by March 20", thread_id="t2", received_at=RECEIVED)
+        call = index.add("Call the landlord", thread_id="t3")
+
+        assert index.query("expense reports") == [report]
+        assert index.query("submitted") == [report]
+        assert index.query(thread_id="t2") == [report, budget]
+        assert index.query(due_from=date(2025, 3, 1), due_to=date(2025, 3, 10)) == [report]
+        assert index.query(due_from=date(2025, 3, 8)) == [budget]
+        assert index.query("landlord", thread_id="t1") == []
+        assert index.query(thread_id="t3") == [call]
+
+
+class TestAssistantFeed:
+    """Test that analysis results feed the index."""
+
+    def test_results_are_indexed(self):
+        index = TaskIndex()
+        assistant = InboxAssistant(model=StubLlm(), task_index=index)
+        assistant.process_message_sync("Can you get back to me?", user_id="a", session_id="s1")
+        assistant.process_message_sync("Any update?", user_id="a", session_id="s1")
+        assert len(index) == 1
+        task = index.query("respond", owner="a")[0]
+        assert task.mentions == 2
+        assert task.thread_ids == ["s1"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,105 @@
+"""
+Unit tests for temporal expression extraction
+"""
+from datetime import date, datetime, timezone
+
+import pytest
+from agent import InboxAssistant
+from stub_llm import StubLlm
+from temporal import earliest_due, extract, resolve, urgency_signal
+
+# A Wednesday morning.
+SENT = datetime(2025, 3, 5, 10, 0)
+# The same Wednesday, late in the afternoon.
+LATE = datetime(2025, 3, 5, 16, 0)
+
+
+class TestResolve:
+    """Test resolving single phrases against the message timestamp."""
+
+    @pytest.mark.parametrize("phrase, expected", [
+        ("EOD", datetime(2025, 3, 5, 17, 0)),
+        ("by tomorrow", datetime(2025, 3, 6, 17, 0)),
+        ("tomorrow morning", datetime(2025, 3, 6, 9, 0)),
+        ("this afternoon", datetime(2025, 3, 5, 15, 0)),
+        ("by noon", datetime(2025, 3, 5, 12, 0)),
+        ("next Tuesday", datetime(2025, 3, 11, 17, 0)),
+        ("next Wednesday", datetime(2025, 3, 12, 17, 0)),
+        ("end of this week", datetime(2025, 3, 7, 17, 0)),
+        ("end of next week", datetime(2025, 3, 14, 17, 0)),
+        ("end of month", datetime(2025, 3, 31, 17, 0)),
+        ("end of the quarter", datetime(2025, 3, 31, 17, 0)),
+        ("in 30 minutes", datetime(2025, 3, 5, 10, 30)),
+        ("within 2 hours", datetime(2025, 3, 5, 12, 0)),
+        ("within 3 days", datetime(2025, 3, 8, 10, 0)),
+        ("by 3pm", datetime(2025, 3, 5, 15, 0)),
+        ("by 9:30", datetime(2025, 3, 6, 9, 30)),
+        ("March 20th", datetime(2025, 3, 20, 17, 0)),
+        ("January 10", datetime(2026, 1, 10, 17, 0)),
+        ("2025-04-01", datetime(2025, 4, 1, 17, 0)),
+        ("4/15/25", datetime(2025, 4, 15, 17, 0))
+    ])
+    def test_phrases(self, phrase, expected):
+        assert resolve(phrase, SENT) == expected
+
+    @pytest.mark.parametrize("phrase, expected", [
+        ("by noon", datetime(2025, 3, 6, 12, 0)),
+        ("by 3pm", datetime(2025, 3, 6, 15, 0)),
+        ("this afternoon", None),
+        ("this morning", None),
+        ("this evening", datetime(2025, 3, 5, 19, 0)),
+        ("tomorrow morning", datetime(2025, 3, 6, 9, 0)),
+        ("EOD", datetime(2025, 3, 5, 17, 0))
+    ])
+    def test_passed_dayparts(self, phrase, expected):
+        assert resolve(phrase, LATE) == expected
+
+    def test_invalid_date(self):
+        assert resolve("2/30", SENT) is None
+
+    def test_keeps_timezone(self):
+        sent = SENT.replace(tzinfo=timezone.utc)
+        assert resolve("EOD", sent).tzinfo is timezone.utc
+
+    def test_date_reference(self):
+        assert resolve("tomorrow", date(2025, 3, 5)) == datetime(2025, 3, 6, 17, 0)
+
+
+class TestExtract:
+    """Test extraction from whole messages and the urgency signal."""
+
+    def test_date_and_time_merge(self):
+        expressions = extract("Please send it by Friday at 3pm, thanks.", SENT)
+        assert len(expressions) == 1
+        assert expressions[0].text == "by Friday at 3pm"
+        assert expressions[0].due == datetime(2025, 3, 7, 15, 0)
+
+    def test_clock_time_needs_a_cue(self):
+        assert extract("Let's meet at 10am to go over it.", SENT) == []
+        assert [e.text for e in extract("Send it by 10am, then meet at 2pm.", LATE)] == ["by 10am"]
+        assert extract("Can we talk this afternoon?", LATE) == []
+
+    def test_earliest_due(self):
+        expressions = extract("Draft by next Tuesday; final review due tomorrow.", SENT)
+        assert [e.text for e in expressions] == ["next Tuesday", "due tomorrow"]
+        assert earliest_due(expressions) == datetime(2025, 3, 6, 17, 0)
+
+    def test_urgency_signal(self):
+        assert urgency_signal(extract("Need it in 30 minutes", SENT), SENT) == "High"
+        assert urgency_signal(extract("By Monday, please", SENT), SENT) == "Medium"
+        assert urgency_signal(extract("Due March 31st", SENT), SENT) == "Low"
+        assert urgency_signal(extract("Thanks for the update", SENT), SENT) is None
+
+    def test_result_fields(self):
+        assistant = InboxAssistant(model=StubLlm())
+        result = assistant.process_message_sync(
+            "Can you send the contract by EOD?", received_at=SENT
+        )
+        assert result["deadlines"] == [{"text": "EOD", "due": "2025-03-05T17:00"}]
+        assert result["due"] == "2025-03-05T17:00"
+        assert result["urgency_signal"] == "High"
+        assert "deadlines" not in assistant.process_message_sync("Thanks!", received_at=SENT)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
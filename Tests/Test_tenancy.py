@@ -0,0 +1,127 @@
+"""
+Unit tests for tenant scheduling, quotas and isolation
+"""
+import asyncio
+import pytest
+from agent import InboxAssistant
+from stub_llm import StubLlm
+from tenancy import FairScheduler, QuotaExceeded, TenantManager, TokenBucket
+
+
+def grant_order(scheduler, requests, weights=None):
+    """Queue (tenant, label) requests behind a busy slot and return the serving order."""
+    weights = weights or {}
+    order = []
+
+    async def worker(tenant, label):
+        await scheduler.acquire(tenant, weight=weights.get(tenant, 1.0))
+        order.append(label)
+        await asyncio.sleep(0)
+        scheduler.release()
+
+    async def run():
+        await scheduler.acquire("blocker")
+        tasks = []
+        for tenant, label in requests:
+            tasks.append(asyncio.ensure_future(worker(tenant, label)))
+            await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    return order
+
+
+class TestFairScheduler:
+    """Test weighted fair queuing order."""
+
+    def test_light_tenant_not_starved(self):
+        requests = [("heavy", f"h{i}") for i in range(6)] + [("light", "l0")]
+        order = grant_order(FairScheduler(1), requests)
+        assert order.index("l0") == 1
+
+    def test_fifo_mode(self):
+        requests = [("heavy", f"h{i}") for i in range(6)] + [("light", "l0")]
+        order = grant_order(FairScheduler(1, fair=False), requests)
+        assert order[-1] == "l0"
+
+    def test_weights(self):
+        requests = [("a", f"a{i}") for i in range(6)] + [("b", f"b{i}") for i in range(6)]
+        order = grant_order(FairScheduler(1), requests, weights={"a": 2.0})
+        assert sum(label.startswith("a") for label in order[:6]) == 4
+
+    def test_concurrency_limit(self):
+        scheduler = FairScheduler(2)
+        peak = 0
+
+        async def worker():
+            nonlocal peak
+            await scheduler.acquire("t")
+            peak = max(peak, scheduler.active)
+            await asyncio.sleep(0.001)
+            scheduler.release()
+
+        async def run():
+            await asyncio.gather(*(worker() for _ in range(10)))
+
+        asyncio.run(run())
+        assert peak == 2
+        assert scheduler.active == 0
+
+
+class TestQuotas:
+    """Test per-tenant request and token quotas."""
+
+    def test_token_bucket_refills(self):
+        now = [0.0]
+        bucket = TokenBucket(60, clock=lambda: now[0])
+        assert bucket.try_take(60)
+        assert not bucket.try_take(1)
+        now[0] = 1.0
+        assert bucket.try_take(1)
+
+    def test_request_quota(self):
+        tenants = TenantManager(concurrency=4, requests_per_minute=2, tokens_per_minute=0)
+
+        async def admit(tenant):
+            async with tenants.admit(tenant):
+                pass
+
+        async def run():
+            await admit("a")
+            await admit("a")
+            with pytest.raises(QuotaExceeded):
+                await admit("a")
+            await admit("b")
+
+        asyncio.run(run())
+        metrics = tenants.snapshot()
+        assert metrics["a"]["rejected"] == 1
+        assert metrics["a"]["completed"] == 2
+        assert metrics["b"]["completed"] == 1
+
+    def test_token_quota(self):
+        tenants = TenantManager(concurrency=4, requests_per_minute=0, tokens_per_minute=100)
+        assistant = InboxAssistant(model=StubLlm(), tenants=tenants)
+        with pytest.raises(QuotaExceeded):
+            assistant.process_message_sync("x" * 400, user_id="a")
+
+
+class TestIsolation:
+    """Test per-tenant near-duplicate namespaces and metrics."""
+
+    def test_dedup_namespaces(self):
+        message = "Order #1234 has shipped and will arrive on Monday."
+        tenants = TenantManager(
+            concurrency=4, requests_per_minute=0, tokens_per_minute=0, dedup=True
+        )
+        assistant = InboxAssistant(model=StubLlm(), tenants=tenants)
+        assistant.process_message_sync(message, user_id="a")
+        assert "near_duplicate_similarity" in assistant.process_message_sync(message, user_id="a")
+        assert "near_duplicate_similarity" not in assistant.process_message_sync(message, user_id="b")
+        assert tenants.snapshot()["a"]["completed"] == 2
+        assert tenants.snapshot()["a"]["tokens"] > 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -1,233 +1,743 @@
 """
 Inbox Assistant - Multi-Agent AI System
 Main implementation with 5 specialized agents using Google ADK
+
+The ADK and GenAI SDKs are imported on first use rather than at import
+time, so short-lived CLI and serverless invocations only pay for them when
+a message is actually processed.
 """
+from __future__ import annotations
 
 import asyncio
-from typing import Dict, Any, Optional
-from google.adk.agents import Agent, SequentialAgent
-from google.adk.sessions import InMemorySessionService
-from google.adk.runners import Runner
-from google.adk.memory import InMemoryMemoryService
-from google.genai.types import Content, Part
-
-from config import (
-    GEMINI_MODEL, APP_NAME, DEFAULT_USER_ID, 
-    AGENTS_CONFIG, URGENCY_LEVELS, TONE_CATEGORIES
+import itertools
+import json
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from typing import (
+    TYPE_CHECKING, AsyncIterator, Callable, Dict, Any, Iterable, NamedTuple, Optional, Tuple,
+    Union
 )
-from utils import detect_language, format_agent_output, parse_json_response
-
-
-def create_summarizer_agent() -> Agent:
-    """Creates the Summarization Agent that condenses messages into key points."""
-    agent_config = AGENTS_CONFIG["summarizer"]
-
-    instruction = """You are a Summarization Agent that summarizes communications.
-
-Your task:
-- Summarize the message in 2-4 concise sentences
-- Focus on main points, requests, and important details
-- Preserve the original language
-- Be clear and actionable
-
-Return ONLY a JSON object with this structure:
-{
-  "summary": "Your concise summary here..."
-}
-"""
-
-    return Agent(
-        model=GEMINI_MODEL,
-        name=agent_config["name"],
-        description=agent_config["description"],
-        instruction=instruction,
-        output_key=agent_config["output_key"]
-    )
 
+import config
+import temporal
+from config import APP_NAME, DEFAULT_USER_ID
+from dedup import NearDuplicateIndex
+from instrumentation import PipelineStats, message_language
+from profiling import span
+from prompts import INSTRUCTIONS, instructions_for, prompt_language
+from results import AnalysisResult, message_digest
+from utils import detect_language, format_agent_output, group_by_language
+
+if TYPE_CHECKING:
+    from google.adk.agents import Agent, BaseAgent, SequentialAgent
+    from google.adk.models.base_llm import BaseLlm
+    from google.adk.runners import Runner
+    from google.genai.types import Content
+    from pydantic import BaseModel
+    from prompt_cache import LocalPromptCache
+    from agent_policy import AgentPolicy
+    from cassette import Cassette
+    from exemplars import ExemplarIndex
+    from pool import PipelinePool
+    from profiling import Profiler
+    from resilience import CircuitBreaker, LatencyTracker
+    from task_index import TaskIndex
+    from tenancy import TenantManager
+    from translation import TranslationCache, Translator
+
+
+def _create_agent(
+    agent_key: str, model: Optional[Union[str, BaseLlm]], instruction: Optional[str] = None
+) -> Agent:
+    """Build an agent from its AGENTS_CONFIG entry, instruction and schema.
+
+    ``instruction`` replaces the generic instruction, e.g. with a language variant.
+    """
+    from google.adk.agents import Agent
+    from schemas import AGENT_SCHEMAS
 
-def create_urgency_classifier_agent() -> Agent:
-    """Creates the Urgency Classifier Agent that labels message priority."""
-    agent_config = AGENTS_CONFIG["urgency_classifier"]
-
-    instruction = f"""You are an Urgency Classifier Agent that categorizes message priority.
-
-Classification criteria:
-- HIGH: Requires immediate attention (crisis, urgent deadline, critical issue)
-- MEDIUM: Important but not emergency (needs response within days)
-- LOW: Informational or non-urgent (no immediate action required)
-
-Analyze for urgency signals:
-- Time-sensitive words ("urgent", "ASAP", "immediately", "today")
-- Deadline mentions
-- Emotional intensity
-- Business impact
-
-Return ONLY a JSON object:
-{{
-  "urgency": "High" | "Medium" | "Low",
-  "reasoning": "Brief explanation"
-}}
-"""
+    agent_config = config.AGENTS_CONFIG[agent_key]
 
     return Agent(
-        model=GEMINI_MODEL,
+        model=model if model is not None else agent_config["model"],
         name=agent_config["name"],
         description=agent_config["description"],
-        instruction=instruction,
+        static_instruction=instruction or INSTRUCTIONS[agent_key],
+        output_schema=AGENT_SCHEMAS[agent_key],
         output_key=agent_config["output_key"]
     )
 
 
-def create_tone_analyzer_agent() -> Agent:
-    """Creates the Tone Analyzer Agent that detects emotional tone and formality."""
-    agent_config = AGENTS_CONFIG["tone_analyzer"]
-
-    instruction = f"""You are a Tone Analyzer Agent that detects sender's tone and mood.
+def create_summarizer_agent(
+    model: Optional[Union[str, BaseLlm]] = None, instruction: Optional[str] = None
+) -> Agent:
+    """Creates the Summarization Agent that condenses messages into key points."""
+    return _create_agent("summarizer", model, instruction)
 
-Analyze for:
-- Formality level (Formal vs Informal)
-- Emotional state (Angry, Friendly, Neutral, etc.)
-- Communication style (Direct, Polite, Professional, Casual)
 
-Available tones: {', '.join(TONE_CATEGORIES)}
+def create_urgency_classifier_agent(
+    model: Optional[Union[str, BaseLlm]] = None, instruction: Optional[str] = None
+) -> Agent:
+    """Creates the Urgency Classifier Agent that labels message priority."""
+    return _create_agent("urgency_classifier", model, instruction)
 
-Return ONLY a JSON object:
-{{
-  "tone": ["Primary Tone", "Secondary Tone"],
-  "formality": "Formal" | "Informal" | "Neutral",
-  "sentiment": "Positive" | "Negative" | "Neutral"
-}}
-"""
 
-    return Agent(
-        model=GEMINI_MODEL,
-        name=agent_config["name"],
-        description=agent_config["description"],
-        instruction=instruction,
-        output_key=agent_config["output_key"]
-    )
+def create_tone_analyzer_agent(
+    model: Optional[Union[str, BaseLlm]] = None, instruction: Optional[str] = None
+) -> Agent:
+    """Creates the Tone Analyzer Agent that detects emotional tone and formality."""
+    return _create_agent("tone_analyzer", model, instruction)
 
 
-def create_reply_generator_agent() -> Agent:
+def create_reply_generator_agent(
+    model: Optional[Union[str, BaseLlm]] = None, instruction: Optional[str] = None
+) -> Agent:
     """Creates the Reply Generator Agent that drafts contextually appropriate responses."""
-    agent_config = AGENTS_CONFIG["reply_generator"]
-
-    instruction = """You are a Reply Generator Agent that drafts professional responses.
-
-Using the message context:
-- Address all questions and requests from the original message
-- Match or appropriately respond to the sender's tone
-- Be concise and professional
-- For high urgency, show promptness and understanding
-- For angry/frustrated tones, be empathetic
-- Maintain appropriate formality level
-
-Return ONLY a JSON object:
-{
-  "draft_reply": "Your complete draft response here...",
-  "reply_tone": "Tone of the response"
-}
+    return _create_agent("reply_generator", model, instruction)
 
-DO NOT include email headers, just the message body.
-"""
 
-    return Agent(
-        model=GEMINI_MODEL,
-        name=agent_config["name"],
-        description=agent_config["description"],
-        instruction=instruction,
-        output_key=agent_config["output_key"]
-    )
+def create_next_step_planner_agent(
+    model: Optional[Union[str, BaseLlm]] = None, instruction: Optional[str] = None
+) -> Agent:
+    """Creates the Next-Step Planner Agent that extracts actionable tasks."""
+    return _create_agent("next_step_planner", model, instruction)
 
 
-def create_next_step_planner_agent() -> Agent:
-    """Creates the Next-Step Planner Agent that extracts actionable tasks."""
-    agent_config = AGENTS_CONFIG["next_step_planner"]
-
-    instruction = """You are a Next-Step Planner Agent that extracts actionable tasks.
-
-Identify:
-- Explicit requests and tasks
-- Implicit action items
-- Deadlines and due dates
-- Questions that require responses
-
-For each action:
-- State it as a clear, actionable task
-- Include deadline if mentioned
-- Start with an action verb
-
-Return ONLY a JSON object:
-{
-  "action_items": [
-    "Task 1 with deadline if applicable",
-    "Task 2...",
-    ...
-  ]
+AGENT_FACTORIES = {
+    "summarizer": create_summarizer_agent,
+    "urgency_classifier": create_urgency_classifier_agent,
+    "tone_analyzer": create_tone_analyzer_agent,
+    "reply_generator": create_reply_generator_agent,
+    "next_step_planner": create_next_step_planner_agent
 }
 
-If no actions needed: {"action_items": ["No action required"]}
-"""
 
-    return Agent(
-        model=GEMINI_MODEL,
-        name=agent_config["name"],
-        description=agent_config["description"],
-        instruction=instruction,
-        output_key=agent_config["output_key"]
+@lru_cache(maxsize=None)
+def agent_keys_by_name() -> Dict[str, str]:
+    """Map agent names, as they appear as event authors, to config keys."""
+    return {
+        agent_config["name"]: key
+        for key, agent_config in config.AGENTS_CONFIG.items()
+    }
+
+
+def _gate(
+    agent_key: str, agent: Agent, run_if: Optional[Callable[[Optional[str]], bool]]
+) -> BaseAgent:
+    """Wrap an agent so it only runs when ``run_if`` accepts the urgency result."""
+    if run_if is None:
+        return agent
+    from agent_policy import GatedAgent
+
+    return GatedAgent(
+        name=f"{agent.name}Gate",
+        description=f"Runs {agent.name} when the urgency calls for it",
+        sub_agents=[agent],
+        run_if=run_if
     )
 
 
-def create_inbox_assistant_pipeline() -> SequentialAgent:
-    """Creates the complete Inbox Assistant multi-agent pipeline."""
-    summarizer = create_summarizer_agent()
-    urgency_classifier = create_urgency_classifier_agent()
-    tone_analyzer = create_tone_analyzer_agent()
-    reply_generator = create_reply_generator_agent()
-    next_step_planner = create_next_step_planner_agent()
+def create_inbox_assistant_pipeline(
+    stats: Optional[PipelineStats] = None,
+    routing: bool = True,
+    model: Optional[Union[str, BaseLlm]] = None,
+    prompt_cache: Optional[LocalPromptCache] = None,
+    breakers: Optional[Dict[str, CircuitBreaker]] = None,
+    latency_trackers: Optional[Dict[str, LatencyTracker]] = None,
+    cassette: Optional[Cassette] = None,
+    urgency_samples: Optional[int] = None,
+    agent_keys: Optional[Iterable[str]] = None,
+    gated_keys: Iterable[str] = (),
+    run_if: Optional[Callable[[Optional[str]], bool]] = None,
+    instructions: Optional[Dict[str, str]] = None
+) -> SequentialAgent:
+    """Creates the complete Inbox Assistant multi-agent pipeline.
+
+    Each agent gets the model configured in AGENTS_CONFIG, escalating
+    invalid classifications when ``routing`` is enabled. Passing ``model``
+    runs every agent on that model instead, without escalation. Agents with an entry in
+    ``breakers`` fall back to heuristic outputs when their model fails,
+    and agents with an entry in ``latency_trackers`` hedge slow calls.
+    Model calls go through ``cassette`` when one is given.
+    ``urgency_samples`` overrides the classifier's self-consistency sample
+    count from AGENTS_CONFIG. ``agent_keys`` limits the pipeline to those
+    agents, in pipeline order. Agents in ``gated_keys`` only run when
+    ``run_if`` accepts the urgency label found by the classifier.
+    ``instructions`` replaces the generic agent instructions, e.g. with
+    prompts.instructions_for a language.
+    """
+    from google.adk.agents import SequentialAgent
+    from models import build_agent_model
+
+    if agent_keys is not None:
+        agent_keys = frozenset(agent_keys)
+    gated_keys = frozenset(gated_keys)
+    instructions = instructions or {}
+    sub_agents = [
+        _gate(key, factory(build_agent_model(
+            key,
+            stats=stats,
+            routing=routing,
+            model=model,
+            prompt_cache=prompt_cache,
+            breaker=(breakers or {}).get(key),
+            latency=(latency_trackers or {}).get(key),
+            cassette=cassette,
+            samples=urgency_samples if key == "urgency_classifier" else None
+        ), instructions.get(key)), run_if if key in gated_keys else None)
+        for key, factory in AGENT_FACTORIES.items()
+        if agent_keys is None or key in agent_keys
+    ]
 
     pipeline = SequentialAgent(
         name="InboxAssistantPipeline",
-        sub_agents=[
-            summarizer,
-            urgency_classifier,
-            tone_analyzer,
-            reply_generator,
-            next_step_planner
-        ],
+        sub_agents=sub_agents,
         description="Multi-agent pipeline for intelligent message processing"
     )
 
     return pipeline
 
 
+def _language_groups(
+    messages: Iterable[Tuple[int, str]], block: int, order: Optional[deque]
+) -> Iterable[Tuple[int, str, str]]:
+    """Read ``block`` messages at a time and yield them grouped by language.
+
+    Indexes are appended to ``order`` in input order as each block is read.
+    """
+    source = iter(messages)
+    while True:
+        chunk = list(itertools.islice(source, block))
+        if not chunk:
+            return
+        languages = [detect_language(message) for _, message in chunk]
+        if order is not None:
+            order.extend(index for index, _ in chunk)
+        for position in group_by_language(languages):
+            index, message = chunk[position]
+            yield index, message, languages[position]
+
+
+class BatchItem(NamedTuple):
+    """Outcome of one message in a batch; exactly one of result and error is set."""
+
+    index: int
+    result: Optional[Union[Dict[str, Any], AnalysisResult]]
+    error: Optional[BaseException] = None
+
+
 class InboxAssistant:
     """Main class for running the Inbox Assistant multi-agent system."""
 
-    def __init__(self):
-        """Initialize the Inbox Assistant with ADK services."""
-        self.pipeline = create_inbox_assistant_pipeline()
-        self.session_service = InMemorySessionService()
-        self.memory_service = InMemoryMemoryService()
-        self.runner = Runner(
-            agent=self.pipeline,
-            app_name=APP_NAME,
+    def __init__(
+        self,
+        dedup_index: Optional[NearDuplicateIndex] = None,
+        routing: bool = True,
+        model: Optional[Union[str, BaseLlm]] = None,
+        resilient: bool = True,
+        hedging: bool = True,
+        deadline_s: Optional[float] = None,
+        tenants: Optional[TenantManager] = None,
+        task_index: Optional[TaskIndex] = None,
+        cassette: Optional[Cassette] = None,
+        urgency_samples: Optional[int] = None,
+        exemplar_index: Optional[ExemplarIndex] = None,
+        pool: Optional[PipelinePool] = None,
+        profiler: Optional[Profiler] = None,
+        policy: Optional[AgentPolicy] = None,
+        language_prompts: bool = True,
+        translator: Optional[Translator] = None,
+        translations: Optional[TranslationCache] = None
+    ):
+        """Initialize the Inbox Assistant with ADK services.
+
+        If a ``dedup_index`` is given, near-duplicates of previously analyzed
+        messages reuse the stored analysis and only regenerate the reply.
+        ``routing`` and ``model`` select agent models as in
+        create_inbox_assistant_pipeline; call statistics go to ``self.stats``.
+
+        Static agent instructions are cached provider-side through ADK's
+        context cache; ``self.prompt_cache`` accounts for them when the
+        backend reports no usage metadata.
+
+        With ``resilient`` set each agent gets a circuit breaker in
+        ``self.breakers``; while its model fails, the agent's fields come
+        from heuristics and are listed under ``degraded`` in the result.
+
+        With ``hedging`` set, a model call slower than the agent's recent
+        p95 is duplicated. Each message must finish within ``deadline_s``
+        (MESSAGE_DEADLINE_S by default); agents still running then are
+        listed under ``incomplete`` and the partial result is returned.
+
+        With ``tenants``, each ``user_id`` is a tenant: messages are admitted
+        through its quotas and fair-share scheduling, and near-duplicates
+        are looked up in the tenant's own index instead of ``dedup_index``.
+        Accepted replies likewise go to a per-tenant exemplar index with
+        ``exemplar_index``'s settings; entries in ``exemplar_index`` itself
+        are not shown to any tenant.
+
+        With a ``task_index``, every result's action items are merged into
+        it, owned by ``user_id`` and threaded by the caller's ``session_id``.
+
+        With a ``cassette`` every model call is recorded to or replayed from
+        it; a replay runs offline. Pass a fixed ``received_at`` to
+        process_message when replaying messages with deadlines, since the
+        resolved dates are part of the prompt.
+
+        ``urgency_samples`` above one classifies urgency by majority vote
+        over up to that many samples (URGENCY_SAMPLES by default).
+
+        With an ``exemplar_index``, replies accepted for similar past
+        messages are shown to the reply generator, and a near-identical
+        match's reply is reused without running it. Add accepted replies
+        with record_reply.
+
+        With a ``pool``, agents, runners and services are borrowed from the
+        pool's pipeline for these settings instead of being built here; see
+        PipelinePool.
+
+        With a ``profiler``, a sample of messages is profiled stage by stage
+        (language detection, session calls, the ADK run, result building);
+        see profiling.Profiler.
+
+        With a ``policy``, each message runs only the agents its class
+        needs; reduced pipelines are built once per agent subset. Skipped
+        agents are listed under ``skipped`` and counted in ``self.stats``.
+
+        With ``language_prompts``, agents get instructions that name the
+        output language of the detected language (prompts.LANGUAGE_NAMES;
+        other languages get the generic instructions); English is the
+        default pipeline and other variants get their own pipelines, built
+        on first use. With a ``translator`` those instructions are also
+        translated into the message language, once per language, through
+        ``translations``. Per-language message latency and token use are
+        reported under ``languages`` in ``self.stats.snapshot()``.
+        """
+        self.routing = routing
+        self.model = model
+        self.stats = PipelineStats()
+        self.dedup_index = dedup_index
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        if resilient:
+            from resilience import CircuitBreaker
+            self.breakers = {key: CircuitBreaker() for key in AGENT_FACTORIES}
+        self.latency_trackers: Dict[str, LatencyTracker] = {}
+        if hedging:
+            from resilience import LatencyTracker
+            self.latency_trackers = {key: LatencyTracker() for key in AGENT_FACTORIES}
+        self.deadline_s = deadline_s
+        self.tenants = tenants
+        self.task_index = task_index
+        self.cassette = cassette
+        self.urgency_samples = urgency_samples
+        self.exemplar_index = exemplar_index
+        self.profiler = profiler
+        self.policy = policy
+        self.language_prompts = language_prompts
+        # Instruction variant of the default pipeline.
+        self.prompt_language = "en" if language_prompts else None
+        self.translator = translator
+        if translator is not None and translations is None:
+            from translation import TranslationCache
+            translations = TranslationCache()
+        self.translations = translations
+        self._instructions: Dict[Optional[str], Dict[str, str]] = {}
+        self._translation_locks: Dict[str, asyncio.Lock] = {}
+        self._prompt_cache = None
+        self._pipeline = None
+        self._session_service = None
+        self._memory_service = None
+        self._runner = None
+        self._reply_runner = None
+        self._subset_runners: Dict[Tuple[Any, ...], Runner] = {}
+        if pool is not None:
+            pool.attach(self)
+
+    @property
+    def prompt_cache(self) -> LocalPromptCache:
+        """Local prompt prefix cache, created on first use."""
+        if self._prompt_cache is None:
+            from prompt_cache import LocalPromptCache
+            self._prompt_cache = LocalPromptCache()
+        return self._prompt_cache
+
+    @property
+    def pipeline(self) -> SequentialAgent:
+        """The five-agent pipeline, built on first use."""
+        if self._pipeline is None:
+            self._pipeline = create_inbox_assistant_pipeline(
+                stats=self.stats,
+                routing=self.routing,
+                model=self.model,
+                prompt_cache=self.prompt_cache,
+                breakers=self.breakers,
+                latency_trackers=self.latency_trackers,
+                cassette=self.cassette,
+                urgency_samples=self.urgency_samples,
+                instructions=self.instructions(self.prompt_language)
+            )
+        return self._pipeline
+
+    @property
+    def session_service(self):
+        """ADK session service, created on first use."""
+        if self._session_service is None:
+            from google.adk.sessions import InMemorySessionService
+            self._session_service = InMemorySessionService()
+        return self._session_service
+
+    @property
+    def memory_service(self):
+        """ADK memory service, created on first use."""
+        if self._memory_service is None:
+            from google.adk.memory import InMemoryMemoryService
+            self._memory_service = InMemoryMemoryService()
+        return self._memory_service
+
+    @property
+    def runner(self) -> Runner:
+        """Runner for the full pipeline, built on first use."""
+        if self._runner is None:
+            self._runner = self._create_runner(self.pipeline)
+        return self._runner
+
+    def warmup(self) -> "InboxAssistant":
+        """Import the SDKs and build agents and runners ahead of traffic.
+
+        Also loads the language detection profiles, which langdetect
+        otherwise reads on the first detection.
+        """
+        self.runner
+        self.reply_runner
+        if self.exemplar_index is not None:
+            self.analysis_runner
+        detect_language("warmup")
+        return self
+
+    def _create_runner(self, agent: BaseAgent) -> Runner:
+        """Create a runner for an agent tree with context caching enabled."""
+        from google.adk.apps import App
+        from google.adk.runners import Runner
+        from prompt_cache import context_cache_config
+
+        return Runner(
+            app=App(
+                name=APP_NAME,
+                root_agent=agent,
+                context_cache_config=context_cache_config()
+            ),
             session_service=self.session_service,
             memory_service=self.memory_service
         )
 
-    async def process_message(
-        self, 
-        message: str, 
-        user_id: str = DEFAULT_USER_ID,
-        session_id: Optional[str] = None
-    ) -> Dict[str, Any]:
-        """Process a message through the multi-agent pipeline."""
-        language = detect_language(message)
+    @property
+    def reply_runner(self) -> Runner:
+        """Runner for the reply generator alone, built on first use."""
+        if self._reply_runner is None:
+            from models import build_agent_model
+            self._reply_runner = self._create_runner(
+                create_reply_generator_agent(build_agent_model(
+                    "reply_generator",
+                    stats=self.stats,
+                    routing=self.routing,
+                    model=self.model,
+                    prompt_cache=self.prompt_cache,
+                    breaker=self.breakers.get("reply_generator"),
+                    latency=self.latency_trackers.get("reply_generator"),
+                    cassette=self.cassette
+                ), self.instructions(self.prompt_language)["reply_generator"])
+            )
+        return self._reply_runner
+
+    def subset_runner(
+        self,
+        agent_keys: Tuple[str, ...],
+        gated_keys: Tuple[str, ...] = (),
+        run_if: Optional[Callable[[Optional[str]], bool]] = None,
+        *,
+        language: Optional[str]
+    ) -> Runner:
+        """Runner for a reduced pipeline, built once per agent subset and prompt language.
+
+        ``language`` is the instruction variant (prompts.prompt_language),
+        None for the generic instructions.
+        """
+        if (
+            agent_keys == tuple(AGENT_FACTORIES) and not gated_keys
+            and language == self.prompt_language
+        ):
+            return self.runner
+        key = (agent_keys, gated_keys, run_if if gated_keys else None, language)
+        runner = self._subset_runners.get(key)
+        if runner is None:
+            runner = self._create_runner(create_inbox_assistant_pipeline(
+                stats=self.stats,
+                routing=self.routing,
+                model=self.model,
+                prompt_cache=self.prompt_cache,
+                breakers=self.breakers,
+                latency_trackers=self.latency_trackers,
+                cassette=self.cassette,
+                urgency_samples=self.urgency_samples,
+                agent_keys=agent_keys,
+                gated_keys=gated_keys,
+                run_if=run_if,
+                instructions=self.instructions(language)
+            ))
+            self._subset_runners[key] = runner
+        return runner
+
+    @property
+    def analysis_runner(self) -> Runner:
+        """Runner for every agent but the reply generator, built on first use."""
+        return self.subset_runner(
+            tuple(key for key in AGENT_FACTORIES if key != "reply_generator"),
+            language=self.prompt_language
+        )
 
+    def instructions(self, language: Optional[str]) -> Dict[str, str]:
+        """Agent instructions for a prompt language, translated if they have been."""
+        return self._instructions.get(language) or instructions_for(language)
+
+    async def _translate_instructions(self, language: Optional[str]):
+        """Translate a language's instructions before its first pipeline is built."""
+        if self.translator is None or language in (None, "en") or language in self._instructions:
+            return
+        from translation import translated_instructions
+
+        lock = self._translation_locks.setdefault(language, asyncio.Lock())
+        async with lock:
+            if language not in self._instructions:
+                self._instructions[language] = await translated_instructions(
+                    language, self.translator, self.translations
+                )
+
+    def exemplars_for(self, user_id: str) -> Optional[ExemplarIndex]:
+        """The exemplar index serving a user: the tenant's own when tenants are managed."""
+        if self.exemplar_index is None or self.tenants is None:
+            return self.exemplar_index
+        return self.tenants.exemplar_index(user_id, self.exemplar_index)
+
+    def record_reply(
+        self,
+        message: str,
+        reply: str,
+        reply_tone: Optional[str] = None,
+        user_id: str = DEFAULT_USER_ID
+    ):
+        """Add the reply a user accepted for a message to their exemplar index."""
+        if self.exemplar_index is None:
+            raise ValueError("InboxAssistant has no exemplar_index")
+        self.exemplars_for(user_id).add(message, reply, reply_tone)
+
+    async def _iter_outputs(
+        self,
+        runner: Runner,
+        user_content: Content,
+        user_id: str,
+        session_id: str
+    ) -> AsyncIterator[Tuple[str, BaseModel, bool]]:
+        """Run an agent tree and yield each agent's typed output as it finishes.
+
+        ADK validates responses against the agent's output schema before
+        writing them to the state delta, so they are not parsed again here.
+        The flag tells whether the output came from degraded-mode heuristics.
+        """
+        from schemas import AGENT_SCHEMAS
+
+        async for event in runner.run_async(
+            user_id=user_id,
+            session_id=session_id,
+            new_message=user_content
+        ):
+            agent_key = agent_keys_by_name().get(event.author)
+            if agent_key and event.is_final_response():
+                output_key = config.AGENTS_CONFIG[agent_key]["output_key"]
+                value = event.actions.state_delta.get(output_key)
+                if value is not None:
+                    degraded = bool((event.custom_metadata or {}).get("degraded"))
+                    yield agent_key, AGENT_SCHEMAS[agent_key].model_construct(**value), degraded
+
+    async def stream_message(
+        self,
+        message: str,
+        user_id: str = DEFAULT_USER_ID,
+        session_id: Optional[str] = None,
+        compact: bool = False,
+        deadline_s: Optional[float] = None,
+        received_at: Optional[datetime] = None,
+        language: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Process a message, yielding ``(agent_key, fields)`` as each agent finishes.
+
+        The last item is ``("result", result)`` with the same value that
+        process_message returns. For a near-duplicate only the reply
+        generator runs, after a ``("near_duplicate", reused_fields)`` item.
+        A reply reused from the exemplar index is yielded as
+        ``("reused_reply", fields)`` and the reply generator does not run.
+        Outputs filled in by heuristics carry ``degraded: True``.
+
+        Deadlines in the message are resolved locally against
+        ``received_at`` (now by default) and shown to the agents; the result
+        then carries ``deadlines``, the earliest ``due`` and the
+        ``urgency_signal`` they imply.
+
+        Pass ``language`` when it is already known to skip detection.
+        Without a ``session_id`` the message runs in a temporary session
+        that is deleted once its agents have finished.
+        """
+        stream = self._stream_message if self.profiler is None else self._profiled_stream
+        if self.tenants is None:
+            async for item in stream(
+                message, user_id, session_id, compact, deadline_s, received_at,
+                self.dedup_index, self.exemplar_index, language
+            ):
+                yield item
+            return
+
+        from prompt_cache import estimate_tokens
+
+        tokens = estimate_tokens(message) * len(AGENT_FACTORIES)
+        async with self.tenants.admit(user_id, tokens=tokens):
+            async for item in stream(
+                message, user_id, session_id, compact, deadline_s, received_at,
+                self.tenants.dedup_index(user_id), self.exemplars_for(user_id), language
+            ):
+                yield item
+
+    async def _profiled_stream(self, *args: Any) -> AsyncIterator[Tuple[str, Any]]:
+        """Run _stream_message as one profiler message, if it is sampled."""
+        for method in ("create_session", "get_session", "append_event", "delete_session"):
+            self.profiler.instrument(self.session_service, method, f"session.{method}")
+        with self.profiler.message():
+            async for item in self._stream_message(*args):
+                yield item
+
+    async def _stream_message(
+        self,
+        message: str,
+        user_id: str,
+        session_id: Optional[str],
+        compact: bool,
+        deadline_s: Optional[float],
+        received_at: Optional[datetime],
+        dedup_index: Optional[NearDuplicateIndex],
+        exemplar_index: Optional[ExemplarIndex],
+        language: Optional[str]
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        from google.genai.types import Content, Part
+
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        if deadline_s is None:
+            deadline_s = self.deadline_s or config.MESSAGE_DEADLINE_S
+        deadline = loop.time() + deadline_s
+
+        self.stats.record_message()
+        if language is None:
+            with span("detect_language"):
+                language = detect_language(message)
+        variant = prompt_language(language) if self.language_prompts else None
+        await self._translate_instructions(variant)
+        received_at = received_at or datetime.now()
+        with span("temporal"):
+            deadlines = temporal.extract(message, received_at)
+            context = [Part(text=temporal.describe(deadlines, received_at))] if deadlines else []
+
+        with span("dedup"):
+            match = dedup_index.query(message) if dedup_index else None
+        with span("exemplars"):
+            exemplars = exemplar_index.search(message) if exemplar_index else []
+        reused = exemplar_index.reusable(exemplars) if exemplars else None
+        if exemplars and reused is None:
+            from exemplars import exemplar_prompt
+            context.append(Part(text=exemplar_prompt(exemplars)))
+
+        selection = self.policy.select(message) if self.policy is not None else None
+        if selection is None:
+            agents, conditional = tuple(AGENT_FACTORIES), ()
+        else:
+            agents, conditional = selection.agents, selection.conditional
+        if reused is not None:
+            agents = tuple(key for key in agents if key != "reply_generator")
+            conditional = tuple(key for key in conditional if key != "reply_generator")
+        # Agents the policy leaves out; replies already reused are not counted.
+        skipped = [
+            key for key in AGENT_FACTORIES
+            if key not in agents and (reused is None or key != "reply_generator")
+        ]
+
+        if match is not None:
+            analysis, score = match
+            user_content = Content(
+                parts=[
+                    Part(text=message),
+                    *context,
+                    Part(text=f"Message analysis: {json.dumps(analysis)}")
+                ],
+                role="user"
+            )
+            fields = dict(analysis)
+            reply = "reply_generator" in agents and (
+                "reply_generator" not in conditional
+                or self.policy.run_if(fields.get("urgency"))
+            )
+            if not reply:
+                runner = None
+            elif variant == self.prompt_language:
+                runner = self.reply_runner
+            else:
+                runner = self.subset_runner(("reply_generator",), language=variant)
+            expected = ["reply_generator"] if reply else []
+            skipped = ["reply_generator"] if selection and reused is None and not reply else []
+            yield "near_duplicate", dict(analysis, near_duplicate_similarity=score)
+        else:
+            user_content = Content(
+                parts=[Part(text=message), *context],
+                role="user"
+            )
+            fields = {}
+            runner = self.subset_runner(
+                agents, conditional, self.policy.run_if if conditional else None,
+                language=variant
+            )
+            expected = list(agents)
+
+        if reused is not None:
+            reply_fields = {"draft_reply": reused.reply}
+            if reused.reply_tone:
+                reply_fields["reply_tone"] = reused.reply_tone
+            fields.update(reply_fields)
+            yield "reused_reply", dict(reply_fields, reused_reply_similarity=reused.similarity)
+
+        # The ADK run stays in one task so its tracing context is intact; the
+        # deadline applies to waiting on the queue and cancels that task.
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def pump():
+            # Runs in its own task, so these only apply to this message's calls.
+            message_language.set(language)
+            temporal.message_received_at.set(received_at)
+            try:
+                if runner is None:
+                    return
+                with span("runner"):
+                    async for item in self._iter_outputs(
+                        runner, user_content, user_id, session_id
+                    ):
+                        queue.put_nowait(item)
+            except Exception as e:
+                queue.put_nowait(e)
+            finally:
+                queue.put_nowait(None)
+
+        # Sessions the caller did not name only live for this run.
+        thread_id = session_id
         if session_id is None:
-            session_id = f"session_{asyncio.get_event_loop().time()}"
-
+            session_id = f"session_{uuid.uuid4().hex}"
         try:
             await self.session_service.create_session(
                 app_name=APP_NAME,
@@ -238,45 +748,213 @@ class InboxAssistant:
         except Exception:
             pass
 
-        user_content = Content(
-            parts=[Part(text=message)],
-            role="user"
-        )
+        degraded = {}
+        finished = set()
+        pump_task = asyncio.ensure_future(pump())
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), max(deadline - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                agent_key, output, is_degraded = item
+                finished.add(agent_key)
+                fields.update(output.__dict__)
+                if is_degraded:
+                    degraded.update(dict.fromkeys(output.__dict__, True))
+                    yield agent_key, dict(output.__dict__, degraded=True)
+                else:
+                    yield agent_key, dict(output.__dict__)
+        finally:
+            pump_task.cancel()
+            await asyncio.gather(pump_task, return_exceptions=True)
+            if thread_id is None:
+                await self.session_service.delete_session(
+                    app_name=APP_NAME, user_id=user_id, session_id=session_id
+                )
+
+        fields["language"] = language
+        if deadlines:
+            fields["deadlines"] = [expression.to_dict() for expression in deadlines]
+            fields["due"] = temporal.earliest_due(deadlines).isoformat(timespec="minutes")
+            fields["urgency_signal"] = temporal.urgency_signal(deadlines, received_at)
+        if degraded:
+            fields["degraded"] = degraded
+        if conditional and match is None and not self.policy.run_if(fields.get("urgency")):
+            skipped += [key for key in conditional if key not in finished]
+        if selection is not None:
+            fields["message_class"] = selection.message_class
+            skipped = [key for key in AGENT_FACTORIES if key in skipped]
+            for key in skipped:
+                self.stats.record_skipped(key)
+            if skipped:
+                fields["skipped"] = skipped
+        incomplete = [key for key in expected if key not in finished and key not in skipped]
+        if incomplete:
+            fields["incomplete"] = incomplete
+
+        if reused is not None:
+            fields["reused_reply_similarity"] = reused.similarity
+        elif exemplars:
+            fields["exemplars"] = len(exemplars)
+        if match is not None:
+            fields["near_duplicate_similarity"] = match[1]
+        elif dedup_index is not None and not degraded and not incomplete:
+            with span("dedup"):
+                dedup_index.add(message, fields)
+
+        with span("result"):
+            if compact:
+                output = AnalysisResult.from_dict(fields, message=message)
+            else:
+                # The legacy dict, exactly as the agents produced it.
+                output = dict(fields, original_message=message, message=message)
+        if self.task_index is not None and fields.get("action_items"):
+            with span("task_index"):
+                self.task_index.add_items(
+                    fields["action_items"],
+                    message_id=message_digest(message).hex(),
+                    thread_id=thread_id,
+                    owner=user_id,
+                    received_at=received_at
+                )
+        self.stats.record_language(language, time.perf_counter() - started)
+        yield "result", output
 
-        results = {}
-        async for event in self.runner.run_async(
+    async def process_message(
+        self, 
+        message: str, 
+        user_id: str = DEFAULT_USER_ID,
+        session_id: Optional[str] = None,
+        compact: bool = False,
+        deadline_s: Optional[float] = None,
+        received_at: Optional[datetime] = None,
+        language: Optional[str] = None
+    ) -> Union[Dict[str, Any], AnalysisResult]:
+        """Process a message through the multi-agent pipeline.
+
+        Returns the legacy result dict, or the slotted AnalysisResult record
+        when ``compact`` is set.
+        """
+        async for _, value in self.stream_message(
+            message,
             user_id=user_id,
             session_id=session_id,
-            new_message=user_content
+            compact=compact,
+            deadline_s=deadline_s,
+            received_at=received_at,
+            language=language
         ):
-            if event.is_final_response():
-                if event.content and event.content.parts:
-                    response_text = event.content.parts[0].text
-                    parsed = parse_json_response(response_text)
-                    results.update(parsed)
-
-        session = await self.session_service.get_session(
-            app_name=APP_NAME,
-            user_id=user_id,
-            session_id=session_id
-        )
-
-        if session and hasattr(session, 'state'):
-            results.update(session.state)
-
-        results["language"] = language
-        results["message"] = message
-
-        return results
+            result = value
+        return result
+
+    async def process_batch(
+        self,
+        messages: Iterable[Tuple[int, str]],
+        concurrency: int = 4,
+        ordered: bool = True,
+        user_id: str = DEFAULT_USER_ID,
+        compact: bool = False,
+        group_languages: bool = False,
+        received_at: Optional[Callable[[int], Optional[datetime]]] = None
+    ) -> AsyncIterator[BatchItem]:
+        """Process ``(index, message)`` pairs with bounded concurrency.
+
+        Messages are pulled from the iterable lazily, so it may be a stream.
+        Items are yielded in input order when ``ordered`` is set, otherwise
+        as they complete. In ordered mode at most ``4 * concurrency``
+        messages are in flight or buffered behind a slow one. A failing
+        message yields an item with ``error`` set instead of stopping the batch.
+
+        With ``group_languages``, messages are read LANGUAGE_BATCH_WINDOW at
+        a time and processed grouped by detected language, so consecutive
+        calls share the same instruction prefix; ordered output still
+        follows the input.
+
+        ``received_at``, if given, is called with a message's index for the
+        time it was received (see process_message).
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        async def run(index: int, message: str, language: Optional[str]) -> BatchItem:
+            try:
+                # Each line runs in a temporary session, deleted once it is done.
+                result = await self.process_message(
+                    message,
+                    user_id=user_id,
+                    compact=compact,
+                    received_at=received_at(index) if received_at else None,
+                    language=language
+                )
+            except Exception as e:
+                return BatchItem(index, None, e)
+            return BatchItem(index, result)
+
+        window = concurrency * 4 if ordered else concurrency
+        pending = set()
+        done_items: Dict[int, BatchItem] = {}
+        order = deque()
+        if group_languages:
+            block = config.LANGUAGE_BATCH_WINDOW
+            source = _language_groups(messages, block, order if ordered else None)
+            # Room for a whole block to wait behind its first message.
+            window = max(window, block)
+        else:
+            source = ((index, message, None) for index, message in messages)
+        exhausted = False
 
-    def process_message_sync(self, message: str, **kwargs) -> Dict[str, Any]:
+        try:
+            while True:
+                while (
+                    not exhausted
+                    and len(pending) < concurrency
+                    and len(pending) + len(done_items) < window
+                ):
+                    try:
+                        index, message, language = next(source)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    if ordered and not group_languages:
+                        order.append(index)
+                    pending.add(asyncio.ensure_future(run(index, message, language)))
+
+                if not pending:
+                    return
+
+                finished, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in finished:
+                    item = task.result()
+                    if ordered:
+                        done_items[item.index] = item
+                    else:
+                        yield item
+
+                while order and order[0] in done_items:
+                    yield done_items.pop(order.popleft())
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def process_message_sync(
+        self, message: str, **kwargs
+    ) -> Union[Dict[str, Any], AnalysisResult]:
         """Synchronous wrapper for process_message."""
         return asyncio.run(self.process_message(message, **kwargs))
 
 
 def analyze_message(message: str, user_id: str = DEFAULT_USER_ID) -> Dict[str, Any]:
-    """Convenience function to analyze a message."""
-    assistant = InboxAssistant()
+    """Convenience function to analyze a message on the shared default pipeline."""
+    from pool import default_pool
+
+    assistant = InboxAssistant(pool=default_pool())
     return assistant.process_message_sync(message, user_id=user_id)
 
 
@@ -0,0 +1,145 @@
+"""
+Agent selection policy for Inbox Assistant
+Cheap message features pick which agents run; some only run when the
+urgency result calls for them
+"""
+import re
+from typing import AsyncGenerator, Callable, Dict, NamedTuple, Optional, Tuple
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+
+from config import AGENTS_CONFIG
+from keywords import scan
+from results import Urgency
+
+AUTOMATED = "automated"
+INFORMATIONAL = "informational"
+CONVERSATIONAL = "conversational"
+
+_AUTOMATED_RE = re.compile(
+    r"\b(?:no-?reply|do not reply|automated (?:message|notification|alert|email)"
+    r"|this is an automated|monitoring alert|alert:|\[alert\]|unsubscribe)",
+    re.IGNORECASE
+)
+_REQUEST_RE = re.compile(
+    r"\?|\b(?:let me know|can you|could you|would you|will you|please|need you to)\b",
+    re.IGNORECASE
+)
+_FYI_RE = re.compile(
+    r"\b(?:fyi|for your information|heads up|no action (?:needed|required))\b",
+    re.IGNORECASE
+)
+
+
+def message_class(message: str) -> str:
+    """Classify a message from keywords alone, without a model call.
+
+    Automated senders are recognized by their boilerplate. A message is
+    informational when it says so (FYI, no action needed) or has no
+    question, request, action verb, deadline or urgency keyword.
+    """
+    if _AUTOMATED_RE.search(message):
+        return AUTOMATED
+    if _FYI_RE.search(message):
+        return INFORMATIONAL
+    found = scan(message)
+    if (
+        found.action_lines or found.deadlines or found.urgency_keywords
+        or _REQUEST_RE.search(message)
+    ):
+        return CONVERSATIONAL
+    return INFORMATIONAL
+
+
+class AgentSubset(NamedTuple):
+    """Agents run for a message class: always, or only if the urgency is not Low."""
+
+    always: Tuple[str, ...]
+    unless_low: Tuple[str, ...] = ()
+
+
+ALL_AGENTS = tuple(AGENTS_CONFIG)
+
+DEFAULT_SUBSETS: Dict[str, AgentSubset] = {
+    # Alerts get a summary, a priority and the follow-up tasks, but no reply.
+    AUTOMATED: AgentSubset(("summarizer", "urgency_classifier", "next_step_planner")),
+    # FYIs are answered and planned only if the classifier finds them urgent.
+    INFORMATIONAL: AgentSubset(
+        ("summarizer", "urgency_classifier", "tone_analyzer"),
+        ("reply_generator", "next_step_planner")
+    ),
+    CONVERSATIONAL: AgentSubset(ALL_AGENTS)
+}
+
+
+class Selection(NamedTuple):
+    """Agents chosen for one message, in pipeline order."""
+
+    message_class: str
+    agents: Tuple[str, ...]
+    conditional: Tuple[str, ...]
+
+
+def needs_follow_up(urgency: Optional[str]) -> bool:
+    """Whether an urgency result warrants running the conditional agents."""
+    level = Urgency.parse(urgency)
+    return level is None or level > Urgency.LOW
+
+
+class AgentPolicy:
+    """Maps message classes to the agents that run for them.
+
+    ``classify`` assigns a class to a message (message_class by default)
+    and ``subsets`` gives each class its agents; unknown classes run every
+    agent. Conditional agents run after the urgency classifier and are
+    skipped when ``run_if`` rejects its result.
+    """
+
+    def __init__(
+        self,
+        subsets: Optional[Dict[str, AgentSubset]] = None,
+        classify: Callable[[str], str] = message_class,
+        run_if: Callable[[Optional[str]], bool] = needs_follow_up
+    ):
+        self.subsets = dict(DEFAULT_SUBSETS if subsets is None else subsets)
+        self.classify = classify
+        self.run_if = run_if
+        urgency_position = ALL_AGENTS.index("urgency_classifier")
+        for name, subset in self.subsets.items():
+            unknown = set(subset.always + subset.unless_low) - set(ALL_AGENTS)
+            if unknown:
+                raise ValueError(f"unknown agents for {name}: {sorted(unknown)}")
+            if subset.unless_low and (
+                "urgency_classifier" not in subset.always
+                or min(ALL_AGENTS.index(key) for key in subset.unless_low) < urgency_position
+            ):
+                raise ValueError(
+                    f"conditional agents for {name} must follow the urgency classifier"
+                )
+
+    def select(self, message: str) -> Selection:
+        """Choose the agents for a message."""
+        name = self.classify(message)
+        subset = self.subsets.get(name, AgentSubset(ALL_AGENTS))
+        chosen = set(subset.always) | set(subset.unless_low)
+        return Selection(
+            name,
+            tuple(key for key in ALL_AGENTS if key in chosen),
+            tuple(key for key in ALL_AGENTS if key in subset.unless_low)
+        )
+
+
+class GatedAgent(BaseAgent):
+    """Runs its single sub-agent only if ``run_if`` accepts the urgency so far."""
+
+    run_if: Callable[[Optional[str]], bool]
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        urgency = ctx.session.state.get(AGENTS_CONFIG["urgency_classifier"]["output_key"])
+        label = urgency.get("urgency") if isinstance(urgency, dict) else urgency
+        if not self.run_if(label):
+            return
+        async for event in self.sub_agents[0].run_async(ctx):
+            yield event
@@ -0,0 +1,700 @@
+"""
+Compressed archive for analyzed mail
+Columnar result segments with a time index, and message bodies stored once
+per distinct content
+"""
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime
+from typing import (
+    Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+)
+
+import config
+from results import (
+    AnalysisResult, Formality, Sentiment, Urgency, decode_tone_order, decode_tones,
+    message_digest
+)
+
+try:
+    import zstandard
+except ImportError:  # zlib archives need nothing beyond the standard library
+    zstandard = None
+
+ZSTD = "zstd"
+ZLIB = "zlib"
+CODECS = (ZSTD, ZLIB)
+
+SEGMENT_MAGIC = b"IASEG\x01"
+INDEX_FILE = "index.json"
+BLOB_PACK = "blobs.pack"
+BLOB_INDEX = "blobs.idx"
+
+# Column name -> encoding, in the order columns are laid out in a segment.
+#   d: float64   b: int8, -1 for None   h: int16, -1 for None
+#   x: 16-byte digest   k: dictionary-coded string   s: string   j: JSON value
+COLUMNS: Dict[str, str] = {
+    "received_at": "d",
+    "message_hash": "x",
+    "language": "k",
+    "urgency": "b",
+    "formality": "b",
+    "sentiment": "b",
+    "tone_mask": "h",
+    "tone_order": "h",
+    "reply_tone": "k",
+    "summary": "s",
+    "reasoning": "s",
+    "draft_reply": "s",
+    "action_items": "j",
+    "extra": "j"
+}
+
+_ENUMS = {"urgency": Urgency, "formality": Formality, "sentiment": Sentiment}
+_BLOB_RECORD = struct.Struct("<16sQIIII")
+_NO_CODE = 0xFFFF
+
+Timestamp = Union[datetime, float, None]
+
+
+def default_codec() -> str:
+    """zstd when the zstandard package is installed, zlib otherwise."""
+    return ZSTD if zstandard is not None else ZLIB
+
+
+def _zstd():
+    if zstandard is None:
+        raise RuntimeError("this archive is zstd-compressed; install zstandard to read it")
+    return zstandard
+
+
+def compress(data: bytes, codec: str, level: Optional[int] = None) -> bytes:
+    if codec == ZSTD:
+        level = config.ARCHIVE_ZSTD_LEVEL if level is None else level
+        return _zstd().ZstdCompressor(level=level).compress(data)
+    if codec == ZLIB:
+        return zlib.compress(data, 6 if level is None else level)
+    raise ValueError(f"codec must be one of {CODECS}")
+
+
+def decompress(data: bytes, codec: str, size: int) -> bytes:
+    if codec == ZSTD:
+        return _zstd().ZstdDecompressor().decompress(data, max_output_size=size)
+    if codec == ZLIB:
+        return zlib.decompress(data, bufsize=max(size, 1))
+    raise ValueError(f"codec must be one of {CODECS}")
+
+
+def _timestamp(value: Timestamp) -> Optional[float]:
+    return value.timestamp() if isinstance(value, datetime) else value
+
+
+def _packed(typecode: str, values: Iterable[Any]) -> bytes:
+    """Little-endian bytes of an array, whatever the host byte order."""
+    packed = array(typecode, values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpacked(typecode: str, data: bytes) -> array:
+    unpacked = array(typecode)
+    unpacked.frombytes(data)
+    if sys.byteorder == "big":
+        unpacked.byteswap()
+    return unpacked
+
+
+def _encode_strings(values: Sequence[Optional[str]]) -> bytes:
+    encoded = [None if value is None else value.encode("utf-8") for value in values]
+    lengths = _packed("i", (-1 if value is None else len(value) for value in encoded))
+    return lengths + b"".join(value for value in encoded if value)
+
+
+def _decode_strings(data: bytes, rows: int) -> List[Optional[str]]:
+    lengths = _unpacked("i", data[:rows * 4])
+    values, position = [], rows * 4
+    for length in lengths:
+        if length < 0:
+            values.append(None)
+            continue
+        values.append(data[position:position + length].decode("utf-8"))
+        position += length
+    return values
+
+
+def encode_column(kind: str, values: Sequence[Any]) -> bytes:
+    """Serialize one column of a segment before compression."""
+    if kind == "d":
+        return _packed("d", values)
+    if kind in "bh":
+        return _packed(kind, (-1 if value is None else int(value) for value in values))
+    if kind == "x":
+        return b"".join(values)
+    if kind == "k":
+        codes: Dict[str, int] = {}
+        for value in values:
+            if value is not None and value not in codes:
+                codes[value] = len(codes)
+        if len(codes) >= _NO_CODE:
+            raise ValueError("too many distinct values for a dictionary column")
+        packed = _packed("H", (_NO_CODE if value is None else codes[value] for value in values))
+        return packed + json.dumps(list(codes), ensure_ascii=False).encode("utf-8")
+    if kind == "s":
+        return _encode_strings(values)
+    if kind == "j":
+        return _encode_strings([
+            None if value is None
+            else json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+            for value in values
+        ])
+    raise ValueError(f"unknown column kind {kind!r}")
+
+
+def decode_column(kind: str, data: bytes, rows: int) -> List[Any]:
+    """Inverse of encode_column."""
+    if kind == "d":
+        return _unpacked("d", data).tolist()
+    if kind in "bh":
+        return [None if value < 0 else value for value in _unpacked(kind, data)]
+    if kind == "x":
+        return [bytes(data[i * 16:(i + 1) * 16]) for i in range(rows)]
+    if kind == "k":
+        labels = json.loads(bytes(data[rows * 2:]).decode("utf-8"))
+        return [
+            None if code == _NO_CODE else labels[code]
+            for code in _unpacked("H", data[:rows * 2])
+        ]
+    if kind == "s":
+        return _decode_strings(data, rows)
+    if kind == "j":
+        return [None if value is None else json.loads(value)
+                for value in _decode_strings(data, rows)]
+    raise ValueError(f"unknown column kind {kind!r}")
+
+
+class SegmentInfo(NamedTuple):
+    """Index entry for one segment: its file, row count and time range."""
+
+    file: str
+    rows: int
+    start: float
+    end: float
+    size: int
+    raw_size: int
+
+
+class Segment:
+    """A segment file, memory-mapped; columns are decompressed on request.
+
+    Layout: SEGMENT_MAGIC, a little-endian uint32 header length, a JSON
+    header (codec, rows, time range, and offset, compressed and raw size
+    of each column) and the compressed columns.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(SEGMENT_MAGIC)] != SEGMENT_MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not an archive segment")
+        start = len(SEGMENT_MAGIC) + 4
+        (header_size,) = struct.unpack_from("<I", self._map, len(SEGMENT_MAGIC))
+        self.header = json.loads(self._map[start:start + header_size].decode("utf-8"))
+        self._data_start = start + header_size
+        self.codec = self.header["codec"]
+        self.rows = self.header["rows"]
+
+    def column(self, name: str) -> List[Any]:
+        """Decompress and decode a single column; all None if the segment predates it."""
+        if name not in self.header["columns"]:
+            return [None] * self.rows
+        offset, size, raw_size = self.header["columns"][name]
+        offset += self._data_start
+        with memoryview(self._map) as view:
+            raw = decompress(view[offset:offset + size], self.codec, raw_size)
+        return decode_column(COLUMNS[name], raw, self.rows)
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self) -> "Segment":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_segment(
+    path: str, columns: Dict[str, Sequence[Any]], codec: str, level: Optional[int] = None
+) -> SegmentInfo:
+    """Write rows given as equal-length columns, in COLUMNS order."""
+    rows = len(columns["received_at"])
+    blocks, layout, offset, raw_total = [], {}, 0, 0
+    for name, kind in COLUMNS.items():
+        raw = encode_column(kind, columns[name])
+        block = compress(raw, codec, level)
+        layout[name] = [offset, len(block), len(raw)]
+        blocks.append(block)
+        offset += len(block)
+        raw_total += len(raw)
+    times = columns["received_at"]
+    header = json.dumps({
+        "codec": codec,
+        "rows": rows,
+        "start": min(times),
+        "end": max(times),
+        "columns": layout
+    }).encode("utf-8")
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(SEGMENT_MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for block in blocks:
+            f.write(block)
+        size = f.tell()
+    os.replace(temporary, path)
+    return SegmentInfo(os.path.basename(path), rows, min(times), max(times), size, raw_total)
+
+
+class BlobStore:
+    """Message bodies addressed by their 128-bit digest, each stored once.
+
+    New bodies are gathered into chunks of about ``chunk_bytes``, so that
+    text shared between bodies compresses, and each chunk is compressed
+    and appended to a pack file. An index file of fixed-size records maps
+    digests to a chunk and a slice of it. Reads go through a memory map of
+    the pack; ``get_many`` decompresses each chunk once per call.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        codec: str,
+        level: Optional[int] = None,
+        chunk_bytes: Optional[int] = None
+    ):
+        self.pack_path = os.path.join(directory, BLOB_PACK)
+        self.index_path = os.path.join(directory, BLOB_INDEX)
+        self.codec = codec
+        self.level = level
+        self.chunk_bytes = chunk_bytes or config.ARCHIVE_BLOB_CHUNK_BYTES
+        self.duplicates = 0
+        self.duplicate_bytes = 0
+        # digest -> (chunk offset, chunk size, chunk raw size, start, length)
+        self._entries: Dict[bytes, Tuple[int, int, int, int, int]] = {}
+        self._pending = bytearray()
+        self._pending_entries: Dict[bytes, Tuple[int, int]] = {}
+        self._pack = None
+        self._index = None
+        self._map: Optional[mmap.mmap] = None
+        self._chunk: Tuple[int, bytes] = (-1, b"")
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as f:
+                for digest, *entry in _BLOB_RECORD.iter_unpack(f.read()):
+                    self._entries[digest] = tuple(entry)
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._pending_entries)
+
+    def __contains__(self, digest: bytes) -> bool:
+        return digest in self._entries or digest in self._pending_entries
+
+    def put(self, message: str, digest: Optional[bytes] = None) -> bytes:
+        """Store a message body unless it is already stored; returns its digest."""
+        digest = digest or message_digest(message)
+        raw = message.encode("utf-8")
+        if digest in self:
+            self.duplicates += 1
+            self.duplicate_bytes += len(raw)
+            return digest
+        self._pending_entries[digest] = (len(self._pending), len(raw))
+        self._pending += raw
+        if len(self._pending) >= self.chunk_bytes:
+            self._seal()
+        return digest
+
+    def _seal(self):
+        """Compress the pending chunk and append it to the pack."""
+        if not self._pending:
+            return
+        if self._pack is None:
+            self._pack = open(self.pack_path, "ab")
+            self._index = open(self.index_path, "ab")
+        block = compress(bytes(self._pending), self.codec, self.level)
+        offset = self._pack.seek(0, os.SEEK_END)
+        self._pack.write(block)
+        for digest, (start, length) in self._pending_entries.items():
+            entry = (offset, len(block), len(self._pending), start, length)
+            self._index.write(_BLOB_RECORD.pack(digest, *entry))
+            self._entries[digest] = entry
+        self._pending = bytearray()
+        self._pending_entries = {}
+
+    def _read_chunk(self, offset: int, size: int, raw_size: int) -> bytes:
+        if self._chunk[0] == offset:
+            return self._chunk[1]
+        if self._map is None or offset + size > len(self._map):
+            if self._pack is not None:
+                self._pack.flush()
+            if self._map is not None:
+                self._map.close()
+            with open(self.pack_path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with memoryview(self._map) as view:
+            chunk = decompress(view[offset:offset + size], self.codec, raw_size)
+        self._chunk = (offset, chunk)
+        return chunk
+
+    def get(self, digest: bytes) -> Optional[str]:
+        """The message body with this digest, or None if it was not stored."""
+        return self.get_many([digest])[0]
+
+    def get_many(self, digests: Sequence[bytes]) -> List[Optional[str]]:
+        """Bodies for several digests, decompressing each chunk they touch once."""
+        bodies: List[Optional[str]] = [None] * len(digests)
+        by_chunk: Dict[Tuple[int, int, int], List[Tuple[int, int, int]]] = {}
+        for position, digest in enumerate(digests):
+            entry = self._entries.get(digest)
+            if entry is not None:
+                by_chunk.setdefault(entry[:3], []).append((position, entry[3], entry[4]))
+                continue
+            pending = self._pending_entries.get(digest)
+            if pending is not None:
+                start, length = pending
+                bodies[position] = self._pending[start:start + length].decode("utf-8")
+        for chunk_entry, slices in by_chunk.items():
+            chunk = self._read_chunk(*chunk_entry)
+            for position, start, length in slices:
+                bodies[position] = chunk[start:start + length].decode("utf-8")
+        return bodies
+
+    def stored_bytes(self) -> int:
+        """Compressed size of the sealed chunks."""
+        return sum({entry[0]: entry[1] for entry in self._entries.values()}.values())
+
+    def flush(self):
+        """Seal the pending chunk and write the pack and index to disk."""
+        self._seal()
+        if self._pack is not None:
+            self._pack.flush()
+            self._index.flush()
+
+    def close(self):
+        if self._pack is not None:
+            self.flush()
+            self._pack.close()
+            self._index.close()
+            self._pack = self._index = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._chunk = (-1, b"")
+
+
+def _load_index(directory: str) -> Dict[str, Any]:
+    path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(path):
+        return {"version": 1, "codec": None, "segments": []}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ArchiveWriter:
+    """Appends analyzed messages to an archive directory.
+
+    Results are buffered and written as segments of ``segment_rows`` rows,
+    sorted by receive time, each column compressed on its own. Message
+    bodies go to the blob store, so a body received many times is stored
+    once. The segment index is rewritten on flush. Reopening an existing
+    archive appends to it with the codec it was created with.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        segment_rows: Optional[int] = None,
+        codec: Optional[str] = None,
+        level: Optional[int] = None,
+        store_messages: bool = True
+    ):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.segment_rows = segment_rows or config.ARCHIVE_SEGMENT_ROWS
+        self.index = _load_index(path)
+        existing = self.index["codec"]
+        if existing is not None and codec is not None and codec != existing:
+            raise ValueError(f"archive uses {existing}; cannot append with {codec}")
+        self.codec = existing or codec or default_codec()
+        if self.codec not in CODECS:
+            raise ValueError(f"codec must be one of {CODECS}")
+        self.index["codec"] = self.codec
+        self.level = level
+        self.blobs = BlobStore(path, self.codec, level) if store_messages else None
+        self._buffer: Dict[str, List[Any]] = {name: [] for name in COLUMNS}
+
+    def __len__(self) -> int:
+        """Rows written to segments plus rows still buffered."""
+        return sum(entry["rows"] for entry in self.index["segments"]) + len(
+            self._buffer["received_at"]
+        )
+
+    def add(
+        self,
+        result: Union[AnalysisResult, Dict[str, Any]],
+        received_at: Timestamp = None,
+        message: Optional[str] = None
+    ):
+        """Archive one result, given as an AnalysisResult or a result dict."""
+        if not isinstance(result, AnalysisResult):
+            result = AnalysisResult.from_dict(result, message=message)
+        if result.message_hash is None:
+            raise ValueError("archived results need a message or message_hash")
+        message = message or result.message
+        if self.blobs is not None and message is not None:
+            self.blobs.put(message, result.message_hash)
+        row = self._buffer
+        received_at = _timestamp(received_at)
+        row["received_at"].append(
+            datetime.now().timestamp() if received_at is None else received_at
+        )
+        row["message_hash"].append(result.message_hash)
+        row["language"].append(result.language)
+        row["urgency"].append(result.urgency)
+        row["formality"].append(result.formality)
+        row["sentiment"].append(result.sentiment)
+        row["tone_mask"].append(result.tone_mask)
+        row["tone_order"].append(result.tone_order)
+        row["reply_tone"].append(result.reply_tone)
+        row["summary"].append(result.summary)
+        row["reasoning"].append(result.reasoning)
+        row["draft_reply"].append(result.draft_reply)
+        row["action_items"].append(
+            None if result.action_items is None else list(result.action_items)
+        )
+        row["extra"].append(result.extra)
+        if len(row["received_at"]) >= self.segment_rows:
+            self.flush()
+
+    def flush(self):
+        """Write buffered rows as a segment and save the indexes."""
+        buffered = self._buffer
+        if buffered["received_at"]:
+            order = sorted(range(len(buffered["received_at"])),
+                           key=buffered["received_at"].__getitem__)
+            columns = {name: [values[i] for i in order] for name, values in buffered.items()}
+            number = len(self.index["segments"])
+            info = write_segment(
+                os.path.join(self.path, f"segment-{number:06d}.seg"),
+                columns, self.codec, self.level
+            )
+            self.index["segments"].append(info._asdict())
+            self._buffer = {name: [] for name in COLUMNS}
+        if self.blobs is not None:
+            self.blobs.flush()
+        temporary = os.path.join(self.path, INDEX_FILE + ".tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=1)
+        os.replace(temporary, os.path.join(self.path, INDEX_FILE))
+
+    def close(self):
+        self.flush()
+        if self.blobs is not None:
+            self.blobs.close()
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _record_columns(block: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+    """Turn stored column values into result dict fields, a column at a time."""
+    fields = {}
+    for name, values in block.items():
+        if name == "received_at":
+            values = [datetime.fromtimestamp(value).isoformat(timespec="seconds")
+                      for value in values]
+        elif name == "message_hash":
+            values = [value.hex() for value in values]
+        elif name in _ENUMS:
+            labels = {member.value: member.label for member in _ENUMS[name]}
+            values = [labels.get(value) for value in values]
+        elif name == "tone_mask":
+            name = "tone"
+            tones: Dict[int, List[str]] = {}
+            values = [
+                None if mask is None else list(
+                    tones.get(mask) or tones.setdefault(mask, decode_tones(mask))
+                )
+                for mask in values
+            ]
+        elif name == "tone_order":
+            continue
+        fields[name] = values
+    orders = block.get("tone_order")
+    if orders is not None and "tone" in fields:
+        fields["tone"] = [
+            tone if order is None else decode_tone_order(order)
+            for tone, order in zip(fields["tone"], orders)
+        ]
+    return fields
+
+
+class ArchiveReader:
+    """Reads an archive segment by segment, decompressing only what is asked for.
+
+    The segment index narrows a time range to the segments that overlap
+    it; inside a segment, rows are sorted by receive time, so the range is
+    a slice. Only the requested columns are decompressed, and one segment
+    is held in memory at a time.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index = _load_index(path)
+        self.codec = self.index["codec"] or default_codec()
+        self.segment_infos = sorted(
+            (SegmentInfo(**entry) for entry in self.index["segments"]),
+            key=lambda info: info.start
+        )
+        self._starts = [info.start for info in self.segment_infos]
+        self.blobs = BlobStore(path, self.codec)
+
+    def __len__(self) -> int:
+        return sum(info.rows for info in self.segment_infos)
+
+    def segments(self, start: Timestamp = None, end: Timestamp = None) -> List[SegmentInfo]:
+        """Segments holding messages received in ``[start, end)``."""
+        start, end = _timestamp(start), _timestamp(end)
+        last = len(self.segment_infos) if end is None else bisect.bisect_left(self._starts, end)
+        return [
+            info for info in self.segment_infos[:last]
+            if start is None or info.end >= start
+        ]
+
+    def scan(
+        self,
+        columns: Optional[Iterable[str]] = None,
+        start: Timestamp = None,
+        end: Timestamp = None
+    ) -> Iterator[Dict[str, List[Any]]]:
+        """Yield each matching segment as a dict of column lists.
+
+        Values are as stored: enum columns hold Urgency, Formality and
+        Sentiment values, and tones a TONE_CATEGORIES bitmask. Dashboards
+        that aggregate a few fields read only those columns.
+        """
+        columns = list(COLUMNS if columns is None else columns)
+        unknown = set(columns) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"unknown columns: {sorted(unknown)}")
+        start, end = _timestamp(start), _timestamp(end)
+        for info in self.segments(start, end):
+            with Segment(os.path.join(self.path, info.file)) as segment:
+                first, last = 0, segment.rows
+                if (start is not None and start > info.start) or (
+                    end is not None and end <= info.end
+                ):
+                    times = segment.column("received_at")
+                    if start is not None:
+                        first = bisect.bisect_left(times, start)
+                    if end is not None:
+                        last = bisect.bisect_left(times, end)
+                if first >= last:
+                    continue
+                yield {name: segment.column(name)[first:last] for name in columns}
+
+    def records(
+        self,
+        start: Timestamp = None,
+        end: Timestamp = None,
+        columns: Optional[Iterable[str]] = None,
+        messages: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream result dicts, as process_message returns them, plus receive time.
+
+        With ``messages`` each record also carries the message body.
+        """
+        columns = list(COLUMNS if columns is None else columns)
+        if messages and "message_hash" not in columns:
+            columns.append("message_hash")
+        if "tone_mask" in columns and "tone_order" not in columns:
+            columns.append("tone_order")
+        for block in self.scan(columns, start, end):
+            if messages:
+                block["message"] = self.blobs.get_many(block["message_hash"])
+            rows = len(next(iter(block.values()), ()))
+            fields = _record_columns(block)
+            extras = fields.pop("extra", None)
+            for position in range(rows):
+                record = {
+                    name: values[position]
+                    for name, values in fields.items() if values[position] is not None
+                }
+                if extras is not None and extras[position]:
+                    record.update(extras[position])
+                if messages and "message" in record:
+                    record["original_message"] = record["message"]
+                yield record
+
+    def results(
+        self, start: Timestamp = None, end: Timestamp = None, messages: bool = False
+    ) -> Iterator[Tuple[datetime, AnalysisResult]]:
+        """Stream ``(received_at, AnalysisResult)`` pairs."""
+        for block in self.scan(None, start, end):
+            bodies = self.blobs.get_many(block["message_hash"]) if messages else ()
+            for position, values in enumerate(zip(*block.values())):
+                row = dict(zip(block, values))
+                yield datetime.fromtimestamp(row["received_at"]), AnalysisResult(
+                    message=bodies[position] if messages else None,
+                    message_hash=row["message_hash"],
+                    language=row["language"],
+                    summary=row["summary"],
+                    urgency=None if row["urgency"] is None else Urgency(row["urgency"]),
+                    reasoning=row["reasoning"],
+                    tone_mask=row["tone_mask"],
+                    tone_order=row["tone_order"],
+                    formality=None if row["formality"] is None else Formality(row["formality"]),
+                    sentiment=None if row["sentiment"] is None else Sentiment(row["sentiment"]),
+                    draft_reply=row["draft_reply"],
+                    reply_tone=row["reply_tone"],
+                    action_items=(
+                        None if row["action_items"] is None else tuple(row["action_items"])
+                    ),
+                    extra=row["extra"]
+                )
+
+    def message(self, digest: Union[bytes, str]) -> Optional[str]:
+        """The stored message body for a digest (bytes or hex)."""
+        return self.blobs.get(bytes.fromhex(digest) if isinstance(digest, str) else digest)
+
+    def stats(self) -> Dict[str, Any]:
+        """Rows, segments and stored sizes of the archive."""
+        return {
+            "codec": self.codec,
+            "rows": len(self),
+            "segments": len(self.segment_infos),
+            "segment_bytes": sum(info.size for info in self.segment_infos),
+            "raw_column_bytes": sum(info.raw_size for info in self.segment_infos),
+            "messages": len(self.blobs),
+            "message_bytes": self.blobs.stored_bytes()
+        }
+
+    def close(self):
+        self.blobs.close()
+
+    def __enter__(self) -> "ArchiveReader":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,175 @@
+"""
+Record and replay of model interactions for Inbox Assistant
+Gzip-compressed cassettes of agent responses keyed by prompt hash
+"""
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from pydantic import Field
+
+from prompt_cache import instruction_text
+
+RECORD = "record"
+REPLAY = "replay"
+# Replay recorded requests and record the ones missing from the cassette.
+AUTO = "auto"
+MODES = (RECORD, REPLAY, AUTO)
+
+# Message timestamp for recorded runs. Resolved deadlines are part of the
+# prompt, so recordings only replay against the same timestamp.
+CASSETTE_TIMESTAMP = datetime(2025, 1, 6, 9, 0)
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+def request_key(llm_request: LlmRequest) -> str:
+    """Hash the parts of a request that determine the model's answer.
+
+    That is the model, the system instruction and the conversation
+    contents, plus the seed and temperature of sampled requests. Transport
+    settings such as labels or cache handles are left out, so a recording
+    replays regardless of provider-side caching.
+    """
+    config = llm_request.config
+    contents = [
+        content.model_dump(mode="json", exclude_none=True)
+        for content in llm_request.contents or ()
+    ]
+    parts = [
+        llm_request.model or "",
+        instruction_text(config.system_instruction if config else None),
+        contents
+    ]
+    if config is not None and config.seed is not None:
+        parts.append([config.seed, config.temperature])
+    payload = json.dumps(
+        parts,
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class Cassette:
+    """Recorded model responses, stored as gzipped JSON lines.
+
+    Each line holds a request key, the model that answered and the
+    responses it streamed. ``mode`` decides what CassetteLlm does on a
+    call: RECORD always calls the model and stores the answer, REPLAY only
+    serves stored answers and raises CassetteMiss otherwise, and AUTO
+    serves stored answers and records the rest.
+    """
+
+    def __init__(self, path: str, mode: str = REPLAY):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        self.path = path
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        if mode != RECORD and os.path.exists(path):
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def load(self):
+        """Read the cassette file, replacing entries held in memory."""
+        self._entries = {}
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]] = entry
+
+    def save(self):
+        """Write all entries to the cassette file, replacing it atomically."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = self.path + ".tmp"
+        with gzip.open(temporary, "wt", encoding="utf-8", compresslevel=9) as f:
+            for entry in self._entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")))
+                f.write("\n")
+        os.replace(temporary, self.path)
+
+    def lookup(self, key: str) -> Optional[List[LlmResponse]]:
+        """Return the recorded responses for a request key, if any."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return [LlmResponse.model_validate(response) for response in entry["responses"]]
+
+    def store(self, key: str, model: str, responses: List[LlmResponse]):
+        """Record the responses a model gave for a request key."""
+        self._entries[key] = {
+            "key": key,
+            "model": model,
+            "responses": [
+                response.model_dump(mode="json", exclude_none=True) for response in responses
+            ]
+        }
+        self.recorded += 1
+
+    def wrap(self, llm: BaseLlm) -> "CassetteLlm":
+        """Put a model behind this cassette."""
+        return CassetteLlm(model=llm.model, inner=llm, cassette=self)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "recorded": self.recorded
+        }
+
+    def __enter__(self) -> "Cassette":
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.mode != REPLAY and self.recorded:
+            self.save()
+
+
+class CassetteLlm(BaseLlm):
+    """Serves a model's calls from a Cassette, recording them as configured."""
+
+    inner: BaseLlm
+    cassette: Any = Field(exclude=True)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        cassette = self.cassette
+        key = request_key(llm_request)
+        responses = cassette.lookup(key) if cassette.mode != RECORD else None
+        if responses is not None:
+            cassette.hits += 1
+        else:
+            if cassette.mode != RECORD:
+                cassette.misses += 1
+            if cassette.mode == REPLAY:
+                raise CassetteMiss(f"no recorded response for {self.model} request {key}")
+            responses = [
+                response async for response in self.inner.generate_content_async(llm_request)
+            ]
+            cassette.store(key, self.model, responses)
+
+        for response in responses:
+            yield response
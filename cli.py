@@ -0,0 +1,311 @@
+"""
+Command line interface for Inbox Assistant
+Batch processing of JSONL messages for Unix pipelines and scheduled jobs
+
+    python cli.py batch messages.jsonl > results.jsonl
+    cat messages.jsonl | python cli.py batch --concurrency 8 --order completion
+    python cli.py archive mail.archive results.jsonl
+    python cli.py export mail.archive --since 2026-01-01 --until 2026-02-01
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+import rendering
+
+
+def parse_record(line: str) -> Dict[str, Any]:
+    """Parse one input line: a JSON object with ``message`` or a JSON string.
+
+    An ISO 8601 ``received_at`` in the object is parsed to a datetime.
+    """
+    record = json.loads(line)
+    if isinstance(record, str):
+        return {"message": record}
+    if not isinstance(record, dict):
+        raise ValueError("expected a JSON object or string")
+    message = record.get("message", record.get("text"))
+    if not isinstance(message, str):
+        raise ValueError("record has no 'message' string")
+    record = dict(record, message=message)
+    if "received_at" in record:
+        if not isinstance(record["received_at"], str):
+            raise ValueError("'received_at' must be an ISO 8601 string")
+        record["received_at"] = datetime.fromisoformat(record["received_at"])
+    return record
+
+
+def read_records(paths: List[str], offset: int = 0) -> Iterator[Tuple[int, str]]:
+    """Yield ``(index, line)`` for non-blank input lines, skipping the first ``offset``.
+
+    Indexes count non-blank lines across all inputs, so a run can resume
+    from the index after the last result it wrote. ``-`` reads stdin.
+    """
+    index = 0
+    for path in paths or ["-"]:
+        f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+        try:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                if index >= offset:
+                    yield index, line
+                index += 1
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+
+class Progress:
+    """Throughput reporter that writes at most once per interval."""
+
+    def __init__(self, stream: Optional[TextIO], interval_s: float = 1.0):
+        self.stream = stream
+        self.interval_s = interval_s
+        self.processed = 0
+        self.errors = 0
+        self.start = time.perf_counter()
+        self._last_report = self.start
+
+    def update(self, error: bool = False):
+        self.processed += 1
+        self.errors += error
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval_s:
+            self._last_report = now
+            self.report()
+
+    def report(self, final: bool = False):
+        if self.stream is None:
+            return
+        elapsed = time.perf_counter() - self.start
+        rate = self.processed / elapsed if elapsed else 0.0
+        label = "done" if final else "progress"
+        self.stream.write(
+            f"[{label}] {self.processed} processed, {self.errors} errors, "
+            f"{rate:.1f} msg/s, {elapsed:.1f}s elapsed\n"
+        )
+        self.stream.flush()
+
+
+async def run_batch(
+    assistant,
+    lines: Iterator[Tuple[int, str]],
+    out: TextIO,
+    concurrency: int = 4,
+    ordered: bool = True,
+    progress: Optional[Progress] = None,
+    group_languages: bool = False
+) -> Progress:
+    """Process JSONL lines and write one NDJSON result line per input.
+
+    Each output line carries the input ``index``, ``id`` (if given) and
+    ``received_at``: the record's own, which deadlines are resolved
+    against, or the time the line was read. Failed lines are written as
+    ``{"index": ..., "error": ...}``.
+    ``group_languages`` processes messages grouped by language
+    (see InboxAssistant.process_batch); output order is unchanged.
+    """
+    progress = progress or Progress(None)
+    records: Dict[int, Dict[str, Any]] = {}
+    bad_lines: List[Tuple[int, str]] = []
+
+    def messages() -> Iterator[Tuple[int, str]]:
+        for index, line in lines:
+            try:
+                record = parse_record(line)
+            except ValueError as e:
+                bad_lines.append((index, str(e)))
+                continue
+            record.setdefault("received_at", datetime.now())
+            records[index] = record
+            yield index, record["message"]
+
+    def write_error(index: int, error: str):
+        rendering.render_to({"index": index, "error": error}, out, "ndjson")
+        progress.update(error=True)
+
+    async for item in assistant.process_batch(
+        messages(), concurrency=concurrency, ordered=ordered,
+        group_languages=group_languages,
+        received_at=lambda index: records[index]["received_at"]
+    ):
+        # Unparseable lines never reach the pipeline; report them as soon
+        # as the batch has moved past them.
+        while bad_lines and (not ordered or bad_lines[0][0] < item.index):
+            write_error(*bad_lines.pop(0))
+
+        record = records.pop(item.index)
+        if item.error is not None:
+            write_error(item.index, f"{type(item.error).__name__}: {item.error}")
+            continue
+
+        output = {"index": item.index}
+        if "id" in record:
+            output["id"] = record["id"]
+        output.update(item.result)
+        output["received_at"] = record["received_at"].isoformat()
+        rendering.render_to(output, out, "ndjson")
+        progress.update()
+
+    for bad_line in bad_lines:
+        write_error(*bad_line)
+    out.flush()
+    return progress
+
+
+def write_profile(profiler, path: str):
+    """Write a profile and summarize its stages on stderr."""
+    if path.endswith(".json"):
+        profiler.write_speedscope(path)
+    else:
+        profiler.write_collapsed(path, samples=bool(profiler.sampling_interval_s))
+    profiler.close()
+    report = profiler.report()
+    print(f"profiled {report['profiled']} of {report['messages']} messages -> {path}",
+          file=sys.stderr)
+    for name, stage in sorted(report["stages"].items(), key=lambda item: -item[1]["total_ms"]):
+        print(f"  {name:<24} {stage['count']:>6}x  {stage['mean_ms']:9.3f} ms mean  "
+              f"{stage['max_ms']:9.3f} ms max", file=sys.stderr)
+
+
+def archive_results(args) -> int:
+    """Append batch result lines to an archive; ``received_at`` is read from each record."""
+    from archive import ArchiveWriter
+
+    errors = 0
+    with ArchiveWriter(args.archive, codec=args.codec) as writer:
+        for index, line in read_records(args.inputs):
+            try:
+                record = json.loads(line)
+                if "error" in record:
+                    continue
+                received_at = record.pop("received_at", None)
+                writer.add(
+                    record,
+                    received_at=datetime.fromisoformat(received_at) if received_at else None
+                )
+            except (ValueError, TypeError) as e:
+                errors += 1
+                print(f"line {index}: {e}", file=sys.stderr)
+        written = len(writer)
+    print(f"{written} results in {args.archive}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+def export_archive(args) -> int:
+    """Stream archived results in a time range as NDJSON."""
+    from archive import ArchiveReader
+
+    since = datetime.fromisoformat(args.since) if args.since else None
+    until = datetime.fromisoformat(args.until) if args.until else None
+    with ArchiveReader(args.archive) as reader:
+        columns = args.columns.split(",") if args.columns else None
+        for record in reader.records(since, until, columns=columns, messages=args.messages):
+            rendering.render_to(record, sys.stdout, "ndjson")
+    sys.stdout.flush()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="inbox-assistant", description=__doc__.split("\n")[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="Analyze JSONL messages and write JSONL results")
+    batch.add_argument("inputs", nargs="*", help="JSONL files to read ('-' or none for stdin)")
+    batch.add_argument("--concurrency", type=int, default=4, help="Messages processed at once")
+    batch.add_argument(
+        "--order", choices=("input", "completion"), default="input",
+        help="Write results in input order or as they complete"
+    )
+    batch.add_argument("--offset", type=int, default=0, help="Skip the first N input records")
+    batch.add_argument("--no-progress", action="store_true", help="Do not report progress on stderr")
+    batch.add_argument("--no-routing", action="store_true", help="Use GEMINI_MODEL for every agent")
+    batch.add_argument("--stub", action="store_true", help="Use the offline stub model (dry run)")
+    batch.add_argument(
+        "--group-languages", action="store_true",
+        help="Process messages grouped by language so prompts are shared"
+    )
+    batch.add_argument(
+        "--profile", metavar="PATH",
+        help="Profile messages and write a speedscope file (.json) or collapsed stacks"
+    )
+    batch.add_argument(
+        "--profile-rate", type=float, default=1.0, help="Share of messages to profile"
+    )
+    batch.add_argument(
+        "--profile-interval-ms", type=float, default=1.0,
+        help="Stack sampling interval; 0 records stage spans only"
+    )
+    batch.add_argument(
+        "--profile-allocations", action="store_true",
+        help="Record per-stage allocations with tracemalloc (slow)"
+    )
+
+    store = commands.add_parser("archive", help="Append JSONL results to a compressed archive")
+    store.add_argument("archive", help="Archive directory (created if missing)")
+    store.add_argument("inputs", nargs="*", help="JSONL result files ('-' or none for stdin)")
+    store.add_argument(
+        "--codec", choices=("zstd", "zlib"),
+        help="Compression for a new archive (default zstd if installed)"
+    )
+
+    export = commands.add_parser("export", help="Write archived results as JSONL")
+    export.add_argument("archive", help="Archive directory")
+    export.add_argument("--since", help="Earliest receive time (ISO 8601), inclusive")
+    export.add_argument("--until", help="Latest receive time (ISO 8601), exclusive")
+    export.add_argument("--columns", help="Comma-separated columns to read (default all)")
+    export.add_argument("--messages", action="store_true", help="Include message bodies")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "archive":
+        return archive_results(args)
+    if args.command == "export":
+        return export_archive(args)
+
+    from agent import InboxAssistant
+
+    model = None
+    if args.stub:
+        from stub_llm import StubLlm
+        model = StubLlm()
+    profiler = None
+    if args.profile:
+        from profiling import Profiler
+        profiler = Profiler(
+            sample_rate=args.profile_rate,
+            sampling_interval_s=args.profile_interval_ms / 1000 or None,
+            trace_allocations=args.profile_allocations
+        )
+    assistant = InboxAssistant(routing=not args.no_routing, model=model, profiler=profiler)
+
+    progress = Progress(None if args.no_progress else sys.stderr)
+    try:
+        asyncio.run(run_batch(
+            assistant,
+            read_records(args.inputs, offset=args.offset),
+            sys.stdout,
+            concurrency=args.concurrency,
+            ordered=args.order == "input",
+            progress=progress,
+            group_languages=args.group_languages
+        ))
+    except KeyboardInterrupt:
+        progress.report(final=True)
+        return 130
+    progress.report(final=True)
+    if profiler is not None:
+        write_profile(profiler, args.profile)
+    return 1 if progress.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,43 +2,71 @@
 Configuration settings for Inbox Assistant
 """
 import os
-from dotenv import load_dotenv
+from typing import Any, Callable, Dict
 
-load_dotenv()
+_env_loaded = False
+
+
+def load_environment():
+    """Load variables from a .env file, once.
+
+    Called on first access to an environment-derived setting rather than at
+    import time, so CLI and serverless cold starts skip it until needed.
+    """
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
 
-GEMINI_API_KEY = os.getenv("GOOGLE_API_KEY", "")
-GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
 
 APP_NAME = "inbox_assistant"
 DEFAULT_USER_ID = "user_001"
 
-AGENTS_CONFIG = {
-    "summarizer": {
-        "name": "SummarizerAgent",
-        "output_key": "summary",
-        "description": "Summarizes long messages into concise key points"
-    },
-    "urgency_classifier": {
-        "name": "UrgencyClassifierAgent", 
-        "output_key": "urgency",
-        "description": "Classifies message urgency as High, Medium, or Low"
-    },
-    "tone_analyzer": {
-        "name": "ToneAnalyzerAgent",
-        "output_key": "tone",
-        "description": "Analyzes the emotional tone and formality of messages"
-    },
-    "reply_generator": {
-        "name": "ReplyGeneratorAgent",
-        "output_key": "draft_reply",
-        "description": "Generates contextually appropriate draft replies"
-    },
-    "next_step_planner": {
-        "name": "NextStepPlannerAgent",
-        "output_key": "action_items",
-        "description": "Extracts actionable tasks and next steps"
+
+def _agents_config() -> Dict[str, Dict[str, Any]]:
+    """Per-agent settings, with models taken from the environment."""
+    return {
+        "summarizer": {
+            "name": "SummarizerAgent",
+            "output_key": "summary",
+            "description": "Summarizes long messages into concise key points",
+            "model": __getattr__("GEMINI_MODEL"),
+            "timeout_s": 20.0
+        },
+        "urgency_classifier": {
+            "name": "UrgencyClassifierAgent", 
+            "output_key": "urgency",
+            "description": "Classifies message urgency as High, Medium, or Low",
+            "model": __getattr__("CLASSIFIER_MODEL"),
+            "escalation_model": __getattr__("ESCALATION_MODEL"),
+            "timeout_s": 10.0,
+            "samples": __getattr__("URGENCY_SAMPLES")
+        },
+        "tone_analyzer": {
+            "name": "ToneAnalyzerAgent",
+            "output_key": "tone",
+            "description": "Analyzes the emotional tone and formality of messages",
+            "model": __getattr__("CLASSIFIER_MODEL"),
+            "escalation_model": __getattr__("ESCALATION_MODEL"),
+            "timeout_s": 10.0
+        },
+        "reply_generator": {
+            "name": "ReplyGeneratorAgent",
+            "output_key": "draft_reply",
+            "description": "Generates contextually appropriate draft replies",
+            "model": __getattr__("GEMINI_MODEL"),
+            "timeout_s": 30.0
+        },
+        "next_step_planner": {
+            "name": "NextStepPlannerAgent",
+            "output_key": "action_items",
+            "description": "Extracts actionable tasks and next steps",
+            "model": __getattr__("GEMINI_MODEL"),
+            "timeout_s": 20.0
+        }
     }
-}
+
 
 URGENCY_LEVELS = ["High", "Medium", "Low"]
 
@@ -48,8 +76,68 @@ TONE_CATEGORIES = [
     "Neutral", "Professional", "Casual"
 ]
 
+# Approximate USD prices per million (input, output) tokens, used to
+# estimate spend in evaluation reports.
+MODEL_COSTS = {
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-exp": (0.10, 0.40),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00)
+}
+
 EVALUATION_METRICS = {
     "summarization": ["rouge", "length_ratio"],
     "classification": ["accuracy", "precision", "recall", "f1"],
     "generation": ["relevance", "coherence"]
 }
+
+# Settings read from the environment. They resolve on first access through
+# the module __getattr__ below and are then cached as module globals.
+_ENV_SETTINGS: Dict[str, Callable[[], Any]] = {
+    "GEMINI_API_KEY": lambda: os.getenv("GOOGLE_API_KEY", ""),
+    "GEMINI_MODEL": lambda: os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp"),
+    "CLASSIFIER_MODEL": lambda: os.getenv(
+        "GEMINI_CLASSIFIER_MODEL", "gemini-2.0-flash-lite"
+    ),
+    "ESCALATION_MODEL": lambda: os.getenv(
+        "GEMINI_ESCALATION_MODEL", __getattr__("GEMINI_MODEL")
+    ),
+    "AGENTS_CONFIG": _agents_config,
+    "CONTEXT_CACHE_TTL_S": lambda: int(os.getenv("CONTEXT_CACHE_TTL_S", "1800")),
+    "CONTEXT_CACHE_INTERVALS": lambda: int(os.getenv("CONTEXT_CACHE_INTERVALS", "10")),
+    "CONTEXT_CACHE_MIN_TOKENS": lambda: int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "1024")),
+    "NEAR_DUPLICATE_THRESHOLD": lambda: float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.9")),
+    "TASK_DEDUP_THRESHOLD": lambda: float(os.getenv("TASK_DEDUP_THRESHOLD", "0.75")),
+    "EXEMPLAR_K": lambda: int(os.getenv("EXEMPLAR_K", "2")),
+    "EXEMPLAR_MIN_SIMILARITY": lambda: float(os.getenv("EXEMPLAR_MIN_SIMILARITY", "0.5")),
+    "EXEMPLAR_REUSE_THRESHOLD": lambda: float(os.getenv("EXEMPLAR_REUSE_THRESHOLD", "0.97")),
+    "EXEMPLAR_MAX_CHARS": lambda: int(os.getenv("EXEMPLAR_MAX_CHARS", "400")),
+    "ARCHIVE_SEGMENT_ROWS": lambda: int(os.getenv("ARCHIVE_SEGMENT_ROWS", "8192")),
+    "ARCHIVE_BLOB_CHUNK_BYTES": lambda: int(os.getenv("ARCHIVE_BLOB_CHUNK_BYTES", "262144")),
+    "ARCHIVE_ZSTD_LEVEL": lambda: int(os.getenv("ARCHIVE_ZSTD_LEVEL", "9")),
+    "LANGUAGE_BATCH_WINDOW": lambda: int(os.getenv("LANGUAGE_BATCH_WINDOW", "64")),
+    "URGENCY_SAMPLES": lambda: int(os.getenv("URGENCY_SAMPLES", "1")),
+    "SAMPLE_TEMPERATURE": lambda: float(os.getenv("SAMPLE_TEMPERATURE", "0.7")),
+    "SERVER_QUEUE_SIZE": lambda: int(os.getenv("SERVER_QUEUE_SIZE", "256")),
+    "SERVER_MAX_BATCH": lambda: int(os.getenv("SERVER_MAX_BATCH", "16")),
+    "SERVER_BATCH_WINDOW_MS": lambda: float(os.getenv("SERVER_BATCH_WINDOW_MS", "5")),
+    "SERVER_CONCURRENCY": lambda: int(os.getenv("SERVER_CONCURRENCY", "32")),
+    "BREAKER_FAILURE_THRESHOLD": lambda: int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5")),
+    "BREAKER_RESET_TIMEOUT_S": lambda: float(os.getenv("BREAKER_RESET_TIMEOUT_S", "30")),
+    "MESSAGE_DEADLINE_S": lambda: float(os.getenv("MESSAGE_DEADLINE_S", "60")),
+    "HEDGE_QUANTILE": lambda: float(os.getenv("HEDGE_QUANTILE", "0.95")),
+    "HEDGE_MIN_SAMPLES": lambda: int(os.getenv("HEDGE_MIN_SAMPLES", "20")),
+    "TENANT_CONCURRENCY": lambda: int(os.getenv("TENANT_CONCURRENCY", "16")),
+    "TENANT_REQUESTS_PER_MINUTE": lambda: float(os.getenv("TENANT_REQUESTS_PER_MINUTE", "0")),
+    "TENANT_TOKENS_PER_MINUTE": lambda: float(os.getenv("TENANT_TOKENS_PER_MINUTE", "0"))
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _ENV_SETTINGS:
+        load_environment()
+        value = _ENV_SETTINGS[name]()
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,171 @@
+"""
+Near-duplicate detection for Inbox Assistant
+SimHash fingerprints over normalized shingles with an LSH band index
+"""
+import hashlib
+import json
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+import config
+
+FINGERPRINT_BITS = 64
+SHINGLE_SIZE = 3
+
+# Fields of a previous analysis that stay valid for a templated copy of the
+# same message. The draft reply is always regenerated.
+REUSABLE_FIELDS = (
+    "summary", "urgency", "reasoning", "tone",
+    "formality", "sentiment", "action_items"
+)
+
+_NORMALIZE_PATTERNS = [
+    (re.compile(r"https?://\S+"), " <url> "),
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), " <email> "),
+    (re.compile(r"\b\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}\b"), " <date> "),
+    (re.compile(r"\b\d{1,2}:\d{2}(?::\d{2})?\s*(?:am|pm)?\b"), " <time> "),
+    (re.compile(r"#?\d+(?:[.,]\d+)*"), " <num> "),
+]
+_TOKEN_RE = re.compile(r"<\w+>|\w+")
+
+
+def normalize_message(text: str) -> str:
+    """Lowercase text and mask volatile tokens such as ids, dates and times."""
+    text = text.lower()
+    for pattern, placeholder in _NORMALIZE_PATTERNS:
+        text = pattern.sub(placeholder, text)
+    return " ".join(_TOKEN_RE.findall(text))
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> List[str]:
+    """Split normalized text into overlapping word shingles."""
+    tokens = normalize_message(text).split()
+    if len(tokens) <= size:
+        return [" ".join(tokens)] if tokens else []
+    return [" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+
+
+def simhash(text: str) -> int:
+    """Compute a 64-bit SimHash fingerprint of a message."""
+    weights = [0] * FINGERPRINT_BITS
+    for shingle in set(shingles(text)):
+        digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "big")
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def similarity(a: int, b: int) -> float:
+    """Similarity of two fingerprints as 1 - normalized Hamming distance."""
+    return 1.0 - bin(a ^ b).count("1") / FINGERPRINT_BITS
+
+
+class NearDuplicateIndex:
+    """LSH index mapping message fingerprints to previous analyses.
+
+    Fingerprints are split into ``max_distance + 1`` bands, so by the
+    pigeonhole principle any fingerprint within the threshold shares at
+    least one band exactly with its match.
+    """
+
+    def __init__(self, threshold: Optional[float] = None):
+        if threshold is None:
+            threshold = config.NEAR_DUPLICATE_THRESHOLD
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        max_distance = int(FINGERPRINT_BITS * (1.0 - threshold))
+        self.num_bands = min(max_distance + 1, FINGERPRINT_BITS)
+        self.band_width = -(-FINGERPRINT_BITS // self.num_bands)
+        self._fingerprints: List[int] = []
+        self._analyses: List[Dict[str, Any]] = []
+        self._bands: List[Dict[int, List[int]]] = [{} for _ in range(self.num_bands)]
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def _band_keys(self, fingerprint: int) -> List[int]:
+        mask = (1 << self.band_width) - 1
+        return [
+            fingerprint >> (band * self.band_width) & mask
+            for band in range(self.num_bands)
+        ]
+
+    def add(self, message: str, analysis: Dict[str, Any]) -> int:
+        """Index a message together with the reusable part of its analysis."""
+        return self.add_fingerprint(simhash(message), analysis)
+
+    def add_fingerprint(self, fingerprint: int, analysis: Dict[str, Any]) -> int:
+        """Index a precomputed fingerprint."""
+        entry_id = len(self._fingerprints)
+        self._fingerprints.append(fingerprint)
+        self._analyses.append(
+            {key: analysis[key] for key in REUSABLE_FIELDS if key in analysis}
+        )
+        for band, key in enumerate(self._band_keys(fingerprint)):
+            self._bands[band].setdefault(key, []).append(entry_id)
+        return entry_id
+
+    def query(self, message: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Return the closest previous analysis and its similarity, if any."""
+        fingerprint = simhash(message)
+        best_id, best_score = None, self.threshold
+        seen = set()
+        for band, key in enumerate(self._band_keys(fingerprint)):
+            for entry_id in self._bands[band].get(key, ()):
+                if entry_id in seen:
+                    continue
+                seen.add(entry_id)
+                score = similarity(fingerprint, self._fingerprints[entry_id])
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+        if best_id is None:
+            return None
+        return dict(self._analyses[best_id]), best_score
+
+    def save(self, path: str):
+        """Persist the index to a JSON file."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "threshold": self.threshold,
+                "fingerprints": self._fingerprints,
+                "analyses": self._analyses
+            }, f)
+
+    @classmethod
+    def load(cls, path: str) -> "NearDuplicateIndex":
+        """Load an index written by ``save``."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(threshold=data["threshold"])
+        for fingerprint, analysis in zip(data["fingerprints"], data["analyses"]):
+            index.add_fingerprint(fingerprint, analysis)
+        return index
+
+    @classmethod
+    def build_from_jsonl(
+        cls, path: str, threshold: Optional[float] = None
+    ) -> "NearDuplicateIndex":
+        """Bulk build an index from a JSONL dump of past analysis results.
+
+        Each line must hold the original text under ``message`` or
+        ``original_message`` next to the analysis fields.
+        """
+        index = cls(threshold=threshold)
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                message = record.get("message") or record.get("original_message")
+                if message:
+                    index.add(message, record)
+        return index
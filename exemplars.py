@@ -0,0 +1,270 @@
+"""
+Exemplar retrieval for Inbox Assistant
+Hashed bag-of-words embeddings of past messages with a brute-force or IVF
+vector index over their accepted replies
+"""
+import json
+import zlib
+from array import array
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+import config
+from dedup import normalize_message
+from utils import truncate_text
+
+EMBEDDING_DIM = 128
+
+# Rows are allocated in chunks so adding one entry is amortized O(1).
+_MIN_CAPACITY = 1024
+
+
+def embed(text: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Embed a message as a unit vector of signed hashed word and bigram counts.
+
+    Volatile tokens are masked as in near-duplicate detection, so templated
+    messages that only differ in ids, dates or amounts embed identically.
+    """
+    tokens = normalize_message(text).split()
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    hashes = np.fromiter(
+        (zlib.crc32(feature.encode("utf-8")) for feature in features),
+        dtype=np.int64, count=len(features)
+    )
+    signs = np.where(hashes & 0x80000000, 1.0, -1.0)
+    vector = np.bincount(hashes % dim, weights=signs, minlength=dim).astype(np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+class Exemplar(NamedTuple):
+    """A past reply retrieved for a message, with its cosine similarity."""
+
+    similarity: float
+    reply: str
+    reply_tone: Optional[str]
+
+
+def exemplar_prompt(exemplars: List[Exemplar], max_chars: Optional[int] = None) -> str:
+    """Render retrieved replies as a compact context block for the reply generator."""
+    if max_chars is None:
+        max_chars = config.EXEMPLAR_MAX_CHARS
+    lines = ["Replies previously accepted for similar messages (adapt, do not copy):"]
+    for exemplar in exemplars:
+        reply = truncate_text(" ".join(exemplar.reply.split()), max_chars)
+        tone = f" [{exemplar.reply_tone}]" if exemplar.reply_tone else ""
+        lines.append(f"- ({exemplar.similarity:.2f}){tone} {reply}")
+    return "\n".join(lines)
+
+
+class ExemplarIndex:
+    """Vector index of past messages mapped to the replies accepted for them.
+
+    Searches are exact brute-force dot products until ``train`` clusters
+    the vectors into ``nlist`` inverted lists (IVF); a search then scores
+    only the entries in the ``nprobe`` lists closest to the query. Entries
+    added after training go to their nearest list.
+
+    A match at or above ``reuse_threshold`` is near-identical, and its reply
+    can be reused without generating a new one.
+    """
+
+    def __init__(
+        self,
+        dim: int = EMBEDDING_DIM,
+        reuse_threshold: Optional[float] = None,
+        min_similarity: Optional[float] = None,
+        nprobe: int = 8
+    ):
+        if reuse_threshold is None:
+            reuse_threshold = config.EXEMPLAR_REUSE_THRESHOLD
+        if min_similarity is None:
+            min_similarity = config.EXEMPLAR_MIN_SIMILARITY
+        self.dim = dim
+        self.reuse_threshold = reuse_threshold
+        self.min_similarity = min_similarity
+        self.nprobe = nprobe
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._size = 0
+        self._replies: List[str] = []
+        self._tones: List[Optional[str]] = []
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[array] = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def _reserve(self, count: int):
+        needed = self._size + count
+        if needed <= len(self._vectors):
+            return
+        capacity = max(needed, 2 * len(self._vectors), _MIN_CAPACITY)
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        self._vectors = vectors
+
+    def add(self, message: str, reply: str, reply_tone: Optional[str] = None) -> int:
+        """Index a message with the reply accepted for it."""
+        return self.add_vectors(embed(message, self.dim)[None, :], [reply], [reply_tone])
+
+    def add_vectors(
+        self,
+        vectors: np.ndarray,
+        replies: List[str],
+        reply_tones: Optional[List[Optional[str]]] = None
+    ) -> int:
+        """Index precomputed unit vectors in bulk, returning the first new id."""
+        count = len(vectors)
+        if len(replies) != count:
+            raise ValueError("need one reply per vector")
+        first = self._size
+        self._reserve(count)
+        self._vectors[first:first + count] = vectors
+        self._size += count
+        self._replies.extend(replies)
+        self._tones.extend(reply_tones if reply_tones is not None else [None] * count)
+        if self._centroids is not None:
+            self._assign(np.arange(first, first + count))
+        return first
+
+    def _assign(self, ids: np.ndarray, batch: int = 65536):
+        for start in range(0, len(ids), batch):
+            chunk = ids[start:start + batch]
+            nearest = np.argmax(self._vectors[chunk] @ self._centroids.T, axis=1)
+            order = np.argsort(nearest, kind="stable")
+            bounds = np.searchsorted(nearest[order], np.arange(len(self._centroids) + 1))
+            for cell in np.flatnonzero(np.diff(bounds)):
+                self._lists[cell].extend(chunk[order[bounds[cell]:bounds[cell + 1]]].tolist())
+
+    def train(self, nlist: int, iterations: int = 10, sample_size: int = 65536, seed: int = 0):
+        """Cluster the indexed vectors into ``nlist`` lists with spherical k-means.
+
+        Centroids are fitted on a random sample of at most ``sample_size``
+        vectors, then every entry is assigned to its nearest centroid.
+        """
+        if nlist < 1 or nlist > self._size:
+            raise ValueError("nlist must be between 1 and the number of entries")
+        rng = np.random.default_rng(seed)
+        sample = self._vectors[
+            rng.choice(self._size, size=min(sample_size, self._size), replace=False)
+        ]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            nearest = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, nearest, sample)
+            norms = np.linalg.norm(sums, axis=1)
+            # An empty cluster keeps its previous centroid.
+            filled = norms > 0
+            centroids[filled] = sums[filled] / norms[filled, None]
+        self._centroids = centroids
+        self._lists = [array("q") for _ in range(nlist)]
+        self._assign(np.arange(self._size))
+
+    def search_vector(self, vector: np.ndarray, k: int = 2) -> List[Exemplar]:
+        """Return up to ``k`` replies whose messages are closest to ``vector``."""
+        if not self._size:
+            return []
+        if self._centroids is None:
+            candidates = None
+            scores = self._vectors[:self._size] @ vector
+        else:
+            nprobe = min(self.nprobe, len(self._lists))
+            cells = np.argpartition(-(self._centroids @ vector), nprobe - 1)[:nprobe]
+            candidates = np.concatenate([
+                np.frombuffer(self._lists[cell], dtype=np.int64) for cell in cells
+            ])
+            if not len(candidates):
+                return []
+            scores = self._vectors[candidates] @ vector
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        results = []
+        for position in top:
+            score = float(scores[position])
+            if score < self.min_similarity:
+                break
+            entry_id = int(position if candidates is None else candidates[position])
+            results.append(Exemplar(score, self._replies[entry_id], self._tones[entry_id]))
+        return results
+
+    def search(self, message: str, k: Optional[int] = None) -> List[Exemplar]:
+        """Return up to ``k`` (EXEMPLAR_K by default) replies for similar past messages."""
+        if k is None:
+            k = config.EXEMPLAR_K
+        return self.search_vector(embed(message, self.dim), k)
+
+    def reusable(self, exemplars: List[Exemplar]) -> Optional[Exemplar]:
+        """The best exemplar if it is near-identical enough to reuse as the reply."""
+        if exemplars and exemplars[0].similarity >= self.reuse_threshold:
+            return exemplars[0]
+        return None
+
+    def save(self, path: str):
+        """Persist vectors, replies and any trained lists to an .npz file."""
+        arrays: Dict[str, Any] = {
+            "vectors": self._vectors[:self._size],
+            "records": np.array(json.dumps({
+                "replies": self._replies,
+                "tones": self._tones,
+                "reuse_threshold": self.reuse_threshold,
+                "min_similarity": self.min_similarity,
+                "nprobe": self.nprobe
+            }))
+        }
+        if self._centroids is not None:
+            arrays["centroids"] = self._centroids
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "ExemplarIndex":
+        """Load an index written by ``save``."""
+        with np.load(path) as data:
+            records = json.loads(str(data["records"]))
+            vectors = data["vectors"]
+            centroids = data["centroids"] if "centroids" in data.files else None
+        index = cls(
+            dim=vectors.shape[1],
+            reuse_threshold=records["reuse_threshold"],
+            min_similarity=records["min_similarity"],
+            nprobe=records["nprobe"]
+        )
+        index.add_vectors(vectors, records["replies"], records["tones"])
+        if centroids is not None:
+            index._centroids = centroids
+            index._lists = [array("q") for _ in range(len(centroids))]
+            index._assign(np.arange(index._size))
+        return index
+
+    @classmethod
+    def build_from_records(
+        cls, records: Iterable[Dict[str, Any]], **kwargs
+    ) -> "ExemplarIndex":
+        """Build an index from analysis results that carry an accepted reply.
+
+        Each record needs the text under ``message`` or ``original_message``
+        and the reply under ``draft_reply``; others are skipped.
+        """
+        index = cls(**kwargs)
+        for record in records:
+            message = record.get("message") or record.get("original_message")
+            reply = record.get("draft_reply")
+            if message and reply:
+                index.add(message, reply, record.get("reply_tone"))
+        return index
+
+    @classmethod
+    def build_from_jsonl(cls, path: str, **kwargs) -> "ExemplarIndex":
+        """Bulk build an index from a JSONL dump of accepted analysis results."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.build_from_records(
+                (json.loads(line) for line in f if line.strip()), **kwargs
+            )
@@ -0,0 +1,160 @@
+"""
+Runtime statistics for Inbox Assistant model calls
+"""
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Dict, Any, Optional
+
+from config import MODEL_COSTS
+
+# Language of the message whose agents are running; model calls made
+# while it is set are also counted for that language.
+message_language: ContextVar[Optional[str]] = ContextVar("message_language", default=None)
+
+_LANGUAGE_FIELDS = (
+    "calls", "latency_s", "prompt_tokens", "output_tokens", "cached_tokens", "cost_usd"
+)
+
+
+def estimate_cost(model: str, prompt_tokens: int, output_tokens: int) -> float:
+    """Estimate the USD cost of a call from per-million-token prices."""
+    input_price, output_price = MODEL_COSTS.get(model, (0.0, 0.0))
+    return (prompt_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+def usage_tokens(usage_metadata: Optional[Any]) -> tuple:
+    """Extract (prompt, output, cached) token counts from usage metadata."""
+    if usage_metadata is None:
+        return 0, 0, 0
+    return (
+        usage_metadata.prompt_token_count or 0,
+        usage_metadata.candidates_token_count or 0,
+        usage_metadata.cached_content_token_count or 0
+    )
+
+
+class PipelineStats:
+    """Accumulates per-agent call counts, latency, tokens and cost."""
+
+    def __init__(self):
+        self.agents: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
+            "calls": 0,
+            "escalations": 0,
+            "degraded": 0,
+            "hedges": 0,
+            "votes": 0,
+            "vote_expansions": 0,
+            "skipped": 0,
+            "latency_s": 0.0,
+            "prompt_tokens": 0,
+            "output_tokens": 0,
+            "cached_tokens": 0,
+            "cost_usd": 0.0,
+            "models": defaultdict(int)
+        })
+        self.languages: Dict[str, Dict[str, Any]] = defaultdict(lambda: dict(
+            dict.fromkeys(_LANGUAGE_FIELDS, 0), messages=0, message_latency_s=0.0
+        ))
+        self.messages = 0
+
+    def record_call(
+        self,
+        agent_key: str,
+        model: str,
+        latency_s: float,
+        prompt_tokens: int = 0,
+        output_tokens: int = 0,
+        escalated: bool = False,
+        cached_tokens: int = 0
+    ):
+        """Record a single model call made on behalf of an agent.
+
+        ``cached_tokens`` is the part of the prompt served from a context cache.
+        """
+        cost_usd = estimate_cost(model, prompt_tokens, output_tokens)
+        entry = self.agents[agent_key]
+        entry["calls"] += 1
+        entry["latency_s"] += latency_s
+        entry["prompt_tokens"] += prompt_tokens
+        entry["output_tokens"] += output_tokens
+        entry["cached_tokens"] += cached_tokens
+        entry["cost_usd"] += cost_usd
+        entry["models"][model] += 1
+        if escalated:
+            entry["escalations"] += 1
+        language = message_language.get()
+        if language is not None:
+            entry = self.languages[language]
+            entry["calls"] += 1
+            entry["latency_s"] += latency_s
+            entry["prompt_tokens"] += prompt_tokens
+            entry["output_tokens"] += output_tokens
+            entry["cached_tokens"] += cached_tokens
+            entry["cost_usd"] += cost_usd
+
+    def record_degraded(self, agent_key: str):
+        """Record an agent output filled in by heuristics instead of a model."""
+        self.agents[agent_key]["degraded"] += 1
+
+    def record_hedge(self, agent_key: str):
+        """Record a duplicate request sent because a call exceeded its hedge delay."""
+        self.agents[agent_key]["hedges"] += 1
+
+    def record_vote(self, agent_key: str, expanded: bool = False):
+        """Record a self-consistency vote, and whether it needed more than two samples."""
+        entry = self.agents[agent_key]
+        entry["votes"] += 1
+        if expanded:
+            entry["vote_expansions"] += 1
+
+    def record_skipped(self, agent_key: str):
+        """Record an agent left out of a message by the agent policy."""
+        self.agents[agent_key]["skipped"] += 1
+
+    def record_message(self):
+        """Count a processed message."""
+        self.messages += 1
+
+    def record_language(self, language: str, latency_s: float):
+        """Record a message's language and its end-to-end latency."""
+        entry = self.languages[language]
+        entry["messages"] += 1
+        entry["message_latency_s"] += latency_s
+
+    def reset(self):
+        """Discard all recorded statistics."""
+        self.agents.clear()
+        self.languages.clear()
+        self.messages = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serializable copy of the statistics with totals."""
+        agents = {
+            key: dict(entry, models=dict(entry["models"]))
+            for key, entry in self.agents.items()
+        }
+        totals = {
+            field: sum(entry[field] for entry in agents.values())
+            for field in (
+                "calls", "escalations", "degraded", "hedges", "votes",
+                "vote_expansions", "skipped", "latency_s",
+                "prompt_tokens", "output_tokens", "cached_tokens", "cost_usd"
+            )
+        }
+        totals["messages"] = self.messages
+        totals["cached_tokens_per_message"] = (
+            totals["cached_tokens"] / self.messages if self.messages else 0.0
+        )
+        totals["calls_saved_per_1000_messages"] = (
+            totals["skipped"] * 1000 / self.messages if self.messages else 0.0
+        )
+        languages = {}
+        for language, entry in self.languages.items():
+            messages = entry["messages"] or 1
+            languages[language] = dict(
+                entry,
+                mean_latency_s=entry["message_latency_s"] / messages,
+                tokens_per_message=(entry["prompt_tokens"] + entry["output_tokens"]) / messages
+            )
+        return {"agents": agents, "totals": totals, "languages": languages}
+
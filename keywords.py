@@ -0,0 +1,186 @@
+"""
+Keyword engine for Inbox Assistant heuristics
+One compiled word-boundary pattern finds action verbs, deadlines and urgency
+signals in a single pass over the text
+"""
+import re
+from typing import Dict, Iterable, List, NamedTuple
+
+ACTION_VERBS = [
+    "send", "submit", "complete", "review", "update",
+    "schedule", "prepare", "confirm", "respond", "call",
+    "email", "follow up", "check", "verify", "provide"
+]
+
+URGENCY_KEYWORDS = [
+    "urgent", "urgently", "asap", "immediately", "immediate", "critical",
+    "emergency", "right away", "as soon as possible", "top priority",
+    "outage"
+]
+
+_WEEKDAYS = r"(?:mon|tues|wednes|thurs|fri|satur|sun)day"
+_MONTHS = (
+    r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|"
+    r"aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+)
+_DAYPARTS = r"(?: (?:morning|afternoon|evening|night))?"
+
+DEADLINE_PATTERNS = [
+    r"eod|eow|cob|eom",
+    r"end of (?:the |this |next )?(?:day|week|month|quarter)",
+    r"(?:by |before |until |due )(?:today|tonight|tomorrow|noon|midnight|" + _WEEKDAYS + r")"
+    + _DAYPARTS,
+    r"(?:this|next) " + _WEEKDAYS + _DAYPARTS,
+    r"(?:today|tonight|tomorrow)" + _DAYPARTS,
+    r"this (?:morning|afternoon|evening)",
+    r"(?:by |before |until |at )\d{1,2}(?::\d{2})? ?(?:am|pm)",
+    r"(?:by |before |until )\d{1,2}:\d{2}",
+    r"(?:within|in) \d+ (?:minutes?|mins?|hours?|hrs?|days?|weeks?)",
+    _MONTHS + r" \d{1,2}(?:st|nd|rd|th)?(?:-\d{1,2})?(?:,? \d{4})?",
+    r"\d{1,2}[/-]\d{1,2}(?:[/-]\d{2,4})?",
+    r"\d{4}-\d{2}-\d{2}"
+]
+
+# Inflections accepted after an action verb ("sends", "reviewed", ...).
+_VERB_SUFFIX = r"(?:s|es|d|ed|ing)?"
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Build a regex alternation factored by common prefixes.
+
+    The regex engine then walks each candidate position once per character
+    instead of retrying every keyword in turn.
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word.lower():
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        if list(node) == [""]:
+            return ""
+        branches = []
+        optional = False
+        for char in sorted(node):
+            if char == "":
+                optional = True
+                continue
+            branches.append(re.escape(char).replace(r"\ ", r"\s+") + build(node[char]))
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if optional:
+            pattern = "(?:" + pattern + ")?"
+        return pattern
+
+    return build(trie)
+
+
+def _compile_scanner(flags: int = 0) -> "re.Pattern":
+    # Anchoring on a preceding non-word character instead of a leading \b
+    # lets the engine skip straight to word starts; callers prepend a space.
+    return re.compile(
+        r"\W(?:"
+        r"(?P<action>" + _trie_pattern(ACTION_VERBS) + _VERB_SUFFIX + r")"
+        r"|(?P<urgency>" + _trie_pattern(URGENCY_KEYWORDS) + r")"
+        r"|(?P<deadline>" + "|".join(DEADLINE_PATTERNS) + r")"
+        r")\b",
+        flags
+    )
+
+
+# Matching lowercased text without IGNORECASE is about twice as fast; the
+# case-insensitive scanner covers text whose length changes when lowercased.
+_SCANNER = _compile_scanner()
+_SCANNER_IGNORECASE = _compile_scanner(re.IGNORECASE)
+
+# Action verbs alone, for callers that only need action lines.
+_ACTION = r"\W(?:" + _trie_pattern(ACTION_VERBS) + _VERB_SUFFIX + r")\b"
+_ACTION_SCANNER = re.compile(_ACTION)
+_ACTION_SCANNER_IGNORECASE = re.compile(_ACTION, re.IGNORECASE)
+
+
+class KeywordMatch(NamedTuple):
+    """A keyword found in a text."""
+
+    kind: str
+    text: str
+    start: int
+    end: int
+
+
+class KeywordScan(NamedTuple):
+    """Everything found in one pass over a text."""
+
+    action_lines: List[str]
+    deadlines: List[KeywordMatch]
+    urgency_keywords: List[KeywordMatch]
+
+
+def iter_matches(text: str) -> Iterable[KeywordMatch]:
+    """Yield action, deadline and urgency matches in text order."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        matches = _SCANNER.finditer(" " + lowered)
+    else:
+        matches = _SCANNER_IGNORECASE.finditer(" " + text)
+
+    for match in matches:
+        kind = match.lastgroup
+        start, end = match.span(kind)
+        yield KeywordMatch(kind, text[start - 1:end - 1], start - 1, end - 1)
+
+
+def action_lines(text: str) -> List[str]:
+    """Lines containing an action verb, the same as ``scan(text).action_lines``.
+
+    Only looks for action verbs, and resumes after the end of each line it
+    takes instead of matching the rest of that line.
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        search = _ACTION_SCANNER.search
+        padded = " " + lowered
+    else:
+        search = _ACTION_SCANNER_IGNORECASE.search
+        padded = " " + text
+
+    lines = []
+    position = 0
+    while True:
+        match = search(padded, position)
+        if match is None:
+            return lines
+        # Offsets in ``padded`` are one past the same offsets in ``text``.
+        line_start = text.rfind("\n", 0, match.start()) + 1
+        line_end = text.find("\n", match.end() - 1)
+        if line_end < 0:
+            lines.append(text[line_start:].strip())
+            return lines
+        lines.append(text[line_start:line_end].strip())
+        position = line_end + 1
+
+
+def scan(text: str) -> KeywordScan:
+    """Scan a text once for action lines, deadlines and urgency keywords."""
+    action_lines = []
+    deadlines = []
+    urgency_keywords = []
+    last_line_end = -1
+
+    for match in iter_matches(text):
+        if match.kind == "action":
+            if match.start <= last_line_end:
+                continue
+            line_start = text.rfind("\n", 0, match.start) + 1
+            line_end = text.find("\n", match.end)
+            if line_end < 0:
+                line_end = len(text)
+            last_line_end = line_end
+            action_lines.append(text[line_start:line_end].strip())
+        elif match.kind == "deadline":
+            deadlines.append(match)
+        else:
+            urgency_keywords.append(match)
+
+    return KeywordScan(action_lines, deadlines, urgency_keywords)
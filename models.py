@@ -0,0 +1,367 @@
+"""
+Model routing for Inbox Assistant agents
+Per-agent model selection with validation-driven escalation
+"""
+import asyncio
+import json
+import time
+from collections import defaultdict
+from typing import AsyncGenerator, Callable, Dict, List, Optional, Union
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.adk.utils._schema_utils import validate_schema
+from google.genai.types import Content, Part
+from pydantic import ValidationError
+
+from cassette import Cassette
+from config import AGENTS_CONFIG, GEMINI_MODEL, SAMPLE_TEMPERATURE
+from instrumentation import PipelineStats, usage_tokens
+from prompt_cache import LocalPromptCache, instruction_text
+from resilience import (
+    CircuitBreaker, LatencyTracker, degraded_output, heuristic_urgency, request_message
+)
+from temporal import message_received_at
+from results import Urgency
+from schemas import AGENT_SCHEMAS, ToneOutput, UrgencyOutput
+
+
+def is_valid_urgency(response_text: str) -> bool:
+    """Check that a classifier response names one of URGENCY_LEVELS.
+
+    Anything else would be silently coerced to Medium by validate_urgency.
+    """
+    try:
+        UrgencyOutput.model_validate_json(response_text)
+    except ValidationError:
+        return False
+    return True
+
+
+def is_valid_tone(response_text: str) -> bool:
+    """Check that every reported tone is one of TONE_CATEGORIES."""
+    try:
+        return bool(ToneOutput.model_validate_json(response_text).tone)
+    except ValidationError:
+        return False
+
+
+def check_schema(agent_key: str, responses: List[LlmResponse]):
+    """Raise ValidationError if a response would fail the agent's output schema.
+
+    The agent runs the same check on the response after the call, where a
+    failure would escape the breaker.
+    """
+    text = response_text(responses)
+    if text.strip():
+        validate_schema(AGENT_SCHEMAS[agent_key], text)
+
+
+OUTPUT_VALIDATORS = {
+    "urgency_classifier": is_valid_urgency,
+    "tone_analyzer": is_valid_tone
+}
+
+
+def urgency_vote(response_text: str) -> Optional[str]:
+    """Return the urgency label a classifier response votes for, if valid."""
+    try:
+        return UrgencyOutput.model_validate_json(response_text).urgency
+    except ValidationError:
+        return None
+
+
+def keyword_urgency(llm_request: LlmRequest) -> Optional[str]:
+    """Urgency suggested by keywords and deadlines in the message, if any."""
+    urgency = heuristic_urgency(
+        request_message(llm_request), message_received_at.get()
+    )["urgency"]
+    return None if urgency == "Low" else urgency
+
+
+def majority_label(votes: Dict[str, int]) -> str:
+    """Pick the most voted label, breaking ties toward higher urgency."""
+    return max(votes, key=lambda label: (votes[label], Urgency.parse(label) or 0))
+
+
+def as_llm(model: Union[str, BaseLlm]) -> BaseLlm:
+    """Resolve a model name through the ADK registry."""
+    if isinstance(model, BaseLlm):
+        return model
+    return LLMRegistry.new_llm(model)
+
+
+def response_text(responses: List[LlmResponse]) -> str:
+    """Join the text parts of the final response."""
+    if not responses or not responses[-1].content or not responses[-1].content.parts:
+        return ""
+    return "".join(part.text or "" for part in responses[-1].content.parts)
+
+
+class RoutedLlm(BaseLlm):
+    """Calls an agent's primary model and escalates invalid outputs.
+
+    When the primary response fails ``validator`` the same request is re-run
+    on ``escalation``. Every call is recorded in ``stats`` if provided. Cached
+    prompt tokens come from the provider's usage metadata, or from
+    ``prompt_cache`` when the backend does not report them.
+
+    With a ``breaker``, failed calls, responses that do not match the
+    agent's output schema and calls refused by an open breaker return a
+    heuristic output instead of raising, flagged with
+    ``custom_metadata={"degraded": True}``. Heuristics resolve deadlines
+    against the message's receive time (temporal.message_received_at).
+
+    Each attempt is bounded by ``timeout_s``, which counts as a failure. With
+    a ``latency`` tracker, a call still running after the tracker's hedge
+    delay is duplicated and whichever copy finishes first is used.
+
+    With ``samples`` above one the urgency classifier answers by majority
+    vote (self-consistency): two samples are drawn concurrently at
+    SAMPLE_TEMPERATURE, and the rest only when they disagree or the keyword
+    heuristic suggests a higher urgency than they agree on, and no label
+    has a majority of ``samples`` yet. Outstanding samples are cancelled as
+    soon as one does.
+    """
+
+    agent_key: str
+    primary: BaseLlm
+    escalation: Optional[BaseLlm] = None
+    validator: Optional[Callable[[str], bool]] = None
+    stats: Optional[PipelineStats] = None
+    prompt_cache: Optional[LocalPromptCache] = None
+    breaker: Optional[CircuitBreaker] = None
+    latency: Optional[LatencyTracker] = None
+    timeout_s: Optional[float] = None
+    samples: int = 1
+
+    async def _call(
+        self, llm: BaseLlm, llm_request: LlmRequest, escalated: bool
+    ) -> List[LlmResponse]:
+        request = llm_request.model_copy(update={"model": llm.model})
+        start = time.perf_counter()
+        responses = [
+            response async for response in llm.generate_content_async(request)
+        ]
+        if self.stats is not None:
+            latency_s = time.perf_counter() - start
+            usage = responses[-1].usage_metadata if responses else None
+            prompt_tokens, output_tokens, cached_tokens = usage_tokens(usage)
+            if usage is None and self.prompt_cache is not None:
+                cached_tokens = self.prompt_cache.observe(
+                    self.agent_key,
+                    llm.model,
+                    instruction_text(request.config.system_instruction)
+                )
+            self.stats.record_call(
+                self.agent_key,
+                llm.model,
+                latency_s,
+                prompt_tokens,
+                output_tokens,
+                escalated=escalated,
+                cached_tokens=cached_tokens
+            )
+        return responses
+
+    def _degraded_response(self, llm_request: LlmRequest) -> LlmResponse:
+        if self.stats is not None:
+            self.stats.record_degraded(self.agent_key)
+        text = json.dumps(degraded_output(self.agent_key, llm_request))
+        return LlmResponse(
+            content=Content(role="model", parts=[Part(text=text)]),
+            custom_metadata={"degraded": True}
+        )
+
+    async def _hedged_call(
+        self, llm: BaseLlm, llm_request: LlmRequest, escalated: bool
+    ) -> List[LlmResponse]:
+        delay = self.latency.hedge_delay() if self.latency is not None else None
+        start = time.perf_counter()
+        attempts = {asyncio.ensure_future(self._call(llm, llm_request, escalated))}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(attempts, timeout=delay)
+                if not done:
+                    if self.stats is not None:
+                        self.stats.record_hedge(self.agent_key)
+                    attempts.add(asyncio.ensure_future(self._call(llm, llm_request, escalated)))
+
+            while True:
+                done, attempts = await asyncio.wait(
+                    attempts, return_when=asyncio.FIRST_COMPLETED
+                )
+                failed = [task for task in done if task.exception() is not None]
+                if len(failed) < len(done) or not attempts:
+                    break
+
+            for task in done:
+                if task.exception() is None:
+                    if self.latency is not None:
+                        self.latency.record(time.perf_counter() - start)
+                    return task.result()
+            raise failed[0].exception()
+        finally:
+            for task in attempts:
+                task.cancel()
+
+    async def _sample(self, llm_request: LlmRequest, seed: int) -> List[LlmResponse]:
+        config = llm_request.config.model_copy(
+            update={"temperature": SAMPLE_TEMPERATURE, "seed": seed}
+        )
+        request = llm_request.model_copy(update={"config": config})
+        return await self._hedged_call(self.primary, request, escalated=False)
+
+    async def _self_consistent(self, llm_request: LlmRequest) -> List[LlmResponse]:
+        votes: Dict[str, int] = defaultdict(int)
+        answers: Dict[str, List[LlmResponse]] = {}
+        outcomes = []
+
+        def count(responses: List[LlmResponse]):
+            label = urgency_vote(response_text(responses))
+            if label is not None:
+                votes[label] += 1
+                answers.setdefault(label, responses)
+
+        first = await asyncio.gather(
+            self._sample(llm_request, 0), self._sample(llm_request, 1),
+            return_exceptions=True
+        )
+        for outcome in first:
+            outcomes.append(outcome)
+            if not isinstance(outcome, BaseException):
+                count(outcome)
+
+        agreed = next(iter(votes)) if len(votes) == 1 and sum(votes.values()) == 2 else None
+        hint = Urgency.parse(keyword_urgency(llm_request)) if agreed else None
+        majority = self.samples // 2 + 1
+        expanded = (
+            (agreed is None or (hint is not None and hint > Urgency.parse(agreed)))
+            and max(votes.values(), default=0) < majority
+            and self.samples > 2
+        )
+        if expanded:
+            pending = {
+                asyncio.ensure_future(self._sample(llm_request, seed))
+                for seed in range(2, self.samples)
+            }
+            try:
+                while pending and max(votes.values(), default=0) < majority:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        outcomes.append(task.exception() or task.result())
+                        if task.exception() is None:
+                            count(task.result())
+            finally:
+                for task in pending:
+                    task.cancel()
+
+        if self.stats is not None:
+            self.stats.record_vote(self.agent_key, expanded=expanded)
+        if votes:
+            return answers[majority_label(votes)]
+        for outcome in outcomes:
+            if not isinstance(outcome, BaseException):
+                return outcome
+        raise outcomes[0]
+
+    async def _generate(self, llm_request: LlmRequest) -> List[LlmResponse]:
+        if self.samples > 1:
+            responses = await self._self_consistent(llm_request)
+        else:
+            responses = await self._hedged_call(self.primary, llm_request, escalated=False)
+
+        if (
+            self.escalation is not None
+            and self.validator is not None
+            and not self.validator(response_text(responses))
+        ):
+            responses = await self._hedged_call(self.escalation, llm_request, escalated=True)
+        return responses
+
+    async def _generate_within_timeout(self, llm_request: LlmRequest) -> List[LlmResponse]:
+        if self.timeout_s is None:
+            return await self._generate(llm_request)
+        return await asyncio.wait_for(self._generate(llm_request), self.timeout_s)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if self.breaker is None:
+            responses = await self._generate_within_timeout(llm_request)
+        elif not self.breaker.allow():
+            responses = [self._degraded_response(llm_request)]
+        else:
+            try:
+                responses = await self._generate_within_timeout(llm_request)
+                check_schema(self.agent_key, responses)
+            except Exception:
+                self.breaker.record_failure()
+                responses = [self._degraded_response(llm_request)]
+            except BaseException:
+                # Cancelled, e.g. by the message deadline: a half-open
+                # probe must not stay claimed forever.
+                self.breaker.release()
+                raise
+            else:
+                self.breaker.record_success()
+
+        for response in responses:
+            yield response
+
+
+def build_agent_model(
+    agent_key: str,
+    stats: Optional[PipelineStats] = None,
+    routing: bool = True,
+    model: Optional[Union[str, BaseLlm]] = None,
+    prompt_cache: Optional[LocalPromptCache] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    latency: Optional[LatencyTracker] = None,
+    cassette: Optional[Cassette] = None,
+    samples: Optional[int] = None
+) -> Union[str, BaseLlm]:
+    """Build the model for an agent from AGENTS_CONFIG.
+
+    With ``routing`` disabled every agent uses GEMINI_MODEL and nothing is
+    escalated; an explicit ``model`` is not escalated either. Calls are bounded by the agent's ``timeout_s`` and hedged
+    when a ``latency`` tracker is given. With a ``cassette`` the primary and
+    escalation backends are recorded or replayed. ``samples`` overrides the
+    agent's self-consistency sample count. A plain model name is returned
+    when there is nothing to wrap.
+    """
+    agent_config = AGENTS_CONFIG[agent_key]
+    escalation_model = None
+    if model is None:
+        model = agent_config.get("model", GEMINI_MODEL) if routing else GEMINI_MODEL
+        escalation_model = agent_config.get("escalation_model") if routing else None
+    if cassette is not None:
+        model = cassette.wrap(as_llm(model))
+        if escalation_model:
+            escalation_model = cassette.wrap(as_llm(escalation_model))
+    timeout_s = agent_config.get("timeout_s")
+    if samples is None:
+        samples = agent_config.get("samples", 1)
+    if (
+        stats is None and escalation_model is None and breaker is None
+        and latency is None and timeout_s is None and samples <= 1
+    ):
+        return model
+
+    return RoutedLlm(
+        model=model if isinstance(model, str) else model.model,
+        agent_key=agent_key,
+        primary=as_llm(model),
+        escalation=as_llm(escalation_model) if escalation_model else None,
+        validator=OUTPUT_VALIDATORS.get(agent_key),
+        stats=stats,
+        prompt_cache=prompt_cache,
+        breaker=breaker,
+        latency=latency,
+        timeout_s=timeout_s,
+        samples=samples
+    )
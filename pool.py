@@ -0,0 +1,116 @@
+"""
+Shared pipeline pool for Inbox Assistant
+Agents, runners and services built once per model and prompt version and
+shared by every assistant that uses them
+"""
+import threading
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import prompts
+from agent import InboxAssistant
+
+# InboxAssistant attributes that hold built agents and the state tied to them.
+SHARED_ATTRIBUTES = (
+    "stats", "breakers", "latency_trackers", "_prompt_cache", "_pipeline",
+    "_session_service", "_memory_service", "_runner", "_reply_runner",
+    "_subset_runners", "_instructions", "_translation_locks"
+)
+
+
+def pool_key(assistant: InboxAssistant) -> Tuple[Hashable, ...]:
+    """Settings that determine the agents an assistant builds.
+
+    Model objects, cassettes and translators are keyed by identity; the
+    pool keeps the first assistant built for a key, which holds a
+    reference to them.
+    """
+    model = assistant.model
+    return (
+        model if model is None or isinstance(model, str) else id(model),
+        prompts.PROMPT_VERSION,
+        assistant.routing,
+        bool(assistant.breakers),
+        bool(assistant.latency_trackers),
+        assistant.urgency_samples,
+        None if assistant.cassette is None else id(assistant.cassette),
+        assistant.language_prompts,
+        None if assistant.translator is None else id(assistant.translator)
+    )
+
+
+class PipelinePool:
+    """Builds each distinct pipeline once and lends it to new assistants.
+
+    Assistants created with ``pool=`` reuse the pool's agents, runners,
+    session and memory services, prompt cache, circuit breakers and latency
+    trackers instead of building their own, and the reduced pipelines they
+    build are cached for all of them. Sessions stay isolated by session
+    id, and the shared session service only keeps sessions callers name;
+    the temporary ones are deleted after each message. Call statistics are
+    shared too, so ``stats`` covers every assistant on the same pipeline.
+    Translated instructions are shared, but each assistant keeps its own
+    ``translations`` cache, which new translations are written to.
+    """
+
+    def __init__(self):
+        self._templates: Dict[Tuple[Hashable, ...], InboxAssistant] = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def _template(self, assistant: InboxAssistant) -> InboxAssistant:
+        key = pool_key(assistant)
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self.hits += 1
+                return template
+            template = InboxAssistant(
+                model=assistant.model,
+                routing=assistant.routing,
+                resilient=bool(assistant.breakers),
+                hedging=bool(assistant.latency_trackers),
+                cassette=assistant.cassette,
+                urgency_samples=assistant.urgency_samples,
+                language_prompts=assistant.language_prompts,
+                translator=assistant.translator
+            )
+            template.warmup()
+            template.analysis_runner
+            self._templates[key] = template
+            self.builds += 1
+            return template
+
+    def attach(self, assistant: InboxAssistant) -> InboxAssistant:
+        """Point an assistant at the pool's pipeline for its settings."""
+        template = self._template(assistant)
+        for name in SHARED_ATTRIBUTES:
+            setattr(assistant, name, getattr(template, name))
+        return assistant
+
+    def acquire(self, **kwargs: Any) -> InboxAssistant:
+        """Create an assistant on a pooled pipeline; takes InboxAssistant's arguments."""
+        return InboxAssistant(pool=self, **kwargs)
+
+    def warm(self, *settings: Dict[str, Any]) -> "PipelinePool":
+        """Build pipelines ahead of traffic, one per settings dict (default settings if none)."""
+        for kwargs in settings or ({},):
+            self.acquire(**kwargs)
+        return self
+
+    def stats(self) -> Dict[str, int]:
+        return {"pipelines": len(self._templates), "builds": self.builds, "hits": self.hits}
+
+
+_default_pool: Optional[PipelinePool] = None
+
+
+def default_pool() -> PipelinePool:
+    """Process-wide pool used by analyze_message."""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = PipelinePool()
+    return _default_pool
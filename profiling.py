@@ -0,0 +1,301 @@
+"""
+Profiling for the Inbox Assistant orchestration layer
+Per-stage spans, a sampling stack profiler and tracemalloc allocation stats,
+written as collapsed stacks or speedscope profiles
+"""
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Shared no-op context returned by span() outside profiled messages.
+NULL_SPAN = nullcontext()
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+class _Frame:
+    """An open span: its stack path and the time spent in its child spans."""
+
+    __slots__ = ("path", "child_s")
+
+    def __init__(self, path: Tuple[str, ...]):
+        self.path = path
+        self.child_s = 0.0
+
+
+class _Active:
+    """The profiler and innermost open span of a profiled message.
+
+    A new one is set for each span, so concurrent tasks of the same message
+    keep their own span stacks.
+    """
+
+    __slots__ = ("profiler", "frame")
+
+    def __init__(self, profiler: "Profiler", frame: _Frame):
+        self.profiler = profiler
+        self.frame = frame
+
+
+_active: ContextVar[Optional[_Active]] = ContextVar("inbox_profile", default=None)
+
+
+def span(name: str):
+    """Time a stage of the message being profiled; a no-op for other messages."""
+    active = _active.get()
+    if active is None:
+        return NULL_SPAN
+    return active.profiler._span(active.frame, name)
+
+
+def _restore(token, previous: Optional["_Active"]):
+    try:
+        _active.reset(token)
+    except ValueError:
+        # Exited in another context, e.g. a stream closed by its consumer.
+        _active.set(previous)
+
+
+class _Sampler(threading.Thread):
+    """Samples the Python stack of one thread at a fixed interval."""
+
+    def __init__(self, target_thread: int, interval_s: float, counts: Dict[Tuple[str, ...], int]):
+        super().__init__(name="inbox-profile-sampler", daemon=True)
+        self.target_thread = target_thread
+        self.interval_s = interval_s
+        self.counts = counts
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval_s):
+            frame = sys._current_frames().get(self.target_thread)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            if stack:
+                self.counts[tuple(reversed(stack))] += 1
+
+
+class Profiler:
+    """Profiles a sample of the messages an InboxAssistant processes.
+
+    A ``sample_rate`` share of messages, spread evenly, is profiled. For
+    those, every stage wrapped in span() records its wall time and, with
+    ``trace_allocations``, the memory it left allocated according to
+    tracemalloc. With a ``sampling_interval_s`` a background thread also
+    samples the Python stack of the thread running the message, which
+    shows where time goes inside the ADK runner.
+
+    Messages that are not sampled, and all messages when no profiler is
+    set, only pay for a context variable lookup per stage.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 1.0,
+        sampling_interval_s: Optional[float] = None,
+        trace_allocations: bool = False
+    ):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be in [0, 1]")
+        self.sample_rate = sample_rate
+        self.sampling_interval_s = sampling_interval_s
+        self.trace_allocations = trace_allocations
+        self.messages = 0
+        self.profiled = 0
+        self._stages: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0, 0.0, 0])
+        self._span_self_s: Dict[Tuple[str, ...], float] = defaultdict(float)
+        self._samples: Dict[Tuple[str, ...], int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._running = 0
+        self._sampler: Optional[_Sampler] = None
+        self._started_tracemalloc = False
+
+    def _sampled(self) -> bool:
+        """Pick every message whose index crosses a multiple of 1 / sample_rate."""
+        index = self.messages
+        self.messages += 1
+        return int((index + 1) * self.sample_rate) > int(index * self.sample_rate)
+
+    def _start(self):
+        with self._lock:
+            self._running += 1
+            if self._running > 1:
+                return
+            if self.trace_allocations and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            if self.sampling_interval_s:
+                self._sampler = _Sampler(
+                    threading.get_ident(), self.sampling_interval_s, self._samples
+                )
+                self._sampler.start()
+
+    def _stop(self):
+        with self._lock:
+            self._running -= 1
+            if self._running or self._sampler is None:
+                return
+            sampler, self._sampler = self._sampler, None
+        sampler.stopped.set()
+        sampler.join()
+
+    @contextmanager
+    def message(self) -> Iterator[bool]:
+        """Profile the message processed inside this block if it is sampled.
+
+        Yields whether the message is profiled.
+        """
+        if not self._sampled():
+            yield False
+            return
+        self.profiled += 1
+        self._start()
+        try:
+            with self._span(_Frame(()), "message"):
+                yield True
+        finally:
+            self._stop()
+
+    @contextmanager
+    def _span(self, parent: _Frame, name: str) -> Iterator[None]:
+        frame = _Frame(parent.path + (name,))
+        token = _active.set(_Active(self, frame))
+        allocated = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            _restore(token, None if not parent.path else _Active(self, parent))
+            parent.child_s += elapsed
+            stage = self._stages[name]
+            stage[0] += 1
+            stage[1] += elapsed
+            stage[2] = max(stage[2], elapsed)
+            if allocated is not None:
+                stage[3] += tracemalloc.get_traced_memory()[0] - allocated
+            # Concurrent child spans can add up to more than the parent's time.
+            self._span_self_s[frame.path] += max(elapsed - frame.child_s, 0.0)
+
+    def instrument(self, obj: Any, method: str, name: Optional[str] = None):
+        """Wrap an async method of ``obj`` in a span; a no-op outside profiled messages."""
+        original = getattr(obj, method)
+        if getattr(original, "_profiled", False):
+            return
+        name = name or method
+
+        @functools.wraps(original)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await original(*args, **kwargs)
+
+        wrapper._profiled = True
+        setattr(obj, method, wrapper)
+
+    def stages(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage count, total and mean wall time and net allocated memory."""
+        stages = {}
+        for name, (count, total_s, max_s, allocated) in self._stages.items():
+            entry = {
+                "count": count,
+                "total_ms": total_s * 1e3,
+                "mean_ms": total_s * 1e3 / count,
+                "max_ms": max_s * 1e3
+            }
+            if self.trace_allocations:
+                entry["net_alloc_kb"] = allocated / 1024
+            stages[name] = entry
+        return stages
+
+    def collapsed(self, samples: bool = False) -> List[str]:
+        """Stacks in collapsed format: ``frame;frame;frame value`` per line.
+
+        Span stacks are weighted by self time in microseconds; sampled
+        stacks by sample count.
+        """
+        if samples:
+            return [f"{';'.join(stack)} {count}" for stack, count in self._samples.items()]
+        return [
+            f"{';'.join(path)} {round(seconds * 1e6)}"
+            for path, seconds in self._span_self_s.items()
+        ]
+
+    def write_collapsed(self, path: str, samples: bool = False):
+        """Write collapsed stacks, e.g. for flamegraph.pl or speedscope."""
+        with open(path, "w", encoding="utf-8") as f:
+            for line in self.collapsed(samples):
+                f.write(line + "\n")
+
+    def speedscope(self) -> Dict[str, Any]:
+        """Span and sampled stacks as a speedscope document, one profile each."""
+        frames: List[Dict[str, str]] = []
+        frame_ids: Dict[str, int] = {}
+
+        def profile(name: str, unit: str, stacks: Dict[Tuple[str, ...], float]):
+            samples, weights = [], []
+            for stack, weight in stacks.items():
+                for frame in stack:
+                    if frame not in frame_ids:
+                        frame_ids[frame] = len(frames)
+                        frames.append({"name": frame})
+                samples.append([frame_ids[frame] for frame in stack])
+                weights.append(weight)
+            return {
+                "type": "sampled",
+                "name": name,
+                "unit": unit,
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights
+            }
+
+        profiles = [profile(
+            "spans", "microseconds",
+            {path: round(seconds * 1e6) for path, seconds in self._span_self_s.items()}
+        )]
+        if self._samples:
+            interval_us = round(self.sampling_interval_s * 1e6)
+            profiles.append(profile(
+                "samples", "microseconds",
+                {stack: count * interval_us for stack, count in self._samples.items()}
+            ))
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": "Inbox Assistant",
+            "exporter": "inbox-assistant profiling",
+            "shared": {"frames": frames},
+            "profiles": profiles
+        }
+
+    def write_speedscope(self, path: str):
+        """Write a .speedscope.json file for https://www.speedscope.app."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.speedscope(), f)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "messages": self.messages,
+            "profiled": self.profiled,
+            "samples": sum(self._samples.values()),
+            "stages": self.stages()
+        }
+
+    def close(self):
+        """Stop tracemalloc if this profiler started it."""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
@@ -0,0 +1,69 @@
+"""
+Prompt prefix caching for Inbox Assistant
+Provider-side context caching through ADK, with a local stand-in for offline runs
+"""
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from google.adk.agents.context_cache_config import ContextCacheConfig
+
+from config import CONTEXT_CACHE_INTERVALS, CONTEXT_CACHE_MIN_TOKENS, CONTEXT_CACHE_TTL_S
+from prompts import prompt_cache_key
+
+# Rough tokenizer-free estimate, good enough for accounting offline.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def instruction_text(system_instruction: Optional[Any]) -> str:
+    """Flatten a request's system instruction into plain text."""
+    if system_instruction is None:
+        return ""
+    if isinstance(system_instruction, str):
+        return system_instruction
+    parts = getattr(system_instruction, "parts", None) or []
+    return "".join(getattr(part, "text", "") or "" for part in parts)
+
+
+def context_cache_config() -> ContextCacheConfig:
+    """ADK context cache settings for the Inbox Assistant app."""
+    return ContextCacheConfig(
+        cache_intervals=CONTEXT_CACHE_INTERVALS,
+        ttl_seconds=CONTEXT_CACHE_TTL_S,
+        min_tokens=CONTEXT_CACHE_MIN_TOKENS
+    )
+
+
+class LocalPromptCache:
+    """In-process stand-in for provider-side prefix caching.
+
+    Tracks which static instruction prefixes were already sent, keyed by
+    prompt version, agent, model and instruction text, and reports the prompt tokens a
+    provider cache would have served for each repeated call.
+    """
+
+    def __init__(self, ttl_s: float = CONTEXT_CACHE_TTL_S):
+        self.ttl_s = ttl_s
+        self._entries: Dict[str, Tuple[int, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def observe(self, agent_key: str, model: str, prefix: str) -> int:
+        """Register a call and return the prefix tokens served from cache."""
+        key = prompt_cache_key(agent_key, model, prefix)
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        self._entries[key] = (estimate_tokens(prefix), now + self.ttl_s)
+        return 0
+
+    def clear(self):
+        """Drop all cached prefixes."""
+        self._entries.clear()
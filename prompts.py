@@ -0,0 +1,141 @@
+"""
+Agent instructions for Inbox Assistant
+Built once per prompt language so every agent and message in that language
+shares the same static prefix
+"""
+import hashlib
+from functools import lru_cache
+from typing import Dict, Optional
+
+from config import TONE_CATEGORIES
+
+# Bump when any instruction changes; it is part of every prompt cache key.
+PROMPT_VERSION = "5"
+
+_TONE_LIST = ", ".join(TONE_CATEGORIES)
+
+# Languages with their own instruction variant, by langdetect code.
+LANGUAGE_NAMES = {"en": "English", "es": "Spanish", "de": "German"}
+
+# Time-sensitive words the urgency classifier looks for, per language.
+URGENCY_SIGNALS = {
+    "en": '"urgent", "ASAP", "immediately", "today"',
+    "es": '"urgente", "cuanto antes", "inmediatamente", "hoy"',
+    "de": '"dringend", "sofort", "umgehend", "heute"'
+}
+
+SUMMARIZER_INSTRUCTION = """You are a Summarization Agent that summarizes communications.
+
+Your task:
+- Summarize the message in 2-4 concise sentences
+- Focus on main points, requests, and important details
+- Write the summary in {output_language}
+- Be clear and actionable
+
+Respond with the summary field of the response schema.
+"""
+
+URGENCY_CLASSIFIER_INSTRUCTION = """You are an Urgency Classifier Agent that categorizes message priority.
+
+Classification criteria:
+- HIGH: Requires immediate attention (crisis, urgent deadline, critical issue)
+- MEDIUM: Important but not emergency (needs response within days)
+- LOW: Informational or non-urgent (no immediate action required)
+
+Analyze for urgency signals:
+- Time-sensitive words ({urgency_signals})
+- Deadline mentions, using the resolved deadlines when they are given
+- Emotional intensity
+- Business impact
+
+Respond with the urgency level and a brief reasoning in {output_language}.
+"""
+
+TONE_ANALYZER_INSTRUCTION = """You are a Tone Analyzer Agent that detects sender's tone and mood.
+
+Analyze for:
+- Formality level (Formal vs Informal)
+- Emotional state (Angry, Friendly, Neutral, etc.)
+- Communication style (Direct, Polite, Professional, Casual)
+
+Available tones: {tone_list}
+Use these English labels whatever the language of the message.
+
+Respond with the primary and secondary tone, formality and sentiment.
+"""
+
+REPLY_GENERATOR_INSTRUCTION = """You are a Reply Generator Agent that drafts professional responses.
+
+Using the message context:
+- Address all questions and requests from the original message
+- Match or appropriately respond to the sender's tone
+- Be concise and professional
+- For high urgency, show promptness and understanding
+- For angry/frustrated tones, be empathetic
+- Maintain appropriate formality level
+- Write the reply in {output_language}
+- When replies accepted for similar messages are given, reuse their substance and style where they fit
+
+Respond with the draft reply and its tone.
+DO NOT include email headers, just the message body.
+"""
+
+NEXT_STEP_PLANNER_INSTRUCTION = """You are a Next-Step Planner Agent that extracts actionable tasks.
+
+Identify:
+- Explicit requests and tasks
+- Implicit action items
+- Deadlines and due dates
+- Questions that require responses
+
+For each action:
+- State it as a clear, actionable task
+- Include deadline if mentioned, as the resolved date when one is given
+- Start with an action verb
+- Write the task in {output_language}
+
+If no actions are needed, return the single item "No action required".
+"""
+
+_TEMPLATES = {
+    "summarizer": SUMMARIZER_INSTRUCTION,
+    "urgency_classifier": URGENCY_CLASSIFIER_INSTRUCTION,
+    "tone_analyzer": TONE_ANALYZER_INSTRUCTION,
+    "reply_generator": REPLY_GENERATOR_INSTRUCTION,
+    "next_step_planner": NEXT_STEP_PLANNER_INSTRUCTION
+}
+
+
+def prompt_language(language: Optional[str]) -> Optional[str]:
+    """The instruction variant for a detected language; None for the generic one."""
+    return language if language in LANGUAGE_NAMES else None
+
+
+@lru_cache(maxsize=None)
+def instructions_for(language: Optional[str] = None) -> Dict[str, str]:
+    """Agent instructions that name the output language explicitly.
+
+    Languages without a variant get the generic instructions, which ask
+    for output in the language of the message.
+    """
+    language = prompt_language(language)
+    values = {
+        "output_language": LANGUAGE_NAMES[language] if language else "the language of the message",
+        "urgency_signals": URGENCY_SIGNALS[language or "en"],
+        "tone_list": _TONE_LIST
+    }
+    return {key: template.format(**values) for key, template in _TEMPLATES.items()}
+
+
+INSTRUCTIONS = instructions_for(None)
+
+
+def prompt_cache_key(agent_key: str, model: str, instruction: Optional[str] = None) -> str:
+    """Cache key for an agent's static instruction on a given model.
+
+    ``instruction`` is the text actually sent, for language variants; the
+    generic instruction is assumed otherwise.
+    """
+    text = INSTRUCTIONS[agent_key] if instruction is None else instruction
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+    return f"{PROMPT_VERSION}:{agent_key}:{model}:{digest}"
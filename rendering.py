@@ -0,0 +1,183 @@
+"""
+Output rendering for Inbox Assistant results
+Terminal, Markdown, HTML, JSON and NDJSON writers that stream into a buffer
+"""
+import html
+import io
+import json
+from typing import Any, Callable, Dict, Iterable, TextIO, Union
+
+from results import AnalysisResult
+
+FORMATS = ("terminal", "markdown", "html", "json", "ndjson")
+
+URGENCY_EMOJI = {"High": "🔴", "Medium": "🟡", "Low": "🟢"}
+
+_RULE = "=" * 60
+_JSON = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+# Templates are formatted once per field; the surrounding text never changes.
+_TERMINAL_HEADER = f"\n{_RULE}\nINBOX ASSISTANT ANALYSIS\n{_RULE}\n\n"
+_TERMINAL_FOOTER = _RULE + "\n"
+_TERMINAL_SUMMARY = "📝 SUMMARY:\n{}\n\n".format
+_TERMINAL_URGENCY = "{} URGENCY: {}\n\n".format
+_TERMINAL_TONE = "😊 TONE: {}\n\n".format
+_TERMINAL_REPLY = "✉️ SUGGESTED REPLY:\n{}\n\n".format
+_TERMINAL_ITEM = "  {}. {}\n".format
+
+_MARKDOWN_SUMMARY = "**Summary:** {}\n\n".format
+_MARKDOWN_URGENCY = "**Urgency:** {}\n\n".format
+_MARKDOWN_TONE = "**Tone:** {}\n\n".format
+_MARKDOWN_REPLY = "**Suggested reply:**\n\n> {}\n\n".format
+_MARKDOWN_ITEM = "- [ ] {}\n".format
+
+_HTML_SUMMARY = '<p class="summary">{}</p>\n'.format
+_HTML_URGENCY = '<p class="urgency urgency-{}">{}</p>\n'.format
+_HTML_TONE = '<p class="tone">{}</p>\n'.format
+_HTML_REPLY = '<blockquote class="draft-reply">{}</blockquote>\n'.format
+_HTML_ITEM = "<li>{}</li>\n".format
+_HTML_DOCUMENT_HEADER = (
+    '<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8">'
+    "<title>Inbox Assistant Analysis</title></head>\n<body>\n"
+)
+_HTML_DOCUMENT_FOOTER = "</body>\n</html>\n"
+
+Result = Union[Dict[str, Any], AnalysisResult]
+
+
+def _as_dict(result: Result) -> Dict[str, Any]:
+    if isinstance(result, AnalysisResult):
+        return result.to_dict()
+    return result
+
+
+def _write_terminal(output: Dict[str, Any], write: Callable[[str], Any]):
+    write(_TERMINAL_HEADER)
+    if "summary" in output:
+        write(_TERMINAL_SUMMARY(output["summary"]))
+    if "urgency" in output:
+        urgency = output["urgency"]
+        write(_TERMINAL_URGENCY(URGENCY_EMOJI.get(urgency, "⚪"), urgency))
+    if "tone" in output:
+        write(_TERMINAL_TONE(output["tone"]))
+    if "draft_reply" in output:
+        write(_TERMINAL_REPLY(output["draft_reply"]))
+    if "action_items" in output:
+        write("✅ ACTION ITEMS:\n")
+        items = output["action_items"]
+        if isinstance(items, list):
+            for i, item in enumerate(items, 1):
+                write(_TERMINAL_ITEM(i, item))
+        else:
+            write(f"  {items}\n")
+        write("\n")
+    write(_TERMINAL_FOOTER)
+
+
+def _write_markdown(output: Dict[str, Any], write: Callable[[str], Any]):
+    write("## Inbox Assistant Analysis\n\n")
+    if "summary" in output:
+        write(_MARKDOWN_SUMMARY(output["summary"]))
+    if "urgency" in output:
+        write(_MARKDOWN_URGENCY(output["urgency"]))
+    if "tone" in output:
+        tone = output["tone"]
+        write(_MARKDOWN_TONE(", ".join(tone) if isinstance(tone, list) else tone))
+    if "draft_reply" in output:
+        write(_MARKDOWN_REPLY(str(output["draft_reply"]).replace("\n", "\n> ")))
+    if "action_items" in output:
+        write("**Action items:**\n\n")
+        items = output["action_items"]
+        for item in items if isinstance(items, list) else [items]:
+            write(_MARKDOWN_ITEM(item))
+        write("\n")
+
+
+def _write_html(output: Dict[str, Any], write: Callable[[str], Any]):
+    escape = html.escape
+    write('<article class="analysis">\n')
+    if "summary" in output:
+        write(_HTML_SUMMARY(escape(str(output["summary"]))))
+    if "urgency" in output:
+        urgency = escape(str(output["urgency"]))
+        write(_HTML_URGENCY(urgency.lower(), urgency))
+    if "tone" in output:
+        tone = output["tone"]
+        write(_HTML_TONE(escape(", ".join(tone) if isinstance(tone, list) else str(tone))))
+    if "draft_reply" in output:
+        write(_HTML_REPLY(escape(str(output["draft_reply"]))))
+    if "action_items" in output:
+        write('<ul class="action-items">\n')
+        items = output["action_items"]
+        for item in items if isinstance(items, list) else [items]:
+            write(_HTML_ITEM(escape(str(item))))
+        write("</ul>\n")
+    write("</article>\n")
+
+
+def _write_json(output: Dict[str, Any], write: Callable[[str], Any]):
+    write(_JSON.encode(output))
+
+
+def _write_ndjson(output: Dict[str, Any], write: Callable[[str], Any]):
+    _write_json(output, write)
+    write("\n")
+
+
+_WRITERS = {
+    "terminal": _write_terminal,
+    "markdown": _write_markdown,
+    "html": _write_html,
+    "json": _write_json,
+    "ndjson": _write_ndjson
+}
+
+
+def _writer(fmt: str) -> Callable[[Dict[str, Any], Callable[[str], Any]], None]:
+    try:
+        return _WRITERS[fmt]
+    except KeyError:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}") from None
+
+
+def render_to(result: Result, out: TextIO, fmt: str = "terminal"):
+    """Write one result to a file-like object."""
+    _writer(fmt)(_as_dict(result), out.write)
+
+
+def render(result: Result, fmt: str = "terminal") -> str:
+    """Render one result to a string."""
+    buffer = io.StringIO()
+    render_to(result, buffer, fmt)
+    return buffer.getvalue()
+
+
+def render_many(results: Iterable[Result], fmt: str, out: TextIO) -> int:
+    """Stream results to a file-like object one at a time.
+
+    ``json`` writes a single array and ``html`` a single document; the other
+    formats concatenate per-result output. Returns the number written.
+    """
+    write_result = _writer(fmt)
+    write = out.write
+    count = 0
+
+    if fmt == "json":
+        write("[")
+    elif fmt == "html":
+        write(_HTML_DOCUMENT_HEADER)
+
+    for result in results:
+        if count:
+            if fmt == "json":
+                write(",")
+            elif fmt == "markdown":
+                write("---\n\n")
+        write_result(_as_dict(result), write)
+        count += 1
+
+    if fmt == "json":
+        write("]\n")
+    elif fmt == "html":
+        write(_HTML_DOCUMENT_FOOTER)
+    return count
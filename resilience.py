@@ -0,0 +1,170 @@
+"""
+Failure and tail-latency handling for Inbox Assistant model calls
+Per-agent circuit breakers, heuristic fallbacks and hedging delays
+"""
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from google.adk.models.llm_request import LlmRequest
+
+import config
+from keywords import scan
+from temporal import extract, message_received_at, urgency_signal
+from utils import extract_action_items, truncate_text
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+DEGRADED_SUMMARY_LENGTH = 280
+DEGRADED_REPLY = (
+    "Thank you for your message. We have received it and will get back to "
+    "you as soon as possible."
+)
+
+
+class CircuitBreaker:
+    """Stops calling a failing backend and probes it to recover.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    ``allow`` refuses calls for ``reset_timeout_s``. It then lets a single
+    probe through: success closes the breaker, failure reopens it, and a
+    probe that never finishes (cancelled) is released for the next call.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: Optional[int] = None,
+        reset_timeout_s: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.failure_threshold = failure_threshold or config.BREAKER_FAILURE_THRESHOLD
+        self.reset_timeout_s = (
+            config.BREAKER_RESET_TIMEOUT_S if reset_timeout_s is None else reset_timeout_s
+        )
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        """Return whether a call may be sent to the backend now."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and self.clock() - self.opened_at >= self.reset_timeout_s:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def release(self):
+        """Give up an unfinished call without counting it either way."""
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = self.clock()
+
+
+class LatencyTracker:
+    """Sliding window of an agent's call latencies used to time hedges.
+
+    ``hedge_delay`` is the ``quantile`` of recent latencies, so roughly
+    that share of calls finish before a duplicate would be sent. No delay
+    is reported until ``min_samples`` calls have been observed.
+    """
+
+    def __init__(
+        self,
+        window: int = 200,
+        quantile: Optional[float] = None,
+        min_samples: Optional[int] = None
+    ):
+        self.quantile = config.HEDGE_QUANTILE if quantile is None else quantile
+        self.min_samples = config.HEDGE_MIN_SAMPLES if min_samples is None else min_samples
+        self._samples = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, latency_s: float):
+        self._samples.append(latency_s)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Return how long to wait before hedging, or None to not hedge."""
+        if len(self._samples) < max(self.min_samples, 1):
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(self.quantile * len(ordered)))]
+
+
+def request_message(llm_request: LlmRequest) -> str:
+    """Recover the original message, the first user text in the request."""
+    for content in llm_request.contents or ():
+        if content.role == "user":
+            for part in content.parts or ():
+                if part.text:
+                    return part.text
+    return ""
+
+
+def heuristic_urgency(message: str, reference: Optional[datetime] = None) -> Dict[str, Any]:
+    """Classify urgency from urgency keywords and deadline phrases.
+
+    A deadline due by the day after ``reference`` (now by default) is High,
+    any other deadline Medium.
+    """
+    found = scan(message)
+    if found.urgency_keywords:
+        urgency = "High"
+        cues = found.urgency_keywords
+    elif found.deadlines:
+        signal = urgency_signal(extract(message, reference), reference)
+        urgency = "High" if signal == "High" else "Medium"
+        cues = found.deadlines
+    else:
+        return {"urgency": "Low", "reasoning": "Keyword heuristic: no urgency cues found."}
+    matched = ", ".join(dict.fromkeys(match.text.lower() for match in cues))
+    return {"urgency": urgency, "reasoning": f"Keyword heuristic: matched {matched}."}
+
+
+# Each takes the message and the time it was received (None for now).
+DEGRADED_OUTPUTS: Dict[str, Callable[[str, Optional[datetime]], Dict[str, Any]]] = {
+    "summarizer": lambda message, reference: {
+        "summary": truncate_text(" ".join(message.split()), DEGRADED_SUMMARY_LENGTH)
+    },
+    "urgency_classifier": heuristic_urgency,
+    "tone_analyzer": lambda message, reference: {
+        "tone": ["Neutral"], "formality": "Neutral", "sentiment": "Neutral"
+    },
+    "reply_generator": lambda message, reference: {
+        "draft_reply": DEGRADED_REPLY, "reply_tone": "Professional"
+    },
+    "next_step_planner": lambda message, reference: {
+        "action_items": extract_action_items(message)
+    }
+}
+
+
+def degraded_output(
+    agent_key: str, llm_request: LlmRequest, received_at: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """Heuristic stand-in for an agent's output when its model is unavailable.
+
+    Deadlines resolve against ``received_at``, or message_received_at when
+    it is not given.
+    """
+    reference = received_at or message_received_at.get()
+    return DEGRADED_OUTPUTS[agent_key](request_message(llm_request), reference)
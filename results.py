@@ -0,0 +1,248 @@
+"""
+Compact analysis result records for Inbox Assistant
+Enum-coded labels, coded tones and a message reference instead of copies
+"""
+import hashlib
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import TONE_CATEGORIES
+
+_TONE_BITS = {tone: 1 << i for i, tone in enumerate(TONE_CATEGORIES)}
+_TONE_DIGITS = {tone: i + 1 for i, tone in enumerate(TONE_CATEGORIES)}
+_TONE_BASE = len(TONE_CATEGORIES) + 1
+# Longer tone orders would not fit the archive's int16 column.
+MAX_ORDERED_TONES = 4
+
+# Result dict keys stored in dedicated slots; anything else goes to ``extra``.
+_SLOTTED_KEYS = frozenset({
+    "summary", "urgency", "reasoning", "tone", "formality", "sentiment",
+    "draft_reply", "reply_tone", "action_items", "language",
+    "message", "original_message"
+})
+
+
+class _LabeledEnum(IntEnum):
+    """Integer-coded enum that converts to and from title-case labels."""
+
+    @property
+    def label(self) -> str:
+        return self.name.capitalize()
+
+    @classmethod
+    def parse(cls, label: Optional[str]):
+        """Look up a member by label, returning None for unknown labels."""
+        if not label:
+            return None
+        return cls.__members__.get(str(label).strip().upper())
+
+
+class Urgency(_LabeledEnum):
+    """Urgency level, ordered so that higher values are more urgent."""
+
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+
+
+class Formality(_LabeledEnum):
+    """Formality level reported by the tone analyzer."""
+
+    NEUTRAL = 0
+    FORMAL = 1
+    INFORMAL = 2
+
+
+class Sentiment(_LabeledEnum):
+    """Sentiment reported by the tone analyzer."""
+
+    NEUTRAL = 0
+    POSITIVE = 1
+    NEGATIVE = 2
+
+
+def encode_tones(tones: Any) -> int:
+    """Encode tone labels as a bitmask over TONE_CATEGORIES, dropping unknowns."""
+    if isinstance(tones, str):
+        tones = [tones]
+    mask = 0
+    for tone in tones or ():
+        mask |= _TONE_BITS.get(tone, 0)
+    return mask
+
+
+def decode_tones(mask: int) -> List[str]:
+    """Decode a tone bitmask into labels in TONE_CATEGORIES order."""
+    return [tone for tone, bit in _TONE_BITS.items() if mask & bit]
+
+
+def encode_tone_order(tones: List[str]) -> Optional[int]:
+    """Pack known, distinct tones in their given order, or None if they cannot be."""
+    if len(tones) > MAX_ORDERED_TONES or len(set(tones)) != len(tones):
+        return None
+    code = 0
+    for tone in reversed(tones):
+        digit = _TONE_DIGITS.get(tone)
+        if digit is None:
+            return None
+        code = code * _TONE_BASE + digit
+    return code
+
+
+def decode_tone_order(code: int) -> List[str]:
+    """Unpack tones packed by encode_tone_order, primary first."""
+    tones = []
+    while code:
+        code, digit = divmod(code, _TONE_BASE)
+        tones.append(TONE_CATEGORIES[digit - 1])
+    return tones
+
+
+def message_digest(message: str) -> bytes:
+    """Stable 128-bit digest identifying a message body."""
+    return hashlib.blake2b(message.encode("utf-8"), digest_size=16).digest()
+
+
+class AnalysisResult:
+    """Slotted record of one analyzed message.
+
+    ``message`` references the caller's string rather than copying it and
+    can be dropped with ``release_message`` once only ``message_hash`` is
+    needed. ``message_hash`` is derived from ``message`` unless given, and
+    is None when neither is. Tones are kept as a bitmask for filtering,
+    plus ``tone_order`` when the list is not in TONE_CATEGORIES order, so
+    they come back primary first. Tone lists and labels the codes cannot
+    hold are kept as given in ``extra``, which to_dict applies last. Rarely
+    set fields live there too.
+    """
+
+    __slots__ = (
+        "message", "message_hash", "language", "summary", "urgency",
+        "reasoning", "tone_mask", "tone_order", "formality", "sentiment", "draft_reply",
+        "reply_tone", "action_items", "extra"
+    )
+
+    def __init__(
+        self,
+        message: Optional[str],
+        language: str = "en",
+        summary: Optional[str] = None,
+        urgency: Optional[Urgency] = None,
+        reasoning: Optional[str] = None,
+        tone_mask: Optional[int] = None,
+        formality: Optional[Formality] = None,
+        sentiment: Optional[Sentiment] = None,
+        draft_reply: Optional[str] = None,
+        reply_tone: Optional[str] = None,
+        action_items: Optional[Tuple[str, ...]] = None,
+        extra: Optional[Dict[str, Any]] = None,
+        message_hash: Optional[bytes] = None,
+        tone_order: Optional[int] = None
+    ):
+        if message_hash is None and message is not None:
+            message_hash = message_digest(message)
+        self.message = message
+        self.message_hash = message_hash
+        self.language = language
+        self.summary = summary
+        self.urgency = urgency
+        self.reasoning = reasoning
+        self.tone_mask = tone_mask
+        self.tone_order = tone_order
+        self.formality = formality
+        self.sentiment = sentiment
+        self.draft_reply = draft_reply
+        self.reply_tone = reply_tone
+        self.action_items = action_items
+        self.extra = extra
+
+    @classmethod
+    def from_dict(
+        cls, data: Dict[str, Any], message: Optional[str] = None
+    ) -> "AnalysisResult":
+        """Build a record from a legacy result dict or merged agent outputs."""
+        if message is None:
+            message = data.get("message") or data.get("original_message")
+        tone = data.get("tone")
+        action_items = data.get("action_items")
+        if isinstance(action_items, str):
+            action_items = [action_items]
+        extra = {key: value for key, value in data.items() if key not in _SLOTTED_KEYS}
+
+        tone_mask = tone_order = None
+        if tone is not None:
+            tone_mask = encode_tones(tone)
+            tones = [tone] if isinstance(tone, str) else list(tone)
+            if decode_tones(tone_mask) != tones:
+                tone_order = encode_tone_order(tones)
+                if tone_order is None:
+                    extra["tone"] = tones
+        coded = {}
+        for key, enum in (("urgency", Urgency), ("formality", Formality), ("sentiment", Sentiment)):
+            value = data.get(key)
+            coded[key] = enum.parse(value)
+            if value is not None and (coded[key] is None or coded[key].label != value):
+                extra[key] = value
+
+        return cls(
+            message=message,
+            language=data.get("language", "en"),
+            summary=data.get("summary"),
+            urgency=coded["urgency"],
+            reasoning=data.get("reasoning"),
+            tone_mask=tone_mask,
+            tone_order=tone_order,
+            formality=coded["formality"],
+            sentiment=coded["sentiment"],
+            draft_reply=data.get("draft_reply"),
+            reply_tone=data.get("reply_tone"),
+            action_items=None if action_items is None else tuple(action_items),
+            extra=extra or None
+        )
+
+    @property
+    def tones(self) -> List[str]:
+        if self.tone_order is not None:
+            return decode_tone_order(self.tone_order)
+        return decode_tones(self.tone_mask or 0)
+
+    def release_message(self):
+        """Drop the message reference, keeping only its hash."""
+        self.message = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the legacy result dict produced by process_message."""
+        data = {}
+        if self.summary is not None:
+            data["summary"] = self.summary
+        if self.urgency is not None:
+            data["urgency"] = self.urgency.label
+        if self.reasoning is not None:
+            data["reasoning"] = self.reasoning
+        if self.tone_mask is not None:
+            data["tone"] = self.tones
+        if self.formality is not None:
+            data["formality"] = self.formality.label
+        if self.sentiment is not None:
+            data["sentiment"] = self.sentiment.label
+        if self.draft_reply is not None:
+            data["draft_reply"] = self.draft_reply
+        if self.reply_tone is not None:
+            data["reply_tone"] = self.reply_tone
+        if self.action_items is not None:
+            data["action_items"] = list(self.action_items)
+        data["language"] = self.language
+        if self.message is not None:
+            data["original_message"] = self.message
+            data["message"] = self.message
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __repr__(self) -> str:
+        urgency = self.urgency.label if self.urgency is not None else None
+        digest = self.message_hash.hex()[:12] if self.message_hash is not None else None
+        return (
+            f"AnalysisResult(hash={digest}, "
+            f"urgency={urgency}, tones={self.tones})"
+        )
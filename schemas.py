@@ -0,0 +1,66 @@
+"""
+Structured output schemas for Inbox Assistant agents
+Passed to the model as response schemas and used to type agent results
+"""
+from typing import Dict, List, Literal, Type
+
+from pydantic import BaseModel, Field, field_validator
+
+from config import TONE_CATEGORIES
+
+ToneCategory = Literal[tuple(TONE_CATEGORIES)]
+
+
+class SummaryOutput(BaseModel):
+    """Output of the SummarizerAgent."""
+
+    summary: str = Field(description="Concise 2-4 sentence summary")
+
+
+class UrgencyOutput(BaseModel):
+    """Output of the UrgencyClassifierAgent."""
+
+    urgency: Literal["High", "Medium", "Low"]
+    reasoning: str = Field(default="", description="Brief explanation")
+
+    @field_validator("urgency", mode="before")
+    @classmethod
+    def _normalize_urgency(cls, value):
+        return value.strip().capitalize() if isinstance(value, str) else value
+
+
+class ToneOutput(BaseModel):
+    """Output of the ToneAnalyzerAgent."""
+
+    tone: List[ToneCategory] = Field(description="Primary and secondary tone")
+    formality: Literal["Formal", "Informal", "Neutral"] = "Neutral"
+    sentiment: Literal["Positive", "Negative", "Neutral"] = "Neutral"
+
+    @field_validator("tone", mode="before")
+    @classmethod
+    def _listify_tone(cls, value):
+        return [value] if isinstance(value, str) else value
+
+
+class ReplyOutput(BaseModel):
+    """Output of the ReplyGeneratorAgent."""
+
+    draft_reply: str = Field(description="Complete draft response body")
+    reply_tone: str = Field(default="", description="Tone of the response")
+
+
+class ActionItemsOutput(BaseModel):
+    """Output of the NextStepPlannerAgent."""
+
+    action_items: List[str] = Field(
+        description="Actionable tasks starting with a verb, with deadlines"
+    )
+
+
+AGENT_SCHEMAS: Dict[str, Type[BaseModel]] = {
+    "summarizer": SummaryOutput,
+    "urgency_classifier": UrgencyOutput,
+    "tone_analyzer": ToneOutput,
+    "reply_generator": ReplyOutput,
+    "next_step_planner": ActionItemsOutput
+}
@@ -0,0 +1,333 @@
+"""
+ASGI service for Inbox Assistant
+One shared InboxAssistant per process behind a micro-batching, bounded queue
+
+    uvicorn server:app --workers 4
+
+Endpoints:
+    POST /analyze          {"message": "..."} -> analysis result
+    POST /analyze/stream   {"message": "..."} -> NDJSON, one line per agent
+    GET  /health           queue, batching and per-tenant counters
+
+Requests may carry a "user_id", which is the tenant for fair scheduling,
+quotas and near-duplicate reuse.
+"""
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import config
+from config import DEFAULT_USER_ID
+from tenancy import QuotaExceeded
+from utils import detect_language, group_by_language
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+MAX_BODY_BYTES = 1 << 20
+
+
+class Overloaded(Exception):
+    """Raised when the request queue is full."""
+
+
+class BadRequest(Exception):
+    """Raised for malformed request bodies."""
+
+
+class MicroBatcher:
+    """Groups concurrent requests arriving within a short window.
+
+    Requests wait in a bounded queue; ``submit`` raises Overloaded instead of
+    queueing when it is full. The worker drains up to ``max_batch`` requests
+    per window, runs identical messages in a batch only once, and admits at
+    most ``concurrency`` pipeline runs at a time, so a saturated backend
+    fills the queue and turns into 429s rather than unbounded memory.
+    With language prompts on the assistant, each batch is dispatched
+    grouped by message language so runs sharing a prompt start together.
+    """
+
+    def __init__(
+        self,
+        assistant,
+        queue_size: Optional[int] = None,
+        max_batch: Optional[int] = None,
+        window_ms: Optional[float] = None,
+        concurrency: Optional[int] = None
+    ):
+        self.assistant = assistant
+        self.queue_size = queue_size or config.SERVER_QUEUE_SIZE
+        self.max_batch = max_batch or config.SERVER_MAX_BATCH
+        self.window_s = (config.SERVER_BATCH_WINDOW_MS if window_ms is None else window_ms) / 1000
+        self.concurrency = concurrency or config.SERVER_CONCURRENCY
+        self.counters = {"batches": 0, "requests": 0, "coalesced": 0, "rejected": 0}
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._tasks = set()
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        """Start the batching worker on the running event loop."""
+        if self._worker is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._slots = asyncio.Semaphore(self.concurrency)
+            self._worker = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """Stop the worker and wait for in-flight pipeline runs."""
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def reserve(self):
+        """Fail fast with Overloaded when no more work can be queued."""
+        self.start()
+        if self._queue.full():
+            self.counters["rejected"] += 1
+            raise Overloaded()
+
+    async def submit(self, message: str, user_id: str = DEFAULT_USER_ID) -> Dict[str, Any]:
+        """Queue a message and wait for its analysis."""
+        self.reserve()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((message, user_id, future))
+        self.counters["requests"] += 1
+        return await future
+
+    def slot(self) -> asyncio.Semaphore:
+        """Concurrency slot shared with requests that bypass batching."""
+        self.start()
+        return self._slots
+
+    async def _next_batch(self) -> List[Tuple[str, str, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window_s
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            self.counters["batches"] += 1
+
+            groups: Dict[Tuple[str, str], List[asyncio.Future]] = {}
+            for message, user_id, future in batch:
+                groups.setdefault((message, user_id), []).append(future)
+            self.counters["coalesced"] += len(batch) - len(groups)
+
+            keys = list(groups)
+            languages = [None] * len(keys)
+            if self.assistant.language_prompts and len(keys) > 1:
+                languages = [detect_language(message) for message, _ in keys]
+                positions = group_by_language(languages)
+            else:
+                positions = range(len(keys))
+
+            for position in positions:
+                (message, user_id), language = keys[position], languages[position]
+                await self._slots.acquire()
+                task = asyncio.ensure_future(
+                    self._process(message, user_id, groups[message, user_id], language)
+                )
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _process(
+        self,
+        message: str,
+        user_id: str,
+        futures: List[asyncio.Future],
+        language: Optional[str] = None
+    ):
+        try:
+            result = await self.assistant.process_message(
+                message, user_id=user_id, language=language
+            )
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future in futures:
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+
+class InboxAssistantServer:
+    """ASGI application serving one shared InboxAssistant."""
+
+    def __init__(self, assistant=None, batcher: Optional[MicroBatcher] = None):
+        if assistant is None:
+            from agent import InboxAssistant
+            from tenancy import TenantManager
+            assistant = InboxAssistant(tenants=TenantManager())
+        self.assistant = assistant
+        self.batcher = batcher or MicroBatcher(assistant)
+        self._streams_waiting = 0
+        self._routes = {
+            ("POST", "/analyze"): self._analyze,
+            ("POST", "/analyze/stream"): self._analyze_stream,
+            ("GET", "/health"): self._health
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        handler = self._routes.get((scope["method"], scope["path"]))
+        if handler is None:
+            known_path = any(path == scope["path"] for _, path in self._routes)
+            status = 405 if known_path else 404
+            await _send_json(send, status, {"error": "method not allowed" if known_path else "not found"})
+            return
+
+        try:
+            await handler(receive, send)
+        except Overloaded:
+            await _send_json(send, 429, {"error": "server overloaded"}, [(b"retry-after", b"1")])
+        except QuotaExceeded as e:
+            await _send_json(send, 429, {"error": str(e)}, [(b"retry-after", b"60")])
+        except BadRequest as e:
+            await _send_json(send, 400, {"error": str(e)})
+
+    async def _lifespan(self, receive: Receive, send: Send):
+        while True:
+            event = await receive()
+            if event["type"] == "lifespan.startup":
+                self.assistant.warmup()
+                self.batcher.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif event["type"] == "lifespan.shutdown":
+                await self.batcher.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _analyze(self, receive: Receive, send: Send):
+        request = await _read_json(receive)
+        try:
+            result = await self.batcher.submit(
+                request["message"], request.get("user_id", DEFAULT_USER_ID)
+            )
+        except (Overloaded, QuotaExceeded):
+            raise
+        except Exception as e:
+            await _send_json(send, 502, {"error": f"{type(e).__name__}: {e}"})
+            return
+        await _send_json(send, 200, result)
+
+    async def _analyze_stream(self, receive: Receive, send: Send):
+        request = await _read_json(receive)
+        self.batcher.reserve()
+        if self._streams_waiting >= self.batcher.queue_size:
+            self.batcher.counters["rejected"] += 1
+            raise Overloaded()
+
+        self._streams_waiting += 1
+        try:
+            await self.batcher.slot().acquire()
+        finally:
+            self._streams_waiting -= 1
+
+        # The response starts with the first agent output, so a tenant over
+        # quota still gets a plain 429.
+        started = False
+
+        async def start():
+            nonlocal started
+            if not started:
+                started = True
+                await send({
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson")]
+                })
+
+        try:
+            try:
+                async for key, value in self.assistant.stream_message(
+                    request["message"], user_id=request.get("user_id", DEFAULT_USER_ID)
+                ):
+                    await start()
+                    line = {"result": value} if key == "result" else {"agent": key, "output": value}
+                    await _send_chunk(send, line)
+            except QuotaExceeded:
+                raise
+            except Exception as e:
+                await start()
+                await _send_chunk(send, {"error": f"{type(e).__name__}: {e}"})
+            await start()
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            self.batcher.slot().release()
+
+    async def _health(self, receive: Receive, send: Send):
+        tenants = getattr(self.assistant, "tenants", None)
+        await _send_json(send, 200, {
+            "status": "ok",
+            "queued": self.batcher.queued,
+            "streams_waiting": self._streams_waiting,
+            **self.batcher.counters,
+            "tenants": tenants.snapshot() if tenants is not None else {}
+        })
+
+
+async def _read_json(receive: Receive) -> Dict[str, Any]:
+    body = bytearray()
+    while True:
+        event = await receive()
+        body += event.get("body", b"")
+        if len(body) > MAX_BODY_BYTES:
+            raise BadRequest("request body too large")
+        if not event.get("more_body"):
+            break
+    try:
+        request = json.loads(body)
+    except ValueError:
+        raise BadRequest("request body is not valid JSON") from None
+    if not isinstance(request, dict) or not isinstance(request.get("message"), str):
+        raise BadRequest("expected a JSON object with a 'message' string")
+    return request
+
+
+async def _send_json(
+    send: Send, status: int, payload: Any, headers: Optional[List[Tuple[bytes, bytes]]] = None
+):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode())
+        ] + (headers or [])
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_chunk(send: Send, payload: Any):
+    line = json.dumps(payload, ensure_ascii=False, separators=(",", ":")) + "\n"
+    await send({"type": "http.response.body", "body": line.encode("utf-8"), "more_body": True})
+
+
+app = InboxAssistantServer()
@@ -0,0 +1,88 @@
+"""
+Deterministic stand-in for the Gemini backend
+Lets tests and benchmarks run the agent pipeline offline
+"""
+import asyncio
+import json
+from collections import defaultdict
+from typing import Any, AsyncGenerator, Callable, Dict, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai.types import Content, GenerateContentResponseUsageMetadata, Part
+from pydantic import Field
+
+DEFAULT_RESPONSES = {
+    "SummarizerAgent": {"summary": "The sender reports an issue and asks for a response."},
+    "UrgencyClassifierAgent": {"urgency": "Medium", "reasoning": "Needs a response soon."},
+    "ToneAnalyzerAgent": {
+        "tone": ["Professional", "Polite"],
+        "formality": "Formal",
+        "sentiment": "Neutral"
+    },
+    "ReplyGeneratorAgent": {
+        "draft_reply": "Thanks for reaching out, I will look into this.",
+        "reply_tone": "Professional"
+    },
+    "NextStepPlannerAgent": {"action_items": ["Respond to the sender"]}
+}
+
+
+def request_agent_name(llm_request: LlmRequest) -> str:
+    """Find the agent name ADK embeds in the system instruction."""
+    instruction = str(llm_request.config.system_instruction or "")
+    marker = 'Your internal name is "'
+    start = instruction.find(marker)
+    if start < 0:
+        return ""
+    start += len(marker)
+    return instruction[start:instruction.find('"', start)]
+
+
+class StubLlm(BaseLlm):
+    """Returns canned responses per agent, optionally after a simulated delay.
+
+    ``latency_fn``, if given, draws the delay for each call instead of
+    ``latency_s``. Set ``fail`` to simulate a backend outage. A callable
+    response is called with the request to produce the payload. With
+    ``usage``, responses carry token counts estimated at four characters
+    per token.
+    """
+
+    model: str = "stub"
+    responses: Dict[str, Any] = Field(default_factory=dict)
+    latency_s: float = 0.0
+    latency_fn: Optional[Callable[[], float]] = None
+    fail: bool = False
+    usage: bool = False
+    calls: Dict[str, int] = Field(default_factory=lambda: defaultdict(int))
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        agent_name = request_agent_name(llm_request)
+        self.calls[agent_name] += 1
+        latency_s = self.latency_fn() if self.latency_fn else self.latency_s
+        if latency_s:
+            await asyncio.sleep(latency_s)
+        if self.fail:
+            raise ConnectionError("stub backend unavailable")
+
+        payload = self.responses.get(agent_name, DEFAULT_RESPONSES.get(agent_name, {}))
+        if callable(payload):
+            payload = payload(llm_request)
+        text = payload if isinstance(payload, str) else json.dumps(payload)
+        usage_metadata = None
+        if self.usage:
+            prompt = str(llm_request.config.system_instruction or "") + "".join(
+                part.text or "" for content in llm_request.contents for part in content.parts or ()
+            )
+            usage_metadata = GenerateContentResponseUsageMetadata(
+                prompt_token_count=len(prompt) // 4,
+                candidates_token_count=len(text) // 4
+            )
+        yield LlmResponse(
+            content=Content(role="model", parts=[Part(text=text)]),
+            usage_metadata=usage_metadata
+        )
@@ -0,0 +1,350 @@
+"""
+Cross-message task index for Inbox Assistant
+Normalized action items, token-set deduplication and inverted indexes
+"""
+import bisect
+import math
+import re
+from array import array
+from datetime import date, datetime
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import config
+from keywords import ACTION_VERBS, iter_matches
+from temporal import resolve
+
+STOPWORDS = frozenset({
+    "a", "an", "the", "to", "for", "of", "on", "in", "at", "by", "with", "and",
+    "or", "about", "from", "into", "before", "until", "due", "our", "your",
+    "my", "their", "his", "her", "its", "this", "that", "these", "those",
+    "all", "any", "some", "please", "it", "them", "us", "me", "be", "is", "are"
+})
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _verb_forms() -> Dict[str, str]:
+    """Map inflected action verbs ("sends", "scheduled", ...) to their base form."""
+    forms = {}
+    for verb in ACTION_VERBS:
+        head, _, rest = verb.partition(" ")
+        stem = head[:-1] if head.endswith("e") else head
+        doubled = head + head[-1]
+        for form in (head, head + "s", head + "es", head + "d", head + "ed", stem + "ed",
+                     stem + "ing", head + "ing", doubled + "ed", doubled + "ing"):
+            forms[form + (" " + rest if rest else "")] = verb
+    return forms
+
+
+_VERB_FORMS = _verb_forms()
+
+
+def _stem(token: str) -> str:
+    """Strip a plural "s" so that "reports" and "report" share postings."""
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+class NormalizedTask(NamedTuple):
+    """An action item reduced to its verb, object tokens and deadline."""
+
+    verb: Optional[str]
+    tokens: FrozenSet[str]
+    deadline: Optional[date]
+
+
+def normalize_action_item(
+    text: str, reference: Optional[Union[date, datetime]] = None
+) -> NormalizedTask:
+    """Split an action item into a base verb, object tokens and a deadline date.
+
+    The deadline phrase is removed before tokenizing, so the same task with
+    a different due date still normalizes to the same tokens. Relative
+    deadlines are resolved against ``reference``, the message timestamp.
+    """
+    reference = reference or datetime.now()
+    deadline = None
+    pieces = []
+    position = 0
+    for match in iter_matches(text):
+        if match.kind == "deadline":
+            if deadline is None:
+                due = resolve(match.text, reference)
+                deadline = due.date() if due else None
+            pieces.append(text[position:match.start])
+            position = match.end
+    pieces.append(text[position:])
+
+    words = _WORD_RE.findall(" ".join(pieces).lower())
+    start = 0
+    while start < len(words) and words[start] in STOPWORDS:
+        start += 1
+    words = words[start:]
+    verb = None
+    if words:
+        two_words = " ".join(words[:2])
+        if two_words in _VERB_FORMS:
+            verb, words = _VERB_FORMS[two_words], words[2:]
+        else:
+            verb, words = _VERB_FORMS.get(words[0], words[0]), words[1:]
+
+    tokens = frozenset(_stem(word) for word in words if word not in STOPWORDS)
+    return NormalizedTask(verb, tokens, deadline)
+
+
+def token_set_similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Jaccard similarity of two token sets."""
+    if not a and not b:
+        return 1.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+class Task:
+    """A deduplicated task and every message that asked for it."""
+
+    __slots__ = (
+        "task_id", "text", "verb", "tokens", "deadline", "owner",
+        "thread_ids", "message_ids", "mentions", "done"
+    )
+
+    def __init__(
+        self,
+        task_id: int,
+        text: str,
+        normalized: NormalizedTask,
+        owner: Optional[str] = None
+    ):
+        self.task_id = task_id
+        self.text = text
+        self.verb = normalized.verb
+        self.tokens = normalized.tokens
+        self.deadline = normalized.deadline
+        self.owner = owner
+        self.thread_ids: List[str] = []
+        self.message_ids: List[str] = []
+        self.mentions = 0
+        self.done = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "task_id": self.task_id,
+            "text": self.text,
+            "verb": self.verb,
+            "deadline": self.deadline.isoformat() if self.deadline else None,
+            "owner": self.owner,
+            "thread_ids": list(self.thread_ids),
+            "message_ids": list(self.message_ids),
+            "mentions": self.mentions,
+            "done": self.done
+        }
+
+    def __repr__(self) -> str:
+        return f"Task({self.task_id}, {self.text!r}, deadline={self.deadline}, mentions={self.mentions})"
+
+
+class TaskIndex:
+    """Open tasks across messages, deduplicated and indexed for lookup.
+
+    Each action item is normalized and merged into an open task of the same
+    owner and verb whose object tokens have a Jaccard similarity of at
+    least ``threshold``. Candidates come from postings keyed by verb and
+    token: a match must contain one of the ``n - ceil(threshold * n) + 1``
+    rarest tokens of an ``n``-token object, so only those postings are read
+    and an update stays cheap as the index grows.
+
+    Tasks are looked up by keyword, deadline range and thread through
+    ``query``. A merged task takes the deadline of the latest mention that
+    gives one.
+    """
+
+    def __init__(self, threshold: Optional[float] = None):
+        if threshold is None:
+            threshold = config.TASK_DEDUP_THRESHOLD
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self._tasks: List[Task] = []
+        self._postings: Dict[str, array] = {}
+        self._dedup_postings: Dict[Tuple[Optional[str], str], array] = {}
+        self._by_deadline: Dict[int, array] = {}
+        self._deadline_days: List[int] = []
+        self._by_thread: Dict[str, array] = {}
+        self._by_owner: Dict[Optional[str], array] = {}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def get(self, task_id: int) -> Task:
+        return self._tasks[task_id]
+
+    def find_duplicate(
+        self, normalized: NormalizedTask, owner: Optional[str] = None
+    ) -> Optional[Task]:
+        """Return the most similar open task of ``owner`` above the threshold."""
+        tokens = normalized.tokens
+        size = len(tokens)
+        keys = [(normalized.verb, token) for token in tokens or ("",)]
+        postings = self._dedup_postings
+        keys.sort(key=lambda key: len(postings.get(key, ())))
+        probe = max(size - math.ceil(self.threshold * size - 1e-9) + 1, 1)
+        min_size = self.threshold * size - 1e-9
+        max_size = size / self.threshold + 1e-9
+
+        best, best_score = None, self.threshold - 1e-9
+        seen = set()
+        for key in keys[:probe]:
+            for task_id in postings.get(key, ()):
+                if task_id in seen:
+                    continue
+                seen.add(task_id)
+                task = self._tasks[task_id]
+                if task.done or task.owner != owner or not min_size <= len(task.tokens) <= max_size:
+                    continue
+                score = token_set_similarity(tokens, task.tokens)
+                if score > best_score:
+                    best, best_score = task, score
+        return best
+
+    def add(
+        self,
+        text: str,
+        message_id: Optional[str] = None,
+        thread_id: Optional[str] = None,
+        owner: Optional[str] = None,
+        received_at: Optional[Union[date, datetime]] = None
+    ) -> Task:
+        """Merge an action item into a matching open task or index a new one."""
+        normalized = normalize_action_item(text, received_at)
+        task = self.find_duplicate(normalized, owner)
+        if task is None:
+            task = Task(len(self._tasks), text.strip(), normalized, owner)
+            self._tasks.append(task)
+            for token in normalized.tokens:
+                self._append(self._postings, token, task.task_id)
+                self._append(self._dedup_postings, (task.verb, token), task.task_id)
+            if not normalized.tokens:
+                self._append(self._dedup_postings, (task.verb, ""), task.task_id)
+            if task.verb is not None:
+                self._append(self._postings, task.verb, task.task_id)
+            self._append(self._by_owner, owner, task.task_id)
+            self._index_deadline(task)
+        elif normalized.deadline is not None and normalized.deadline != task.deadline:
+            task.deadline = normalized.deadline
+            self._index_deadline(task)
+
+        task.mentions += 1
+        if message_id is not None:
+            task.message_ids.append(message_id)
+        if thread_id is not None and thread_id not in task.thread_ids:
+            task.thread_ids.append(thread_id)
+            self._append(self._by_thread, thread_id, task.task_id)
+        return task
+
+    def add_items(
+        self,
+        items: Iterable[str],
+        message_id: Optional[str] = None,
+        thread_id: Optional[str] = None,
+        owner: Optional[str] = None,
+        received_at: Optional[Union[date, datetime]] = None
+    ) -> List[Task]:
+        """Index the action items of one analyzed message."""
+        return [
+            self.add(item, message_id, thread_id, owner, received_at)
+            for item in items if item and item.strip()
+        ]
+
+    def complete(self, task_id: int):
+        """Mark a task as done so it no longer absorbs new mentions."""
+        self._tasks[task_id].done = True
+
+    @staticmethod
+    def _append(index: Dict[Any, array], key: Any, task_id: int):
+        ids = index.get(key)
+        if ids is None:
+            ids = index[key] = array("q")
+        ids.append(task_id)
+
+    def _index_deadline(self, task: Task):
+        if task.deadline is None:
+            return
+        day = task.deadline.toordinal()
+        if day not in self._by_deadline:
+            bisect.insort(self._deadline_days, day)
+        self._append(self._by_deadline, day, task.task_id)
+
+    def _deadline_ids(self, due_from: Optional[date], due_to: Optional[date]) -> Iterable[int]:
+        low = bisect.bisect_left(self._deadline_days, due_from.toordinal()) if due_from else 0
+        high = (
+            bisect.bisect_right(self._deadline_days, due_to.toordinal())
+            if due_to else len(self._deadline_days)
+        )
+        for day in self._deadline_days[low:high]:
+            yield from self._by_deadline[day]
+
+    def query(
+        self,
+        keywords: Optional[Union[str, Iterable[str]]] = None,
+        due_from: Optional[date] = None,
+        due_to: Optional[date] = None,
+        thread_id: Optional[str] = None,
+        owner: Optional[str] = None,
+        include_done: bool = False,
+        limit: Optional[int] = None
+    ) -> List[Task]:
+        """Return tasks matching every given filter, most mentioned first.
+
+        ``keywords`` must all appear in the task (verbs in any inflection).
+        The deadline range is inclusive; with a range set, tasks without a
+        deadline are excluded.
+        """
+        tokens = set()
+        if keywords is not None:
+            if isinstance(keywords, str):
+                keywords = keywords.split()
+            for word in keywords:
+                word = word.lower()
+                tokens.add(_VERB_FORMS.get(word) or _stem(word))
+
+        # Drive the scan from the shortest postings list and check the other
+        # filters on each task, so a common keyword never gets iterated.
+        candidates: List[Any] = [self._postings.get(token, ()) for token in tokens]
+        if thread_id is not None:
+            candidates.append(self._by_thread.get(thread_id, ()))
+        if owner is not None:
+            candidates.append(self._by_owner.get(owner, ()))
+        ranged = due_from is not None or due_to is not None
+        if candidates:
+            driver = min(candidates, key=len)
+        elif ranged:
+            driver = self._deadline_ids(due_from, due_to)
+        else:
+            driver = range(len(self._tasks))
+
+        tasks = []
+        seen = set()
+        for task_id in driver:
+            if task_id in seen:
+                continue
+            seen.add(task_id)
+            task = self._tasks[task_id]
+            if task.done and not include_done:
+                continue
+            if owner is not None and task.owner != owner:
+                continue
+            if thread_id is not None and thread_id not in task.thread_ids:
+                continue
+            if any(token != task.verb and token not in task.tokens for token in tokens):
+                continue
+            if ranged:
+                if task.deadline is None:
+                    continue
+                if due_from is not None and task.deadline < due_from:
+                    continue
+                if due_to is not None and task.deadline > due_to:
+                    continue
+            tasks.append(task)
+        tasks.sort(key=lambda task: (-task.mentions, task.task_id))
+        return tasks[:limit] if limit is not None else tasks
@@ -0,0 +1,285 @@
+"""
+Temporal expression extraction for Inbox Assistant
+Resolves deadline phrases against the message timestamp without a model call
+"""
+import re
+from contextvars import ContextVar
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Union
+
+from keywords import iter_matches
+
+# Clock times that vague phrases resolve to: "EOD" and bare days mean the
+# end of the working day. A daypart that has passed on the day it names is
+# dropped, except "noon" and "midnight" on their own, which roll forward
+# to the next day like clock times.
+END_OF_DAY = time(17, 0)
+DAYPART_TIMES = {
+    "morning": time(9, 0),
+    "noon": time(12, 0),
+    "afternoon": time(15, 0),
+    "evening": time(19, 0),
+    "night": time(21, 0),
+    "tonight": time(21, 0),
+    "midnight": time(23, 59)
+}
+
+# When the message being processed was received, for code that resolves
+# deadlines without being handed the message (degraded model outputs).
+message_received_at: ContextVar[Optional[datetime]] = ContextVar(
+    "message_received_at", default=None
+)
+
+# Deadlines at most this many calendar days after the message are a High
+# urgency signal, within URGENCY_MEDIUM_DAYS a Medium one.
+URGENCY_HIGH_DAYS = 1
+URGENCY_MEDIUM_DAYS = 7
+
+# A clock time this close after a date ("by Friday at 3pm") refines it.
+_MERGE_GAP = re.compile(r"[\s,]*$")
+
+_WEEKDAY_NUMBERS = {
+    name: number for number, name in enumerate(
+        ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+    )
+}
+_MONTH_NUMBERS = {
+    name: number for number, name in enumerate(
+        ("jan", "feb", "mar", "apr", "may", "jun",
+         "jul", "aug", "sep", "oct", "nov", "dec"), start=1
+    )
+}
+_CLOCK_RE = re.compile(r"(?:at )?(\d{1,2})(?::(\d{2}))? ?(am|pm)?$")
+_NUMERIC_DATE_RE = re.compile(r"(\d{1,2})[/-](\d{1,2})(?:[/-](\d{2,4}))?$")
+_MONTH_DATE_RE = re.compile(r"([a-z]+) (\d{1,2})(?:st|nd|rd|th)?(?:-\d{1,2})?(?:,? (\d{4}))?$")
+_RELATIVE_RE = re.compile(r"(?:within|in) (\d+) (min|hour|hr|day|week)")
+_RELATIVE_UNITS = {
+    "min": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "hr": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1)
+}
+
+
+class TemporalExpression(NamedTuple):
+    """A deadline phrase in a message and the moment it resolves to."""
+
+    text: str
+    start: int
+    end: int
+    due: datetime
+    has_time: bool
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"text": self.text, "due": self.due.isoformat(timespec="minutes")}
+
+
+def _at(day: date, clock: time, reference: datetime) -> datetime:
+    return datetime.combine(day, clock, tzinfo=reference.tzinfo)
+
+
+def _end_of_month(day: date) -> date:
+    following = day.replace(day=28) + timedelta(days=4)
+    return following - timedelta(days=following.day)
+
+
+def _end_of_quarter(day: date) -> date:
+    return _end_of_month(day.replace(month=(day.month - 1) // 3 * 3 + 3, day=1))
+
+
+def _calendar_date(reference: datetime, month: int, day: int, year: Optional[str]) -> Optional[date]:
+    """Build a date, taking the next occurrence when the year is omitted."""
+    try:
+        if year is not None:
+            year_number = int(year)
+            return date(year_number + 2000 if year_number < 100 else year_number, month, day)
+        candidate = date(reference.year, month, day)
+        if candidate < reference.date() - timedelta(days=30):
+            candidate = candidate.replace(year=reference.year + 1)
+        return candidate
+    except ValueError:
+        return None
+
+
+def _resolve_clock(phrase: str, reference: datetime) -> Optional[datetime]:
+    """Resolve "3pm" or "14:30" to its next occurrence after ``reference``."""
+    match = _CLOCK_RE.match(phrase)
+    if not match or (match.group(2) is None and match.group(3) is None):
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    if match.group(3) == "pm" and hour < 12:
+        hour += 12
+    elif match.group(3) == "am" and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    due = _at(reference.date(), time(hour, minute), reference)
+    return due if due >= reference else due + timedelta(days=1)
+
+
+def _resolve_day(phrase: str, reference: datetime) -> Optional[date]:
+    """Resolve a phrase naming a day to that date."""
+    today = reference.date()
+    if phrase in ("today", "tonight", "noon", "midnight", "eod", "cob"):
+        return today
+    if phrase == "tomorrow":
+        return today + timedelta(days=1)
+
+    words = phrase.split()
+    if words[-1] in _WEEKDAY_NUMBERS:
+        ahead = (_WEEKDAY_NUMBERS[words[-1]] - today.weekday()) % 7
+        if words[0] == "next" and ahead == 0:
+            ahead = 7
+        return today + timedelta(days=ahead)
+
+    if phrase.startswith("end of ") or phrase in ("eow", "eom"):
+        period = words[-1]
+        upcoming = len(words) == 4 and words[2] == "next"
+        if phrase == "eow" or period == "week":
+            friday = today + timedelta(days=(4 - today.weekday()) % 7)
+            return friday + timedelta(weeks=1) if upcoming else friday
+        if phrase == "eom" or period == "month":
+            end = _end_of_month(today)
+            return _end_of_month(end + timedelta(days=1)) if upcoming else end
+        if period == "quarter":
+            end = _end_of_quarter(today)
+            return _end_of_quarter(end + timedelta(days=1)) if upcoming else end
+        return today
+
+    try:
+        return date.fromisoformat(phrase)
+    except ValueError:
+        pass
+    match = _NUMERIC_DATE_RE.match(phrase)
+    if match:
+        return _calendar_date(reference, int(match.group(1)), int(match.group(2)), match.group(3))
+    match = _MONTH_DATE_RE.match(phrase)
+    if match and match.group(1)[:3] in _MONTH_NUMBERS:
+        return _calendar_date(
+            reference, _MONTH_NUMBERS[match.group(1)[:3]], int(match.group(2)), match.group(3)
+        )
+    return None
+
+
+def _resolve(phrase: str, reference: datetime) -> Optional[TemporalExpression]:
+    text = phrase
+    phrase = " ".join(phrase.lower().split())
+    for prefix in ("by ", "before ", "until ", "due "):
+        if phrase.startswith(prefix):
+            phrase = phrase[len(prefix):]
+            break
+
+    match = _RELATIVE_RE.match(phrase)
+    if match:
+        due = reference + int(match.group(1)) * _RELATIVE_UNITS[match.group(2)]
+        return TemporalExpression(text, 0, 0, due, True)
+
+    due = _resolve_clock(phrase, reference)
+    if due is not None:
+        return TemporalExpression(text, 0, 0, due, True)
+
+    clock = END_OF_DAY
+    words = phrase.split()
+    if words[-1] in DAYPART_TIMES:
+        clock = DAYPART_TIMES[words[-1]]
+        if len(words) > 1:
+            phrase = "today" if words[:-1] == ["this"] else " ".join(words[:-1])
+    day = _resolve_day(phrase, reference)
+    if day is None:
+        return None
+    due = _at(day, clock, reference)
+    if clock is not END_OF_DAY and due < reference:
+        if phrase not in ("noon", "midnight"):
+            return None
+        due += timedelta(days=1)
+    return TemporalExpression(text, 0, 0, due, clock is not END_OF_DAY)
+
+
+def resolve(
+    phrase: str, reference: Optional[Union[date, datetime]] = None
+) -> Optional[datetime]:
+    """Resolve one deadline phrase ("EOD", "next Tuesday", ...) against ``reference``.
+
+    Days without a clock time resolve to END_OF_DAY. Returns None for
+    phrases that cannot be resolved, such as an invalid calendar date.
+    """
+    expression = _resolve(phrase, _as_datetime(reference))
+    return expression.due if expression else None
+
+
+def _as_datetime(reference: Optional[Union[date, datetime]]) -> datetime:
+    if reference is None:
+        return datetime.now()
+    if not isinstance(reference, datetime):
+        return datetime.combine(reference, time(0, 0))
+    return reference
+
+
+def extract(
+    text: str, reference: Optional[Union[date, datetime]] = None
+) -> List[TemporalExpression]:
+    """Find and resolve every deadline in a message, in text order.
+
+    ``reference`` is the message timestamp and defaults to now. A clock
+    time right after a day ("by Friday at 3pm") refines that day's
+    expression instead of producing a second one. Otherwise a clock time
+    is only a deadline with a cue such as "by"; "meet at 10am" is not.
+    """
+    reference = _as_datetime(reference)
+    expressions: List[TemporalExpression] = []
+    for match in iter_matches(text):
+        if match.kind != "deadline":
+            continue
+        expression = _resolve(match.text, reference)
+        if expression is None:
+            continue
+        expression = expression._replace(start=match.start, end=match.end)
+
+        if expressions and expression.has_time and not _RELATIVE_RE.match(match.text.lower()):
+            previous = expressions[-1]
+            if not previous.has_time and _MERGE_GAP.match(text, previous.end, match.start):
+                expressions[-1] = previous._replace(
+                    text=text[previous.start:match.end],
+                    end=match.end,
+                    due=previous.due.replace(hour=expression.due.hour, minute=expression.due.minute),
+                    has_time=True
+                )
+                continue
+        if match.text.lower().startswith("at "):
+            continue
+        expressions.append(expression)
+    return expressions
+
+
+def earliest_due(expressions: Iterable[TemporalExpression]) -> Optional[datetime]:
+    """The soonest deadline among the expressions, if any."""
+    return min((expression.due for expression in expressions), default=None)
+
+
+def urgency_signal(
+    expressions: Iterable[TemporalExpression], reference: Optional[Union[date, datetime]] = None
+) -> Optional[str]:
+    """Urgency implied by the soonest deadline: High by tomorrow, Medium within a week.
+
+    Returns None when the message has no deadline, which says nothing
+    about its urgency either way.
+    """
+    due = earliest_due(expressions)
+    if due is None:
+        return None
+    days = (due.date() - _as_datetime(reference).date()).days
+    if days <= URGENCY_HIGH_DAYS:
+        return "High"
+    if days <= URGENCY_MEDIUM_DAYS:
+        return "Medium"
+    return "Low"
+
+
+def describe(expressions: Iterable[TemporalExpression], reference: datetime) -> str:
+    """One line listing resolved deadlines, for the model's context."""
+    resolved = ", ".join(
+        f"\"{expression.text}\" = {expression.due.strftime('%a %Y-%m-%d %H:%M')}"
+        for expression in expressions
+    )
+    return f"Resolved deadlines (message sent {reference.strftime('%a %Y-%m-%d %H:%M')}): {resolved}"
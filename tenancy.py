@@ -0,0 +1,229 @@
+"""
+Tenant isolation for Inbox Assistant
+Weighted fair scheduling, per-tenant quotas, cache namespaces and metrics
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Optional
+
+import config
+from dedup import NearDuplicateIndex
+
+if TYPE_CHECKING:
+    from exemplars import ExemplarIndex
+
+
+class QuotaExceeded(Exception):
+    """Raised when a tenant is over its request or token quota."""
+
+    def __init__(self, tenant: str, kind: str):
+        super().__init__(f"tenant {tenant!r} exceeded its {kind} quota")
+        self.tenant = tenant
+        self.kind = kind
+
+
+class TokenBucket:
+    """Refilling allowance of ``rate_per_minute`` units, bursting up to one minute's worth."""
+
+    def __init__(self, rate_per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = rate_per_minute
+        self.rate_per_s = rate_per_minute / 60.0
+        self.clock = clock
+        self.tokens = rate_per_minute
+        self.updated = clock()
+
+    def try_take(self, amount: float) -> bool:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate_per_s)
+        self.updated = now
+        if amount > self.tokens:
+            return False
+        self.tokens -= amount
+        return True
+
+
+class FairScheduler:
+    """Grants ``concurrency`` slots in weighted fair queuing order.
+
+    Each request gets a virtual finish tag ``max(tenant's last tag, virtual
+    clock) + cost / weight`` and waiting requests are served smallest tag
+    first. A tenant with a deep backlog only pushes its own tags further
+    out, so other tenants' requests keep getting slots. With ``fair`` unset
+    requests are served first come, first served.
+    """
+
+    def __init__(self, concurrency: int, fair: bool = True):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.concurrency = concurrency
+        self.fair = fair
+        self.active = 0
+        self._virtual_time = 0.0
+        self._last_tag: Dict[str, float] = defaultdict(float)
+        self._waiting = []
+        self._sequence = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiting)
+
+    def _tag(self, tenant: str, cost: float, weight: float) -> float:
+        if not self.fair:
+            return 0.0
+        tag = max(self._last_tag[tenant], self._virtual_time) + cost / weight
+        self._last_tag[tenant] = tag
+        return tag
+
+    async def acquire(self, tenant: str, cost: float = 1.0, weight: float = 1.0):
+        """Wait for a slot; ``cost`` / ``weight`` is the tenant's virtual charge."""
+        tag = self._tag(tenant, cost, weight)
+        if self.active < self.concurrency and not self._waiting:
+            self.active += 1
+            self._virtual_time = max(self._virtual_time, tag - cost / weight)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [tag, next(self._sequence), future, cost / weight]
+        heapq.heappush(self._waiting, entry)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                entry[2] = None
+            raise
+
+    def release(self):
+        """Hand the slot to the waiting request with the smallest tag."""
+        while self._waiting:
+            tag, _, future, charge = heapq.heappop(self._waiting)
+            if future is None or future.done():
+                continue
+            self._virtual_time = max(self._virtual_time, tag - charge)
+            future.set_result(None)
+            return
+        self.active -= 1
+
+
+class TenantManager:
+    """Per-tenant scheduling, quotas, near-duplicate namespaces and metrics.
+
+    Tenants are identified by ``user_id``. ``weights`` give tenants a larger
+    share of the ``concurrency`` pipeline slots. Quotas are per minute;
+    a request is charged its message's estimated tokens once per agent.
+    Each tenant gets its own NearDuplicateIndex and ExemplarIndex, so
+    analyses and accepted replies are never reused across tenants.
+    """
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        weights: Optional[Dict[str, float]] = None,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        dedup: bool = False,
+        fair: bool = True,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.scheduler = FairScheduler(concurrency or config.TENANT_CONCURRENCY, fair=fair)
+        self.weights = dict(weights or {})
+        self.requests_per_minute = (
+            config.TENANT_REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute
+        )
+        self.tokens_per_minute = (
+            config.TENANT_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute
+        )
+        self.dedup = dedup
+        self.clock = clock
+        self._request_buckets: Dict[str, TokenBucket] = {}
+        self._token_buckets: Dict[str, TokenBucket] = {}
+        self._dedup_indexes: Dict[str, NearDuplicateIndex] = {}
+        self._exemplar_indexes: Dict[str, "ExemplarIndex"] = {}
+        self.metrics: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
+            "requests": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "tokens": 0,
+            "queue_wait_s": 0.0,
+            "max_queue_wait_s": 0.0,
+            "latency_s": 0.0
+        })
+
+    def weight(self, tenant: str) -> float:
+        return self.weights.get(tenant, 1.0)
+
+    def dedup_index(self, tenant: str) -> Optional[NearDuplicateIndex]:
+        """The tenant's near-duplicate index, or None when dedup is disabled."""
+        if not self.dedup:
+            return None
+        if tenant not in self._dedup_indexes:
+            self._dedup_indexes[tenant] = NearDuplicateIndex()
+        return self._dedup_indexes[tenant]
+
+    def exemplar_index(self, tenant: str, template: "ExemplarIndex") -> "ExemplarIndex":
+        """The tenant's exemplar index, created empty with ``template``'s settings."""
+        if tenant not in self._exemplar_indexes:
+            self._exemplar_indexes[tenant] = type(template)(
+                dim=template.dim,
+                reuse_threshold=template.reuse_threshold,
+                min_similarity=template.min_similarity,
+                nprobe=template.nprobe
+            )
+        return self._exemplar_indexes[tenant]
+
+    def _check_quota(self, tenant: str, tokens: int):
+        if self.requests_per_minute:
+            bucket = self._request_buckets.get(tenant)
+            if bucket is None:
+                bucket = self._request_buckets[tenant] = TokenBucket(
+                    self.requests_per_minute, self.clock
+                )
+            if not bucket.try_take(1):
+                raise QuotaExceeded(tenant, "request")
+        if self.tokens_per_minute:
+            bucket = self._token_buckets.get(tenant)
+            if bucket is None:
+                bucket = self._token_buckets[tenant] = TokenBucket(
+                    self.tokens_per_minute, self.clock
+                )
+            if not bucket.try_take(tokens):
+                raise QuotaExceeded(tenant, "token")
+
+    @asynccontextmanager
+    async def admit(self, tenant: str, tokens: int = 0) -> AsyncIterator[None]:
+        """Check quotas, wait for a fair-share slot and record metrics."""
+        metrics = self.metrics[tenant]
+        metrics["requests"] += 1
+        try:
+            self._check_quota(tenant, tokens)
+        except QuotaExceeded:
+            metrics["rejected"] += 1
+            raise
+
+        queued_at = time.perf_counter()
+        await self.scheduler.acquire(tenant, weight=self.weight(tenant))
+        started_at = time.perf_counter()
+        wait_s = started_at - queued_at
+        metrics["queue_wait_s"] += wait_s
+        metrics["max_queue_wait_s"] = max(metrics["max_queue_wait_s"], wait_s)
+        metrics["tokens"] += tokens
+        try:
+            yield
+        except BaseException:
+            metrics["failed"] += 1
+            raise
+        else:
+            metrics["completed"] += 1
+        finally:
+            metrics["latency_s"] += time.perf_counter() - started_at
+            self.scheduler.release()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return a JSON-serializable copy of the per-tenant metrics."""
+        return {tenant: dict(metrics) for tenant, metrics in self.metrics.items()}
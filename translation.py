@@ -0,0 +1,118 @@
+"""
+Translated agent instructions for Inbox Assistant
+Language variants of the instructions translated once by a model and kept
+in a cache file, so recurring languages never pay for translation again
+"""
+import hashlib
+import json
+import os
+from typing import Awaitable, Callable, Dict, Optional
+
+import config
+from prompts import LANGUAGE_NAMES, instructions_for
+
+# Translates instruction text into a language, given by name.
+Translator = Callable[[str, str], Awaitable[str]]
+
+TRANSLATION_INSTRUCTION = """Translate the agent instructions you are given into {language}.
+
+Keep in English: quoted words, tone labels, urgency levels (HIGH, MEDIUM, LOW),
+field names and the phrase "No action required".
+Respond with the translated instructions only.
+"""
+
+
+class TranslationCache:
+    """Translations keyed by target language and a digest of the source text.
+
+    The digest covers the English text, so entries for instructions that
+    changed are simply never hit again. With a ``path`` the cache is read
+    on creation and written by save().
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, str] = {}
+        if path is not None and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._entries = json.load(f)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(language: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        return f"{language}:{digest}"
+
+    def get(self, language: str, text: str) -> Optional[str]:
+        translation = self._entries.get(self.key(language, text))
+        if translation is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return translation
+
+    def put(self, language: str, text: str, translation: str):
+        self._entries[self.key(language, text)] = translation
+
+    def save(self):
+        """Write the cache file, replacing it atomically."""
+        if self.path is None:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(temporary, self.path)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses}
+
+
+def model_translator(model=None) -> Translator:
+    """Translate through an ADK model, GEMINI_MODEL by default."""
+
+    async def translate(text: str, language: str) -> str:
+        from google.adk.models.llm_request import LlmRequest
+        from google.genai.types import Content, GenerateContentConfig, Part
+        from models import as_llm, response_text
+
+        llm = as_llm(model or config.GEMINI_MODEL)
+        request = LlmRequest(
+            model=llm.model,
+            contents=[Content(role="user", parts=[Part(text=text)])],
+            config=GenerateContentConfig(
+                system_instruction=TRANSLATION_INSTRUCTION.format(language=language),
+                temperature=0.0
+            )
+        )
+        responses = [response async for response in llm.generate_content_async(request)]
+        return response_text(responses).strip()
+
+    return translate
+
+
+async def translated_instructions(
+    language: str, translator: Translator, cache: TranslationCache
+) -> Dict[str, str]:
+    """The instruction variant for a language, translated into it.
+
+    English and languages without a variant are returned untranslated.
+    Each instruction is translated at most once per cache.
+    """
+    instructions = instructions_for(language)
+    if language not in LANGUAGE_NAMES or language == "en":
+        return instructions
+    translated = {}
+    for agent_key, text in instructions.items():
+        translation = cache.get(language, text)
+        if translation is None:
+            translation = await translator(text, LANGUAGE_NAMES[language])
+            cache.put(language, text, translation)
+        translated[agent_key] = translation
+    return translated
+
@@ -2,50 +2,33 @@
 Utility functions for Inbox Assistant
 """
 import json
-from typing import Dict, Any, List
-from langdetect import detect, LangDetectException
+from typing import Dict, Any, List, Sequence
+
+import keywords
+import rendering
 
 
 def detect_language(text: str) -> str:
     """Detect the language of input text."""
+    from langdetect import detect, LangDetectException
+
     try:
         return detect(text)
     except LangDetectException:
         return "en"
 
 
+def group_by_language(languages: Sequence[str]) -> List[int]:
+    """Positions reordered so equal languages are adjacent, in order of first appearance."""
+    groups: Dict[str, List[int]] = {}
+    for position, language in enumerate(languages):
+        groups.setdefault(language, []).append(position)
+    return [position for group in groups.values() for position in group]
+
+
 def format_agent_output(output: Dict[str, Any]) -> str:
     """Format agent output for display."""
-    formatted = "\n" + "="*60 + "\n"
-    formatted += "INBOX ASSISTANT ANALYSIS\n"
-    formatted += "="*60 + "\n\n"
-
-    if "summary" in output:
-        formatted += f"📝 SUMMARY:\n{output['summary']}\n\n"
-
-    if "urgency" in output:
-        urgency_emoji = {"High": "🔴", "Medium": "🟡", "Low": "🟢"}
-        emoji = urgency_emoji.get(output['urgency'], "⚪")
-        formatted += f"{emoji} URGENCY: {output['urgency']}\n\n"
-
-    if "tone" in output:
-        formatted += f"😊 TONE: {output['tone']}\n\n"
-
-    if "draft_reply" in output:
-        formatted += f"✉️ SUGGESTED REPLY:\n{output['draft_reply']}\n\n"
-
-    if "action_items" in output:
-        formatted += "✅ ACTION ITEMS:\n"
-        items = output['action_items']
-        if isinstance(items, list):
-            for i, item in enumerate(items, 1):
-                formatted += f"  {i}. {item}\n"
-        else:
-            formatted += f"  {items}\n"
-        formatted += "\n"
-
-    formatted += "="*60 + "\n"
-    return formatted
+    return rendering.render(output, "terminal")
 
 
 def parse_json_response(response_text: str) -> Dict[str, Any]:
@@ -77,21 +60,9 @@ def validate_urgency(urgency: str) -> str:
 
 def extract_action_items(text: str) -> List[str]:
     """Extract action items from text using heuristics."""
-    action_items = []
-
-    action_verbs = [
-        "send", "submit", "complete", "review", "update", 
-        "schedule", "prepare", "confirm", "respond", "call",
-        "email", "follow up", "check", "verify", "provide"
+    action_items = [
+        line for line in keywords.action_lines(text) if len(line) > 10
     ]
-
-    lines = text.split("\n")
-    for line in lines:
-        line_lower = line.lower()
-        if any(verb in line_lower for verb in action_verbs):
-            if len(line.strip()) > 10:
-                action_items.append(line.strip())
-
     return action_items if action_items else ["No specific action items detected"]
 
 